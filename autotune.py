@@ -0,0 +1,180 @@
+# autotune.py
+"""
+Throughput autotuner for train.py.
+
+Runs short PPO calibration trials on the current machine and writes the fastest
+resource settings to configs/autotune.json, which train.py loads automatically.
+
+Two sweeps keep the number of trials small:
+1. Rollout: num_workers x num_envs_per_env_runner, scored by sampled env-steps/s
+2. Learner: train_batch_size x minibatch_size x torch_compile, scored by trained
+   env-steps/s (end-to-end), using the best rollout settings
+
+Usage:
+    python autotune.py                 # full sweep
+    python autotune.py --quick         # fewer candidates, 1 measured iteration
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import ray
+from dotenv import load_dotenv
+from ray.tune.registry import register_env
+from ray.rllib.algorithms.ppo import PPO
+from backend.env.environment import DecentralizedEconomyEnv
+from backend.training_config import TUNED_CONFIG_PATH, detect_num_gpus
+from train import ENV_NAME, build_config
+
+
+# ---------- Candidates ----------
+def rollout_candidates(num_cpus, quick=False):
+    """(num_workers, num_envs_per_env_runner) pairs; one CPU is kept for the driver/learner."""
+    max_workers = max(num_cpus - 1, 0)
+    workers = sorted({w for w in (0, 1, 2, 4, 8, 16, 32, max_workers) if w <= max_workers})
+    if quick:
+        workers = sorted({workers[0], workers[len(workers) // 2], workers[-1]})
+    envs = (1, 4) if quick else (1, 2, 4, 8)
+    return [{"num_workers": w, "num_envs_per_env_runner": e} for w in workers for e in envs]
+
+
+def learner_candidates(quick=False):
+    """train_batch_size x minibatch_size x torch compile on/off."""
+    batches = (2048, 4096) if quick else (1024, 2048, 4096, 8192)
+    minibatches = (256,) if quick else (128, 256, 512)
+    candidates = []
+    for batch in batches:
+        for minibatch in minibatches:
+            for compile_ in (False, True):
+                candidates.append({
+                    "train_batch_size": batch,
+                    "minibatch_size": minibatch,
+                    "torch_compile_learner": compile_,
+                    "torch_compile_worker": compile_,
+                })
+    return candidates
+
+
+# ---------- Trials ----------
+def run_trial(overrides, iterations, warmup):
+    """
+    Build PPO with train.py's config plus `overrides`, run `warmup` unmeasured and
+    `iterations` measured training iterations. Returns throughput measurements,
+    or an "error" entry if the configuration cannot be built or trained.
+    """
+    config, temp_env = build_config(env_overrides={"db_sink": "null", "profile": False})
+    config.update(overrides)
+    trial = {"overrides": overrides}
+    algo = None
+    try:
+        algo = PPO(config=config)
+        for _ in range(warmup):
+            algo.train()
+        sampled = trained = 0
+        sample_seconds = elapsed = 0.0
+        learn_throughput = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result = algo.train()
+            elapsed += time.perf_counter() - start
+            sampled += result.get("num_env_steps_sampled_this_iter", 0)
+            trained += result.get("num_env_steps_trained_this_iter", 0)
+            timers = result.get("timers", {})
+            sample_seconds += timers.get("sample_time_ms", 0.0) / 1e3
+            if "learn_throughput" in timers:
+                learn_throughput.append(timers["learn_throughput"])
+        trial.update({
+            "sampled_env_steps_per_s": sampled / sample_seconds if sample_seconds else 0.0,
+            "trained_env_steps_per_s": trained / elapsed if elapsed else 0.0,
+            "learner_samples_per_s": sum(learn_throughput) / len(learn_throughput) if learn_throughput else 0.0,
+            "seconds_per_iteration": elapsed / iterations,
+        })
+    except Exception as e:
+        trial["error"] = repr(e)
+    finally:
+        if algo is not None:
+            algo.stop()
+        temp_env.db.shutdown()
+    return trial
+
+
+def pick_best(trials, metric):
+    """Trial with the highest `metric`, ignoring failed trials (None if all failed)."""
+    ok = [trial for trial in trials if "error" not in trial]
+    return max(ok, key=lambda trial: trial[metric]) if ok else None
+
+
+def sweep(candidates, metric, iterations, warmup, base=None, label=""):
+    trials = []
+    for i, overrides in enumerate(candidates, 1):
+        overrides = {**(base or {}), **overrides}
+        trial = run_trial(overrides, iterations, warmup)
+        trials.append(trial)
+        outcome = trial.get("error") or f"{trial[metric]:.0f} {metric}"
+        print(f"[{label} {i}/{len(candidates)}] {overrides} -> {outcome}")
+    return trials, pick_best(trials, metric)
+
+
+# ---------- Output ----------
+def write_tuned_config(path, config, trials, num_cpus, num_gpus):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {
+        "machine": {
+            "hostname": socket.gethostname(),
+            "num_cpus": num_cpus,
+            "num_gpus": num_gpus,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "config": config,
+        "trials": trials,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=TUNED_CONFIG_PATH, help="Where to write the tuned config")
+    parser.add_argument("--iterations", type=int, default=2, help="Measured training iterations per trial")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured iterations per trial")
+    parser.add_argument("--quick", action="store_true", help="Fewer candidates and a single measured iteration")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.iterations = 1
+
+    load_dotenv()
+    num_cpus = os.cpu_count() or 1
+    num_gpus = min(detect_num_gpus(), 1)
+    print(f"🔧 Autotuning on {num_cpus} CPUs, {num_gpus} GPU(s)")
+
+    ray.init(ignore_reinit_error=True, num_gpus=num_gpus)
+    register_env(ENV_NAME, lambda config: DecentralizedEconomyEnv(config))
+    try:
+        base = {"num_gpus": num_gpus}
+        rollout_trials, best_rollout = sweep(
+            rollout_candidates(num_cpus, args.quick), "sampled_env_steps_per_s",
+            args.iterations, args.warmup, base=base, label="rollout",
+        )
+        if best_rollout is None:
+            print("❌ Every rollout configuration failed; no config written.")
+            return 1
+        learner_trials, best = sweep(
+            learner_candidates(args.quick), "trained_env_steps_per_s",
+            args.iterations, args.warmup, base=best_rollout["overrides"], label="learner",
+        )
+        best = best or best_rollout
+    finally:
+        ray.shutdown()
+
+    write_tuned_config(args.output, best["overrides"], rollout_trials + learner_trials, num_cpus, num_gpus)
+    print(f"\n✅ Best config: {best['overrides']} ({best['trained_env_steps_per_s']:.0f} trained env-steps/s)")
+    print(f"💾 Written to {args.output}; train.py picks it up automatically.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# backend/callbacks.py
+from ray.rllib.algorithms.callbacks import DefaultCallbacks
+
+
+class EconomyMetricsCallbacks(DefaultCallbacks):
+    """
+    Copies the env's per-episode metrics into RLlib custom metrics.
+    DecentralizedEconomyEnv (with env_config["profile"] enabled) returns them in
+    infos["__common__"] on the final step:
+    - step_profile: mean microseconds per step for each step phase
+    - db:           logging connector write latency and queue depth
+    RLlib reports custom metrics as mean/min/max, so they appear in TensorBoard under
+    ray/tune/env_runners/custom_metrics/ next to the training curves.
+    """
+
+    def on_episode_end(self, *, episode, **kwargs):
+        common = episode.last_info_for("__common__") or {}
+        for group in ("step_profile", "db"):
+            for name, value in common.get(group, {}).items():
+                episode.custom_metrics[f"{group}/{name}"] = value
+
+
+def make_warm_start_callbacks(checkpoint, mapping, base=EconomyMetricsCallbacks):
+    """
+    Callbacks class that, once the algorithm is built, loads policy weights from
+    `checkpoint` according to `mapping` ({new_policy_id: checkpoint_policy_id}) and
+    syncs them to all rollout workers. Tensors whose shape changed are left as initialised.
+    """
+
+    class WarmStartCallbacks(base):
+        def on_algorithm_init(self, *, algorithm, **kwargs):
+            from backend.checkpoints import load_policy_weights, merge_weights
+            super().on_algorithm_init(algorithm=algorithm, **kwargs)
+            source = load_policy_weights(checkpoint, set(mapping.values()))
+            weights = {}
+            for target, source_id in mapping.items():
+                current = algorithm.get_policy(target).get_weights()
+                weights[target], skipped = merge_weights(current, source[source_id])
+                print(f"♻️ Warm start {target} <- {source_id} "
+                      f"({len(current) - len(skipped)}/{len(current)} tensors, skipped: {skipped or 'none'})")
+            algorithm.set_weights(weights)
+            algorithm.env_runner_group.sync_weights(policies=list(weights))
+
+    return WarmStartCallbacks
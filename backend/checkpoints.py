@@ -0,0 +1,136 @@
+# backend/checkpoints.py
+import os
+import re
+import pickle
+from pathlib import Path
+
+CHECKPOINT_MARKERS = ("rllib_checkpoint.json", "algorithm_state.pkl", "algorithm_state.msgpack")
+_CHECKPOINT_INDEX = re.compile(r"checkpoint_(\d+)$")
+
+
+# ---------- Discovery ----------
+def is_checkpoint_dir(path) -> bool:
+    path = Path(path)
+    return path.is_dir() and any((path / marker).exists() for marker in CHECKPOINT_MARKERS)
+
+
+def find_checkpoints(root):
+    """
+    All RLlib algorithm checkpoints below `root` (an experiment dir, a trial dir or a
+    checkpoint itself), oldest first. Ordered by modification time, then checkpoint index,
+    so discovery does not depend on absolute paths or the OS the run was started on.
+    """
+    root = Path(os.path.expandvars(os.path.expanduser(str(root))))
+    if is_checkpoint_dir(root):
+        return [root]
+    if not root.is_dir():
+        return []
+    found = [path for path in root.rglob("checkpoint_*") if is_checkpoint_dir(path)]
+
+    def order(path):
+        match = _CHECKPOINT_INDEX.search(path.name)
+        return (path.stat().st_mtime, int(match.group(1)) if match else -1)
+
+    return sorted(found, key=order)
+
+
+def latest_checkpoint(root):
+    """Most recent checkpoint below `root`, or None."""
+    checkpoints = find_checkpoints(root)
+    return str(checkpoints[-1]) if checkpoints else None
+
+
+# ---------- Policy weights ----------
+def _load_state(state_file):
+    if state_file.endswith((".msgpck", ".msgpack")):
+        from ray.rllib.utils.checkpoints import try_import_msgpack
+        msgpack = try_import_msgpack(error=True)
+        with open(state_file, "rb") as f:
+            return msgpack.load(f, raw=False)
+    with open(state_file, "rb") as f:
+        return pickle.load(f)
+
+
+def checkpoint_policy_ids(checkpoint):
+    from ray.rllib.utils.checkpoints import get_checkpoint_info
+    return sorted(get_checkpoint_info(os.path.abspath(checkpoint)).get("policy_ids") or [])
+
+
+def load_policy_weights(checkpoint, policy_ids=None):
+    """
+    {policy_id: weights} read straight from an old-API-stack algorithm checkpoint
+    (policies/<policy_id>/policy_state.*). No policy objects or framework are built.
+    """
+    from ray.rllib.utils.checkpoints import get_checkpoint_info
+    checkpoint = os.path.abspath(checkpoint)
+    weights = {}
+    for policy_id in checkpoint_policy_ids(checkpoint):
+        if policy_ids is not None and policy_id not in policy_ids:
+            continue
+        info = get_checkpoint_info(os.path.join(checkpoint, "policies", policy_id))
+        weights[policy_id] = _load_state(info["state_file"])["weights"]
+    return weights
+
+
+def resolve_warm_start_mapping(target_ids, source_ids, spec=None):
+    """
+    Map new policies to checkpoint policies: {target_id: source_id}.
+    `spec` is "target=source,..." (use "*=source" for every otherwise unmapped target);
+    targets not named in the spec take the source policy with the same id, if any.
+    """
+    explicit, default = {}, None
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        target, _, source = item.partition("=")
+        if not source:
+            raise ValueError(f"Invalid warm-start mapping '{item}', expected target=source")
+        if target == "*":
+            default = source
+        else:
+            explicit[target] = source
+
+    mapping = {}
+    for target in target_ids:
+        source = explicit.get(target) or (target if target in source_ids else default)
+        if source is not None:
+            mapping[target] = source
+    missing = sorted(set(mapping.values()) - set(source_ids))
+    if missing:
+        raise ValueError(f"Checkpoint has no policies {missing}; available: {sorted(source_ids)}")
+    return mapping
+
+
+def merge_weights(current, source):
+    """
+    Copy every source tensor whose name and shape match the current weights.
+    Returns (merged, skipped_names) so layers whose shape changed (e.g. a first layer
+    that gained agent-id inputs) keep their fresh initialisation.
+    """
+    merged, skipped = dict(current), []
+    for name, value in current.items():
+        if name in source and getattr(source[name], "shape", None) == getattr(value, "shape", None):
+            merged[name] = source[name]
+        else:
+            skipped.append(name)
+    return merged, skipped
+
+
+# ---------- Policies for inference ----------
+def load_policies(checkpoint, policy_ids=None):
+    """
+    {policy_id: Policy} rebuilt from an old-API-stack algorithm checkpoint for CPU
+    inference: each policy is created with Policy.from_state and num_gpus=0, so no
+    algorithm, env runners or GPU are needed (unlike restoring the whole Algorithm).
+    """
+    from ray.rllib.policy.policy import Policy
+    from ray.rllib.utils.checkpoints import get_checkpoint_info
+    checkpoint = os.path.abspath(checkpoint)
+    policies = {}
+    for policy_id in checkpoint_policy_ids(checkpoint):
+        if policy_ids is not None and policy_id not in policy_ids:
+            continue
+        info = get_checkpoint_info(os.path.join(checkpoint, "policies", policy_id))
+        state = _load_state(info["state_file"])
+        config = state["policy_spec"]["config"]
+        config.update({"num_gpus": 0, "num_gpus_per_env_runner": 0, "worker_index": 0, "_fake_gpus": False})
+        policies[policy_id] = Policy.from_state(state)
+    return policies
@@ -1,105 +1,323 @@
+import os
 import atexit
 import threading
-from database.local_db import agent_data_manager
+import time
+from collections import deque
+from backend.sinks import NullSink, make_sink
+from backend.utils.tracing import get_tracer, INFO, WARNING
+
+TRACE = get_tracer("db")
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "sample")
+
+
+# ---------- Run identity ----------
+def new_run_id():
+    return time.strftime("run-%Y%m%d-%H%M%S")
+
+
+_process_run_id = None
+
+
+def default_run_id():
+    """$RUN_ID, or one id generated per process. Training scripts pass theirs to every env."""
+    global _process_run_id
+    if os.getenv("RUN_ID"):
+        return os.environ["RUN_ID"]
+    if _process_run_id is None:
+        _process_run_id = new_run_id()
+    return _process_run_id
+
 
 class LocalDBConnector:
     """
-    Handles all communication with the local PostgreSQL database, with batching.
+    Handles all communication with the logging sink (local PostgreSQL by default), with batching.
+    Log calls only append to a bounded in-memory queue; a dedicated writer thread
+    drains it and performs bulk writes, so database latency never blocks env.step.
+    Nothing is connected or started until the first log call.
+
+    Sinks: "postgres", "memory", "null", "parquet", "ray_actor" (see backend/sinks.py) or any object
+    with write(table_name, rows) and close(). `sink_options` are passed to the sink.
+
+    Log calls accept `keys` ({"run_id", "env_id", "episode", "step"}), which are added to
+    every row so the tables can be partitioned and aggregated by run and episode.
+
+    Backpressure when the queue is full (max_queue_size rows):
+    - "block":       the caller waits until the writer frees space
+    - "drop_oldest": the oldest queued row is discarded to make room
+    - "sample":      only every `sample_every`-th new row is admitted (replacing the
+                     oldest queued row); the rest are dropped
     """
-    def __init__(self, batch_interval=5):
+    def __init__(self, batch_interval=5, batch_size=500, flush_interval=None,
+                 max_queue_size=50000, backpressure="block", sample_every=10, sink="postgres",
+                 sink_options=None):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy '{backpressure}', expected one of {BACKPRESSURE_POLICIES}")
         self.batch_interval = batch_interval
-        self.log_batches = {
-            'agent_states': [],
-            'transactions': [],
-            'governance_log': []
-        }
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval if flush_interval is not None else batch_interval
+        self.max_queue_size = max_queue_size
+        self.backpressure = backpressure
+        self.sample_every = sample_every
+        self.sink = make_sink(sink, **(sink_options or {}))
+        self.enabled = not isinstance(self.sink, NullSink)
+
+        self.queue = deque()
         self.lock = threading.Lock()
-        atexit.register(self.shutdown)
+        self._not_empty = threading.Condition(self.lock)
+        self._not_full = threading.Condition(self.lock)
+        self._idle = threading.Condition(self.lock)
+        self._in_flight = 0
+        self._overflow_seen = 0
+        self._flush_waiters = 0
+        self._stopping = False
+
+        # Counters (rows): queued == written + dropped + failed + current queue depth
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
 
-        self.flush_timer = threading.Timer(self.batch_interval, self._periodic_flush)
-        self.flush_timer.daemon = True
-        self.flush_timer.start()
+        # Write metrics: sink write latency per batch and the deepest queue seen
+        self.batches_written = 0
+        self.write_seconds = 0.0
+        self.write_seconds_max = 0.0
+        self.queue_depth_max = 0
 
-    def _periodic_flush(self):
+        self.writer = None
+        self._registered_runs = set()
+
+    def _start_writer(self):
+        """Start the writer thread on first use. Caller holds the lock."""
+        atexit.register(self.shutdown)
+        self.writer = threading.Thread(target=self._writer_loop, name="LocalDBConnector-writer", daemon=True)
+        self.writer.start()
+
+    # ---------- Queue ----------
+    def _enqueue(self, table_name, rows):
+        """Append rows for one table; O(1) per row unless the 'block' policy has to wait."""
+        if not self.enabled:
+            return
         with self.lock:
-            for table_name in list(self.log_batches.keys()):
-                self._flush_batch(table_name)
-        self.flush_timer = threading.Timer(self.batch_interval, self._periodic_flush)
-        self.flush_timer.daemon = True
-        self.flush_timer.start()
-
-    def _flush_batch(self, table_name):
-        batch = self.log_batches.get(table_name, [])
+            if self.writer is None:
+                self._start_writer()
+            for row in rows:
+                self.queued += 1
+                if len(self.queue) >= self.max_queue_size:
+                    if self.backpressure == "block":
+                        while len(self.queue) >= self.max_queue_size and not self._stopping:
+                            self._not_full.wait()
+                    elif self.backpressure == "drop_oldest":
+                        self.queue.popleft()
+                        self.dropped += 1
+                    else:  # sample
+                        self._overflow_seen += 1
+                        if self._overflow_seen % self.sample_every:
+                            self.dropped += 1
+                            continue
+                        self.queue.popleft()
+                        self.dropped += 1
+                self.queue.append((table_name, row))
+            if len(self.queue) > self.queue_depth_max:
+                self.queue_depth_max = len(self.queue)
+            if len(self.queue) >= self.batch_size:
+                self._not_empty.notify()
+
+    def _take_batch(self):
+        """Pop up to batch_size rows, grouped by table. Caller holds the lock."""
+        batches = {}
+        for _ in range(min(self.batch_size, len(self.queue))):
+            table_name, row = self.queue.popleft()
+            batches.setdefault(table_name, []).append(row)
+        self._in_flight += sum(len(rows) for rows in batches.values())
+        self._not_full.notify_all()
+        return batches
+
+    # ---------- Writer ----------
+    def _writer_loop(self):
+        while True:
+            with self.lock:
+                if len(self.queue) < self.batch_size and not (self._stopping or self._flush_waiters):
+                    self._not_empty.wait(self.flush_interval)
+                if self._stopping and not self.queue:
+                    return
+                batches = self._take_batch()
+            self._write_batches(batches)
+
+    def _write_batches(self, batches):
+        for table_name, rows in batches.items():
+            start = time.perf_counter()
+            ok = self._flush_batch(table_name, rows)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.batches_written += 1
+                self.write_seconds += elapsed
+                self.write_seconds_max = max(self.write_seconds_max, elapsed)
+                if ok:
+                    self.written += len(rows)
+                else:
+                    self.failed += len(rows)
+                self._in_flight -= len(rows)
+                if not self.queue and self._in_flight == 0:
+                    self._idle.notify_all()
+
+    def _flush_batch(self, table_name, batch):
         if not batch:
-            return
+            return True
         try:
-            if table_name == 'agent_states':
-                for data in batch:
-                    agent_id = data.pop('agent_id')
-                    agent_data_manager.save_agent_state(agent_id, data)
-            elif table_name == 'transactions':
-                for data in batch:
-                    agent_id = data.pop('agent_id', None)
-                    agent_data_manager.save_transaction({'agent_id': agent_id, **data})
-            elif table_name == 'governance_log':
-                for data in batch:
-                    event_type = data.get('event_type')
-                    agent_id = data.get('agent_id')
-                    details = data.get('details')
-                    agent_data_manager.save_governance_event(event_type, agent_id, details)
-            self.log_batches[table_name] = []
+            self.sink.write(table_name, batch)
+            return True
         except Exception as e:
-            print(f"[DB] Batch write failed for table '{table_name}': {e}")
+            TRACE.event("batch_write_failed", WARNING, table=table_name, rows=len(batch), error=repr(e))
+            return False
 
-    def log_agent_state(self, agent_id: str, state: dict):
-        data = {
-            "cash": state.get("cash_balance", 0),
-            "assets": state.get("assets_held", 0),
+    def flush(self, timeout=None):
+        """Block until every queued row has been written (or failed). Returns False on timeout."""
+        with self.lock:
+            if self.writer is None or not self.writer.is_alive():
+                return not self.queue and self._in_flight == 0
+            self._flush_waiters += 1
+            self._not_empty.notify()
+            try:
+                return self._idle.wait_for(lambda: not self.queue and self._in_flight == 0, timeout)
+            finally:
+                self._flush_waiters -= 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "queued": self.queued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "queue_depth": len(self.queue),
+            }
+
+    def write_metrics(self) -> dict:
+        """Sink write latency (per table batch) and queue depth, for monitoring."""
+        with self.lock:
+            batches = self.batches_written
+            return {
+                "batches": batches,
+                "write_ms_mean": self.write_seconds / batches * 1e3 if batches else 0.0,
+                "write_ms_max": self.write_seconds_max * 1e3,
+                "queue_depth": len(self.queue),
+                "queue_depth_max": self.queue_depth_max,
+            }
+
+    # ---------- Log calls ----------
+    @staticmethod
+    def _agent_state_row(agent_id: str, state: dict, keys=None) -> dict:
+        # Env states use "cash"/"assets"; "cash_balance"/"assets_held" are older aliases
+        row = {
+            'agent_id': agent_id,
+            "cash": state.get("cash", state.get("cash_balance", 0)),
+            "assets": state.get("assets", state.get("assets_held", 0)),
             "reputation": state.get("reputation", 1.0),
             "tokens": state.get("tokens", 0),
             "total_trades": state.get("total_trades", 0),
         }
-        with self.lock:
-            batch_data = {'agent_id': agent_id}
-            batch_data.update(data)
-            self.log_batches['agent_states'].append(batch_data)
-            if len(self.log_batches['agent_states']) >= self.batch_interval:
-                self._flush_batch('agent_states')
+        if keys:
+            row.update(keys)
+        return row
+
+    def log_agent_state(self, agent_id: str, state: dict, keys=None):
+        self._enqueue('agent_states', (self._agent_state_row(agent_id, state, keys),))
 
-    def log_transaction(self, agent_id: str, action_type: str, price: float, quantity: int = 1):
+    def log_agent_states(self, agent_ids, states, keys=None):
+        """Log one state per agent (e.g. a whole env step) under a single lock acquisition."""
+        if not self.enabled:
+            return
+        rows = [self._agent_state_row(agent_id, state, keys) for agent_id, state in zip(agent_ids, states)]
+        self._enqueue('agent_states', rows)
+
+    def log_agent_state_deltas(self, rows, keys=None):
+        """
+        Log delta-encoded agent state rows (see StateDeltaEncoder): keyframe rows hold
+        every field, the others only the fields that changed.
+        """
+        if not self.enabled or not rows:
+            return
+        if keys:
+            for row in rows:
+                row.update(keys)
+        self._enqueue('agent_states', rows)
+
+    def log_transaction(self, agent_id: str, action_type: str, price: float, quantity: int = 1, keys=None):
         data = {
             'agent_id': agent_id,
             'action_type': action_type,
             'price': price,
             'quantity': quantity,
+            **(keys or {}),
         }
-        with self.lock:
-            self.log_batches['transactions'].append(data)
-            if len(self.log_batches['transactions']) >= self.batch_interval:
-                self._flush_batch('transactions')
+        self._enqueue('transactions', (data,))
+
+    def log_transactions(self, rows, keys=None):
+        """Log many trades at once (dicts with agent_id, action_type, price, quantity)."""
+        if keys:
+            rows = [{**row, **keys} for row in rows]
+        self._enqueue('transactions', rows)
 
-    def log_governance_event(self, event_type: str, agent_id: str, details: dict):
+    def log_governance_event(self, event_type: str, agent_id: str, details: dict, keys=None):
         data = {
             'event_type': event_type,
             'agent_id': agent_id,
-            'details': details
+            'details': details,
+            **(keys or {}),
         }
-        with self.lock:
-            self.log_batches['governance_log'].append(data)
-            if len(self.log_batches['governance_log']) >= self.batch_interval:
-                self._flush_batch('governance_log')
+        self._enqueue('governance_log', (data,))
 
-    def log_simulation_run(self, agent_count: int, details: dict = None):
-        try:
-            print(f"[DB] Simulation run logged: agent_count={agent_count}, details={details}")
-        except Exception as e:
-            print(f"Error logging simulation run: {e}")
+    def log_rows(self, table_name, rows):
+        """Log already-built rows for any table (used by the log aggregator actor)."""
+        self._enqueue(table_name, rows)
+
+    def log_simulation_run(self, agent_count: int, details: dict = None, run_id: str = None):
+        """Register a run (once per connector and run_id) in the simulation_runs table."""
+        if TRACE.enabled_for(INFO):
+            TRACE.event("simulation_run", run_id=run_id, agent_count=agent_count, details=details)
+        if run_id is None or not self.enabled:
+            return
+        with self.lock:
+            if run_id in self._registered_runs:
+                return
+            self._registered_runs.add(run_id)
+        self._enqueue('simulation_runs', ({'run_id': run_id, 'agent_count': agent_count, 'details': details},))
 
     def shutdown(self):
-        print("\n[DB] Shutting down connector and flushing remaining logs...")
+        if self._stopping:
+            return
         with self.lock:
-            for table_name in list(self.log_batches.keys()):
-                self._flush_batch(table_name)
-        print("[DB] Log flushing complete.")
-        if self.flush_timer.is_alive():
-            self.flush_timer.cancel()
+            self._stopping = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self.writer is None:
+            self.sink.close()
+            return
+        TRACE.event("connector_shutdown", queue_depth=len(self.queue))
+        self.writer.join()
+        self.sink.close()
+        if TRACE.enabled_for(INFO):
+            TRACE.event("connector_flushed", **self.stats())
+
+
+# ---------- Shared per-process connectors ----------
+_shared_connectors = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_connector(sink="postgres", **options):
+    """
+    Return the process-wide connector for a sink name, creating it on first request.
+    All envs in a worker process that ask for the same sink and options share one writer.
+    Sink objects (instead of names) always get their own connector.
+    """
+    if not isinstance(sink, str):
+        return LocalDBConnector(sink=sink, **options)
+    key = (sink, repr(sorted(options.items())))
+    with _shared_lock:
+        connector = _shared_connectors.get(key)
+        if connector is None or connector._stopping:
+            connector = LocalDBConnector(sink=sink, **options)
+            _shared_connectors[key] = connector
+        return connector
@@ -1,38 +1,75 @@
+import pickle
 import numpy as np
 from gymnasium import spaces
 from ray.rllib.env import MultiAgentEnv
 from backend.utils.governance import GovernanceModule
-from backend.env.utils import get_initial_agent_state, get_observation_space, get_action_space
-from backend.db_connector import LocalDBConnector  # updated here
-
-db_connector = LocalDBConnector()  # use LocalDBConnector instead of SupabaseConnector
+from backend.env.utils import get_observation_space, get_action_space, agent_id_features, env_spawn_key, make_rng
+from backend.env.state_store import AgentStateStore, StateDeltaEncoder
+from backend.env.market import BatchMarket
+from backend.env.profiling import make_profiler
+from backend.env.trace import EpisodeRecorder
+from backend.db_connector import get_shared_connector, default_run_id
+from backend.live_metrics import make_live_window
+from backend.utils.tracing import configure_tracer
 
 
 class DecentralizedEconomyEnv(MultiAgentEnv):
     """
     Multi-agent economic environment with governance.
     Features:
-    - Buy/Sell/Propose/Vote actions
+    - Buy/Sell/Propose/Vote actions (buys/sells are batch-cleared once per step, see market.py)
     - Reputation and economic reward system
-    - Local PostgreSQL logging for agent states, transactions, governance, and simulation runs
+    - Pluggable logging for agent states, transactions, governance, and simulation runs
+      (env_config["db_sink"]: "postgres" (default), "memory", "null", "parquet" or "ray_actor";
+      nothing connects until the first log call); rows carry run_id (env_config["run_id"]),
+      env_id, episode and step. Agent states are delta-encoded: a keyframe of every agent
+      every env_config["log_keyframe_every"] steps (default 10), otherwise only changed fields
     - META-LEARNING: Randomized parameters for adaptable agent training
+    - Own RNG stream per env: Generator spawned from SeedSequence(env_config["seed"] or
+      reset(seed=...)) with spawn key (worker_index, vector_index)
+    - Optional agent identity observation features for shared policies
+      (env_config["agent_id_obs"]: None, "onehot" or "binary")
+    - get_state()/set_state(): compact binary snapshots for forking counterfactual branches
+    - Optional episode traces (env_config["trace_dir"]): RNG state, task and action matrix
+      per episode, replayable with backend/env/trace.py
+    - Per-episode event counts (env.episode_counts: trades, proposals, votes, passed, failed)
+    - Optional live metrics (env_config["live_metrics"]): per-step market price, tax rate,
+      trade volume, proposals and vote outcomes, published at a fixed rate (pg_notify)
+    - Optional per-phase step timers (env_config["profile"]); per-episode aggregates and
+      connector write metrics are returned in infos["__common__"] on the final step
     """
 
+    # Per-episode event counts (env.episode_counts), reset on every reset()
+    EPISODE_COUNTERS = ("trades", "proposals", "votes", "passed", "failed")
+
     def __init__(self, env_config=None):
         super().__init__()
         env_config = env_config or {}
+        # Per-subsystem tracer options, e.g. {"governance": {"level": "INFO", "ring_size": 1000}}
+        for tracer_name, options in env_config.get("tracing", {}).items():
+            configure_tracer(tracer_name, **options)
         self._num_agents = env_config.get("num_agents", 4)
         self.max_steps = env_config.get("max_steps", 100)
         self.agents = [f"agent_{i}" for i in range(self._num_agents)]
 
+        # Identity features appended to every observation (empty unless agent_id_obs is set)
+        self._id_features = agent_id_features(self._num_agents, env_config.get("agent_id_obs"))
+
         # RLlib action and observation spaces
         single_action_space = get_action_space()
-        single_obs_space = get_observation_space()
+        single_obs_space = get_observation_space(self._id_features.shape[1])
         self.action_space = {agent: single_action_space for agent in self.agents}
         self.observation_space = {agent: single_obs_space for agent in self.agents}
 
         # Governance system
-        self.governance = GovernanceModule(eligible_voters=self.agents, vote_duration_steps=10)
+        self.governance = GovernanceModule(
+            eligible_voters=self.agents,
+            vote_duration_steps=10,
+            max_active_proposals=env_config.get("max_active_proposals", 1),
+        )
+
+        # Market: all of a step's orders clear together at the opening price
+        self.market = BatchMarket(max_fills_per_side=env_config.get("max_fills_per_side"))
 
         # Economic parameters
         self.tax_rate = 0.05
@@ -46,130 +83,257 @@ class DecentralizedEconomyEnv(MultiAgentEnv):
         # ----------------------------------------------------------------------------
 
         self.steps = 0
-        self.agent_states = {}
+        self.states = AgentStateStore(self.agents)
+
+        # Per-env random stream (task sampling and proposal values)
+        self._spawn_key = env_spawn_key(env_config)
+        self.rng = make_rng(env_config.get("seed"), self._spawn_key)
+
+        # Observations are written into one [A, 6 + k] block; per-agent obs are row views.
+        # RLlib keeps references to returned observations, so a fresh block is used per
+        # step unless the caller opts into reusing a single buffer.
+        self.reuse_obs_buffer = env_config.get("reuse_obs_buffer", False)
+        self._obs_buffer = np.zeros((self._num_agents, single_obs_space.shape[0]), dtype=np.float32)
+
+        # Logging via a process-wide LocalDBConnector for the configured sink
+        self.run_id = env_config.get("run_id") or default_run_id()
+        self.env_id = f"w{self._spawn_key[0]}-v{self._spawn_key[1]}"
+
+        # Episode trace recording (off unless trace_dir is set)
+        self.recorder = None
+        if env_config.get("trace_dir"):
+            self.recorder = EpisodeRecorder(
+                env_config["trace_dir"], env_config, self._num_agents, self.max_steps, self._spawn_key,
+                run_id=self.run_id,
+            )
+
+        self.episode = -1
+        self.episode_counts = dict.fromkeys(self.EPISODE_COUNTERS, 0)
+        self.state_log = StateDeltaEncoder(self.agents, env_config.get("log_keyframe_every", 10))
+        self.db = get_shared_connector(env_config.get("db_sink", "postgres"), **env_config.get("db_options", {}))
+        self.db.log_simulation_run(agent_count=self._num_agents, run_id=self.run_id)
+
+        # Live dashboard stream (off unless live_metrics is set)
+        self.live = make_live_window(env_config.get("live_metrics"), self.run_id, self.env_id)
 
-        # Local PostgreSQL logging via LocalDBConnector
-        self.db = db_connector  
-        self.db.log_simulation_run(agent_count=self._num_agents)
+        # Step phase timers (no-op unless enabled)
+        self.profiler = make_profiler(env_config.get("profile", False))
 
     # ---------- Reset ----------
     def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self.rng = make_rng(seed, self._spawn_key)
         self.steps = 0
+        self.episode += 1
+        self.episode_counts = dict.fromkeys(self.EPISODE_COUNTERS, 0)
         self.governance.end_voting_period()
+        self.profiler.reset()
+        rng_state = self.rng.bit_generator.state if self.recorder else None
 
         # --- META-LEARNING ADDITION 2: Sample a new task for the episode ---
-        self.market_price = np.random.uniform(*self.price_range)
-        self.tax_rate = np.random.uniform(*self.tax_range)
-        self.volatility_factor = np.random.uniform(*self.volatility_range)
+        lows = (self.price_range[0], self.tax_range[0], self.volatility_range[0])
+        highs = (self.price_range[1], self.tax_range[1], self.volatility_range[1])
+        self.market_price, self.tax_rate, self.volatility_factor = self.rng.uniform(lows, highs).tolist()
+        if self.recorder:
+            self.recorder.start(rng_state, (self.market_price, self.tax_rate, self.volatility_factor))
         # -----------------------------------------------------------------
 
-        self.agent_states = {
-            agent: {**get_initial_agent_state(), "market_price": self.market_price} for agent in self.agents
-        }
+        self.states.reset()
 
-        # Log initial states
-        for agent, state in self.agent_states.items():
-            self.db.log_agent_state(agent, state)
+        # Log initial states (always a keyframe)
+        self.state_log.force_keyframe()
+        if self.db.enabled:
+            self.db.log_agent_state_deltas(self.state_log.encode(self.states, self.steps), keys=self._log_keys())
 
-        obs = {agent: self._get_obs(agent) for agent in self.agents}
+        obs = self._get_obs()
         infos = {agent: {} for agent in self.agents}
         return obs, infos
 
     # ---------- Step ----------
     def step(self, action_dict):
+        profiler = self.profiler
+        profiler.start()
         self.steps += 1
-        obs, rewards, terminations, truncations, infos = {}, {}, {}, {}, {}
+        terminations, truncations, infos = {}, {}, {}
 
-        states_before = {agent: state.copy() for agent, state in self.agent_states.items()}
-        net_worths_before = {
-            agent: state['cash'] + state['assets'] * self.market_price for agent, state in states_before.items()
-        }
+        states = self.states
+        index = states.index
+        cash, assets, reputation = states.cash, states.assets, states.reputation
+        states.save_columns()
+        price_before = self.market_price
+        keys = self._log_keys() if self.db.enabled else None
 
         # ---------- Process actions ----------
-        for agent, action in action_dict.items():
-            state = self.agent_states[agent]
-            state["last_action"] = action
-
-            if action == 1:  # Buy
-                if state["cash"] >= self.market_price:
-                    state["cash"] -= self.market_price
-                    state["assets"] += 1
-                    state["total_trades"] += 1
-                    self.market_price *= self.volatility_factor
-                    state["reputation"] += 0.01
-                    self.db.log_transaction(agent, "buy", self.market_price)
-            elif action == 2:  # Sell
-                if state["assets"] > 0:
-                    earnings = self.market_price * (1 - self.tax_rate)
-                    state["cash"] += earnings
-                    state["assets"] -= 1
-                    state["total_trades"] += 1
-                    self.market_price /= self.volatility_factor  # inverse for sell
-                    state["reputation"] += 0.01
-                    self.db.log_transaction(agent, "sell", self.market_price)
-            elif action == 3:  # Propose Rule
-                proposed_tax = round(np.random.uniform(0.01, 0.2), 2)
-                if self.governance.start_proposal(agent, "tax_rate", proposed_tax, self.steps):
-                    state["reputation"] += 0.05
-                    self.db.log_governance_event("proposal", agent, self.governance.proposal_details)
+        acting = [index[agent] for agent in action_dict]
+        step_actions = np.zeros(len(self.agents), dtype=np.int64)
+        step_actions[acting] = list(action_dict.values())
+        states.last_action[acting] = step_actions[acting]
+        if self.recorder:
+            self.recorder.record(acting, step_actions[acting])
+        profiler.lap("actions")
+
+        # Buy/Sell: cleared together, independent of agent ordering. The columns are passed as
+        # one-economy [1, A] views so the arithmetic is identical to VectorizedEconomyEnv.
+        result = self.market.clear(
+            step_actions[None], cash[None], assets[None], reputation[None],
+            np.array([self.market_price]), np.array([self.volatility_factor]), np.array([self.tax_rate]),
+        )
+        self.market_price = float(result.new_price[0])
+        traded = result.traded[0]
+        states.total_trades += traded
+        reputation += np.where(traded, 0.01, 0.0)
+        profiler.lap("market")
+        if self.db.enabled and traded.any():
+            self.db.log_transactions(result.transaction_rows(self.agents), keys=keys)
+        profiler.lap("logging")
+
+        # Propose/Vote: sequential in action order (a proposal accepts votes from later agents).
+        # Proposal values are drawn in one batch, one per Propose action in action order.
+        num_proposals = int((step_actions == 3).sum())
+        proposed_taxes = iter(np.round(self.rng.uniform(0.01, 0.2, size=num_proposals), 2).tolist())
+        proposals_started = votes_yes = votes_no = 0
+        for (agent, action), i in zip(action_dict.items(), acting):
+            if action == 3:  # Propose Rule
+                proposed_tax = next(proposed_taxes)
+                proposal = self.governance.start_proposal(agent, "tax_rate", proposed_tax, self.steps)
+                if proposal:
+                    proposals_started += 1
+                    reputation[i] += 0.05
+                    self.db.log_governance_event("proposal", agent, proposal.details, keys=keys)
             elif action == 4:  # Vote Yes
-                if self.governance.cast_vote(agent, vote=True, weight=state.get("reputation", 1.0)):
-                    state["reputation"] += 0.02
-                    self.db.log_governance_event("vote_yes", agent, {"step": self.steps})
+                if self.governance.cast_vote(agent, vote=True, weight=reputation[i]):
+                    votes_yes += 1
+                    reputation[i] += 0.02
+                    self.db.log_governance_event("vote_yes", agent, {"step": self.steps}, keys=keys)
             elif action == 5:  # Vote No
-                if self.governance.cast_vote(agent, vote=False, weight=state.get("reputation", 1.0)):
-                    state["reputation"] += 0.02
-                    self.db.log_governance_event("vote_no", agent, {"step": self.steps})
-
-            self.agent_states[agent] = state
+                if self.governance.cast_vote(agent, vote=False, weight=reputation[i]):
+                    votes_no += 1
+                    reputation[i] += 0.02
+                    self.db.log_governance_event("vote_no", agent, {"step": self.steps}, keys=keys)
+        profiler.lap("governance")
 
         # ---------- Rewards ----------
-        for agent in self.agents:
-            net_worth_after = self.agent_states[agent]['cash'] + self.agent_states[agent]['assets'] * self.market_price
-            economic_reward = net_worth_after - net_worths_before[agent]
-            reputation_reward = (self.agent_states[agent]['reputation'] - states_before[agent]['reputation']) * 10.0
-            rewards[agent] = economic_reward + reputation_reward
+        economic_rewards = states.net_worth(self.market_price) - states.saved_net_worth(price_before)
+        reputation_rewards = (reputation - states.saved_reputation) * 10.0
+        rewards = dict(zip(self.agents, (economic_rewards + reputation_rewards).tolist()))
+        profiler.lap("rewards")
 
         # ---------- Tally governance ----------
-        outcome = self.governance.tally_votes(self.steps)
-        if outcome:
+        passed = failed = 0
+        for proposal in self.governance.tally_votes(self.steps):
+            outcome = proposal.outcome
+            passed += outcome == 'passed'
+            failed += outcome == 'failed'
             if outcome == 'passed':
-                details = self.governance.proposal_details
-                if details['rule'] == 'tax_rate':
-                    self.tax_rate = details['value']
-                proposer = details['proposer']
-                rewards[proposer] += 50.0
-                self.agent_states[proposer]['reputation'] += 0.25
+                if proposal.rule == 'tax_rate':
+                    self.tax_rate = proposal.value
+                rewards[proposal.proposer] += 50.0
+                reputation[index[proposal.proposer]] += 0.25
             # Reward voters
-            for voter, vote_info in self.governance.votes.items():
+            for voter, vote_info in proposal.votes.items():
                 vote = vote_info['vote']
                 if (outcome == 'passed' and vote) or (outcome == 'failed' and not vote):
                     rewards[voter] += 10.0
-                    self.agent_states[voter]['reputation'] += 0.1
-            self.governance.end_voting_period()
+                    reputation[index[voter]] += 0.1
+        trades = int(traded.sum())
+        counts = self.episode_counts
+        counts["trades"] += trades
+        counts["proposals"] += proposals_started
+        counts["votes"] += votes_yes + votes_no
+        counts["passed"] += passed
+        counts["failed"] += failed
+        profiler.lap("tally")
 
         # ---------- Observations, done flags ----------
         done = self.steps >= self.max_steps
+        obs = self._get_obs()
         for agent in self.agents:
-            obs[agent] = self._get_obs(agent)
             infos[agent] = {}
             terminations[agent] = done
             truncations[agent] = done
-            self.db.log_agent_state(agent, self.agent_states[agent])
+        profiler.lap("observations")
+        if self.db.enabled:
+            self.db.log_agent_state_deltas(self.state_log.encode(states, self.steps), keys=keys)
+        if self.live is not None:
+            self.live.record(
+                self.episode, self.steps, self.market_price, self.tax_rate, done=done,
+                trades=trades, volume=trades * float(result.execution_price[0]), proposals=proposals_started,
+                votes_yes=votes_yes, votes_no=votes_no, passed=passed, failed=failed,
+            )
+        profiler.lap("logging")
+        profiler.end_step()
+        if done and profiler.enabled:
+            infos["__common__"] = self._episode_metrics()
+        if done and self.recorder:
+            self.recorder.save()
 
         terminations["__all__"] = done
         truncations["__all__"] = done
 
         return obs, rewards, terminations, truncations, infos
 
+    # ---------- Snapshots ----------
+    STATE_VERSION = 2
+
+    def get_state(self) -> bytes:
+        """
+        Serialize the simulation state (economy, agents, governance, the env's RNG stream)
+        into a pickle protocol 5 blob. The logging connector and profiler are not part
+        of the state, so a snapshot can be restored into any env with the same agents.
+        """
+        state = (
+            self.STATE_VERSION,
+            (self.steps, float(self.market_price), float(self.tax_rate), float(self.volatility_factor)),
+            self.states.get_state(),
+            self.governance.get_state(),
+            self.rng.bit_generator.state,
+        )
+        return pickle.dumps(state, protocol=5)
+
+    def set_state(self, blob: bytes, restore_rng=True):
+        """
+        Restore a get_state() blob in place. With restore_rng=False the env's RNG keeps
+        its current state, so branches forked from one snapshot can diverge.
+        """
+        version, economy, agents, governance, rng_state = pickle.loads(blob)
+        if version != self.STATE_VERSION:
+            raise ValueError(f"Unsupported env state version {version}, expected {self.STATE_VERSION}")
+        self.steps, self.market_price, self.tax_rate, self.volatility_factor = economy
+        self.states.set_state(agents)
+        self.governance.set_state(governance)
+        self.state_log.force_keyframe()
+        if restore_rng:
+            self.rng.bit_generator.state = rng_state
+
+    # ---------- Helper: Logging ----------
+    def _log_keys(self):
+        """Run/episode/step keys attached to every logged row."""
+        return {"run_id": self.run_id, "env_id": self.env_id, "episode": self.episode, "step": self.steps}
+
+    # ---------- Helper: Profiling ----------
+    def _episode_metrics(self):
+        """Step-phase timings for the finished episode plus the shared connector's write metrics."""
+        metrics = {"step_profile": self.profiler.summary()}
+        if self.db.enabled:
+            metrics["db"] = self.db.write_metrics()
+        return metrics
+
     # ---------- Helper: Observations ----------
-    def _get_obs(self, agent):
-        state = self.agent_states[agent]
-        return np.array([
-            state.get("cash", 0),
-            state.get("assets", 0),
-            state.get("tokens", 0),
-            self.market_price,
-            state.get("reputation", 0),
-            self.tax_rate
-        ], dtype=np.float32)
\ No newline at end of file
+    def _get_obs(self):
+        """Write all observations into one [A, 6 + k] float32 block and return per-agent row views."""
+        buffer = self._obs_buffer if self.reuse_obs_buffer else np.empty_like(self._obs_buffer)
+        states = self.states
+        buffer[:, 0] = states.cash
+        buffer[:, 1] = states.assets
+        buffer[:, 2] = states.tokens
+        buffer[:, 3] = self.market_price
+        buffer[:, 4] = states.reputation
+        buffer[:, 5] = self.tax_rate
+        buffer[:, 6:] = self._id_features
+        return dict(zip(self.agents, buffer))
+
+    # ---------- Helper: Legacy dict view ----------
+    @property
+    def agent_states(self):
+        """Per-agent state dicts built from the array store (read-only snapshot)."""
+        return {agent: self.states.to_dict(agent) for agent in self.agents}
@@ -0,0 +1,106 @@
+# backend/env/market.py
+import numpy as np
+
+BUY_ACTION = 1
+SELL_ACTION = 2
+
+# Fill records are ready for bulk logging (one row per executed order)
+FILL_DTYPE = np.dtype([
+    ("env", np.int32),
+    ("agent", np.int32),
+    ("side", "U4"),
+    ("price", np.float64),
+    ("quantity", np.int32),
+])
+
+
+class ClearingResult:
+    """Outcome of one batch clearing: fill masks, execution price and post-impact price."""
+
+    __slots__ = ("buys", "sells", "execution_price", "new_price")
+
+    def __init__(self, buys, sells, execution_price, new_price):
+        self.buys = buys
+        self.sells = sells
+        self.execution_price = execution_price
+        self.new_price = new_price
+
+    @property
+    def traded(self):
+        return self.buys | self.sells
+
+    def fills(self):
+        """Structured array of executed orders, ordered by (env, agent)."""
+        buys = np.atleast_2d(self.buys)
+        sells = np.atleast_2d(self.sells)
+        price = np.atleast_1d(self.execution_price)
+        env_b, agent_b = np.nonzero(buys)
+        env_s, agent_s = np.nonzero(sells)
+        fills = np.empty(len(env_b) + len(env_s), dtype=FILL_DTYPE)
+        fills["env"] = np.concatenate([env_b, env_s])
+        fills["agent"] = np.concatenate([agent_b, agent_s])
+        fills["side"] = ["buy"] * len(env_b) + ["sell"] * len(env_s)
+        fills["price"] = price[fills["env"]]
+        fills["quantity"] = 1
+        return fills[np.lexsort((fills["agent"], fills["env"]))]
+
+    def transaction_rows(self, agent_ids):
+        """Fills as LocalDBConnector transaction rows (agent_id, action_type, price, quantity)."""
+        fills = self.fills()
+        return [
+            {"agent_id": agent_ids[agent], "action_type": side, "price": price, "quantity": quantity}
+            for agent, side, price, quantity in zip(
+                fills["agent"].tolist(), fills["side"].tolist(), fills["price"].tolist(), fills["quantity"].tolist()
+            )
+        ]
+
+
+class BatchMarket:
+    """
+    Uniform-price batch market.
+    All buy/sell orders of a step are collected and cleared in one vectorized pass:
+    - every fill executes at the step's opening price
+    - a buy fills if the agent's cash covers that price, a sell if it holds an asset
+    - price impact: new_price = price * volatility ** (filled_buys - filled_sells)
+    - optional per-side liquidity cap (max_fills_per_side); when it binds, fills go to
+      the highest-reputation agents, ties broken by lower agent index
+
+    Arrays may carry any number of leading economy dimensions: per-agent inputs are
+    [..., A] and per-economy inputs are [...], so the same code serves the scalar env
+    (shape [A]) and the batched env (shape [E, A]).
+    """
+
+    def __init__(self, max_fills_per_side=None):
+        self.max_fills_per_side = max_fills_per_side
+
+    def clear(self, actions, cash, assets, reputation, price, volatility, tax_rate):
+        """Clear one step's orders and settle cash, assets and price in place where possible."""
+        price = np.asarray(price, dtype=np.float64)
+        p = price[..., None]
+        buys = (actions == BUY_ACTION) & (cash >= p)
+        sells = (actions == SELL_ACTION) & (assets > 0)
+        if self.max_fills_per_side is not None:
+            buys = self._apply_cap(buys, reputation)
+            sells = self._apply_cap(sells, reputation)
+
+        net_flow = buys.sum(axis=-1) - sells.sum(axis=-1)
+        new_price = price * np.power(volatility, net_flow)
+
+        cash -= np.where(buys, p, 0.0)
+        cash += np.where(sells, p * (1 - np.asarray(tax_rate)[..., None]), 0.0)
+        assets += buys.astype(assets.dtype) - sells.astype(assets.dtype)
+        return ClearingResult(buys, sells, price, new_price)
+
+    def _apply_cap(self, mask, reputation):
+        """Keep at most max_fills_per_side orders per economy: reputation desc, agent index asc."""
+        cap = self.max_fills_per_side
+        if not (mask.sum(axis=-1) > cap).any():
+            return mask
+        num_agents = mask.shape[-1]
+        flat_mask = mask.reshape(-1, num_agents)
+        flat_rep = np.broadcast_to(reputation, mask.shape).reshape(-1, num_agents)
+        # Stable sort on -reputation keeps lower agent indices first among equals
+        order = np.argsort(np.where(flat_mask, -flat_rep, np.inf), axis=-1, kind="stable")
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(num_agents)[None, :].repeat(len(order), 0), axis=-1)
+        return (flat_mask & (rank < cap)).reshape(mask.shape)
@@ -0,0 +1,75 @@
+# backend/env/profiling.py
+from time import perf_counter_ns
+
+STEP_PHASES = ("actions", "market", "governance", "rewards", "tally", "observations", "logging")
+
+
+class StepProfiler:
+    """
+    Lap timer for the phases of env.step.
+    One perf_counter_ns() call per phase boundary; totals are accumulated per episode:
+
+        profiler.start()
+        ...               # phase work
+        profiler.lap("market")
+        ...
+        profiler.lap("logging")
+        profiler.end_step()
+
+    Laps with the same phase name add up, so a phase may be split across the step.
+    """
+
+    enabled = True
+
+    def __init__(self, phases=STEP_PHASES):
+        self.phases = phases
+        self.reset()
+
+    def reset(self):
+        self.totals = dict.fromkeys(self.phases, 0)
+        self.steps = 0
+        self._last = 0
+
+    def start(self):
+        self._last = perf_counter_ns()
+
+    def lap(self, phase):
+        now = perf_counter_ns()
+        self.totals[phase] += now - self._last
+        self._last = now
+
+    def end_step(self):
+        self.steps += 1
+
+    def summary(self) -> dict:
+        """Per-episode aggregates: mean microseconds per step for each phase and in total."""
+        steps = max(self.steps, 1)
+        summary = {f"{phase}_us": total / steps / 1e3 for phase, total in self.totals.items()}
+        summary["step_us"] = sum(self.totals.values()) / steps / 1e3
+        summary["steps"] = self.steps
+        return summary
+
+
+class NullProfiler:
+    """Drop-in profiler that records nothing (the default when profiling is off)."""
+
+    enabled = False
+
+    def reset(self):
+        pass
+
+    def start(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+    def end_step(self):
+        pass
+
+    def summary(self) -> dict:
+        return {}
+
+
+def make_profiler(enabled):
+    return StepProfiler() if enabled else NullProfiler()
@@ -0,0 +1,137 @@
+# backend/env/state_store.py
+import numpy as np
+from backend.env.utils import get_initial_agent_state
+
+
+class AgentStateStore:
+    """
+    Array-backed (struct-of-arrays) store for per-agent economic state.
+    Features:
+    - One NumPy column per field, indexed by an integer agent id
+    - Cheap column snapshots for net-worth / reputation deltas
+    - Dict views of a single agent for logging and debugging
+    """
+
+    FLOAT_COLUMNS = ("cash", "reputation", "voting_power")
+    INT_COLUMNS = ("assets", "tokens", "total_trades")
+    COLUMNS = ("cash", "assets", "tokens", "reputation", "voting_power", "total_trades")
+
+    def __init__(self, agent_ids):
+        self.agent_ids = list(agent_ids)
+        self.index = {agent: i for i, agent in enumerate(self.agent_ids)}
+        n = len(self.agent_ids)
+
+        for name in self.FLOAT_COLUMNS:
+            setattr(self, name, np.zeros(n, dtype=np.float64))
+        for name in self.INT_COLUMNS:
+            setattr(self, name, np.zeros(n, dtype=np.int64))
+        self.last_action = np.full(n, -1, dtype=np.int64)  # -1 = no action yet
+
+        # Saved columns used for per-step deltas (see save_columns)
+        self.saved_cash = np.zeros(n, dtype=np.float64)
+        self.saved_assets = np.zeros(n, dtype=np.int64)
+        self.saved_reputation = np.zeros(n, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.agent_ids)
+
+    # ---------- Reset ----------
+    def reset(self, **overrides):
+        """Fill every agent with the starting state from get_initial_agent_state()."""
+        initial = get_initial_agent_state(**overrides)
+        for name in self.COLUMNS:
+            getattr(self, name)[:] = initial[name]
+        self.last_action[:] = -1
+
+    # ---------- Deltas ----------
+    def save_columns(self):
+        """Copy the columns needed for reward deltas into preallocated buffers."""
+        np.copyto(self.saved_cash, self.cash)
+        np.copyto(self.saved_assets, self.assets)
+        np.copyto(self.saved_reputation, self.reputation)
+
+    def net_worth(self, market_price):
+        return self.cash + self.assets * market_price
+
+    def saved_net_worth(self, market_price):
+        return self.saved_cash + self.saved_assets * market_price
+
+    # ---------- Snapshots ----------
+    def get_state(self):
+        """All columns packed into one float64 and one int64 block (last_action is the last int row)."""
+        floats = np.stack([getattr(self, name) for name in self.FLOAT_COLUMNS])
+        ints = np.stack([getattr(self, name) for name in self.INT_COLUMNS] + [self.last_action])
+        return floats, ints
+
+    def set_state(self, state):
+        """Copy a get_state() snapshot into the existing columns (arrays are reused, not replaced)."""
+        floats, ints = state
+        if floats.shape[1] != len(self.agent_ids):
+            raise ValueError(f"Snapshot has {floats.shape[1]} agents, store has {len(self.agent_ids)}")
+        for name, column in zip(self.FLOAT_COLUMNS, floats):
+            np.copyto(getattr(self, name), column)
+        for name, column in zip(self.INT_COLUMNS, ints):
+            np.copyto(getattr(self, name), column)
+        np.copyto(self.last_action, ints[-1])
+
+    # ---------- Dict views ----------
+    def to_dict(self, agent):
+        """Return one agent's state in the legacy dict layout."""
+        i = self.index[agent]
+        state = {name: getattr(self, name)[i].item() for name in self.COLUMNS}
+        last_action = int(self.last_action[i])
+        state["last_action"] = None if last_action < 0 else last_action
+        return state
+
+    def rows(self):
+        """Return every agent's state as a legacy dict, converting each column only once."""
+        keys = self.COLUMNS + ("last_action",)
+        columns = [getattr(self, name).tolist() for name in self.COLUMNS]
+        columns.append([None if a < 0 else a for a in self.last_action.tolist()])
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+class StateDeltaEncoder:
+    """
+    Turns an AgentStateStore into delta-encoded log rows.
+    - Keyframe steps (every `keyframe_every` steps, the first step of an episode and
+      after a forced refresh) log every field of every agent, with keyframe=True
+    - Other steps log one row per agent whose state changed since its last logged row,
+      holding only the changed fields; idle agents produce no row
+    A field's value at any step is its value in the latest row at or before that step
+    (the agent_states_filled view in database/local_db.py forward-fills it).
+    """
+
+    COLUMNS = AgentStateStore.COLUMNS
+
+    def __init__(self, agent_ids, keyframe_every=10):
+        self.agent_ids = list(agent_ids)
+        self.keyframe_every = max(int(keyframe_every), 1)
+        self._logged = {name: None for name in self.COLUMNS}
+        self._stale = True
+
+    def force_keyframe(self):
+        """Make the next encode() a keyframe (after a reset or a restored snapshot)."""
+        self._stale = True
+
+    def encode(self, store, step):
+        columns = [getattr(store, name) for name in self.COLUMNS]
+        if self._stale or step % self.keyframe_every == 0:
+            self._stale = False
+            for name, column in zip(self.COLUMNS, columns):
+                self._logged[name] = column.copy()
+            keys = ("agent_id", "keyframe") + self.COLUMNS
+            values = [self.agent_ids, [True] * len(self.agent_ids)] + [column.tolist() for column in columns]
+            return [dict(zip(keys, row)) for row in zip(*values)]
+
+        changed = [column != self._logged[name] for name, column in zip(self.COLUMNS, columns)]
+        agents = np.flatnonzero(np.logical_or.reduce(changed))
+        if not len(agents):
+            return []
+        rows = [{"agent_id": self.agent_ids[i], "keyframe": False} for i in agents.tolist()]
+        for name, column, mask in zip(self.COLUMNS, columns, changed):
+            positions = np.flatnonzero(mask[agents])
+            for j, value in zip(positions.tolist(), column[agents[positions]].tolist()):
+                rows[j][name] = value
+            self._logged[name][agents] = column[agents]
+        return rows
@@ -0,0 +1,138 @@
+# backend/env/trace.py
+import os
+import re
+import json
+import glob
+import itertools
+import numpy as np
+
+# env_config keys that affect the simulation and are stored with every trace
+TRACE_CONFIG_KEYS = (
+    "num_agents", "max_steps", "price_range", "tax_range", "volatility_range",
+    "max_active_proposals", "max_fills_per_side", "agent_id_obs",
+)
+NO_ACTION = -1  # agent absent from the step's action dict
+_recorder_ids = itertools.count()  # distinguishes recorders of one process (e.g. env threads)
+
+
+class EpisodeRecorder:
+    """
+    Records just enough to re-simulate an episode: the RNG state at reset, the sampled
+    task parameters and the [T, A] action matrix (int8). One compressed .npz per episode:
+
+        {trace_dir}/{run_id}-w{worker}-v{vector}-p{pid}.{recorder}-ep{episode:06d}.npz
+
+    Worker/vector indices alone repeat across runs, processes and envs built from plain
+    dict configs, so the name also holds the run, the process and a per-process recorder
+    number. Files are opened with exclusive create: an existing trace is never overwritten.
+    Steps whose action dict is not in agent order also store that order, because
+    governance actions are processed sequentially.
+    """
+
+    def __init__(self, trace_dir, env_config, num_agents, max_steps, spawn_key, run_id="run"):
+        self.trace_dir = trace_dir
+        self.prefix = (f"{re.sub(r'[^A-Za-z0-9_.-]', '_', run_id)}-w{spawn_key[0]}-v{spawn_key[1]}"
+                       f"-p{os.getpid()}.{next(_recorder_ids)}")
+        self.config = {key: env_config[key] for key in TRACE_CONFIG_KEYS if key in env_config}
+        self.spawn_key = spawn_key
+        self.num_agents = num_agents
+        self.actions = np.full((max_steps, num_agents), NO_ACTION, dtype=np.int8)
+        self.episode = 0
+        self.files_written = []
+        self._active = False
+
+    def start(self, rng_state, task):
+        """Begin an episode (called by reset); an unfinished previous episode is saved first."""
+        if self._active:
+            self.save()
+        self.rng_state = rng_state
+        self.task = task
+        self.steps = 0
+        self.orders = {}
+        self.actions.fill(NO_ACTION)
+        self._active = True
+
+    def record(self, acting, actions):
+        """Store one step: agent indices in action-dict order and their actions."""
+        if self.steps >= len(self.actions):
+            self.actions = np.concatenate([self.actions, np.full_like(self.actions, NO_ACTION)])
+        self.actions[self.steps, acting] = actions
+        if any(a > b for a, b in zip(acting, acting[1:])):
+            self.orders[self.steps] = list(acting)
+        self.steps += 1
+
+    def save(self):
+        if not self._active:
+            return None
+        os.makedirs(self.trace_dir, exist_ok=True)
+        path = os.path.join(self.trace_dir, f"{self.prefix}-ep{self.episode:06d}.npz")
+        with open(path, "xb") as f:
+            np.savez_compressed(
+                f,
+                actions=self.actions[:self.steps],
+                task=np.asarray(self.task, dtype=np.float64),
+                rng_state=np.array(json.dumps(self.rng_state)),
+                config=np.array(json.dumps(self.config)),
+                order_steps=np.array(sorted(self.orders), dtype=np.int64),
+                orders=self._order_matrix(),
+            )
+        self.files_written.append(path)
+        self.episode += 1
+        self._active = False
+        return path
+
+    def _order_matrix(self):
+        """Recorded orders padded with NO_ACTION to [n, A]."""
+        matrix = np.full((len(self.orders), self.num_agents), NO_ACTION, dtype=np.int64)
+        for row, t in enumerate(sorted(self.orders)):
+            matrix[row, :len(self.orders[t])] = self.orders[t]
+        return matrix
+
+
+# ---------- Loading & replay ----------
+def list_traces(trace_dir):
+    return sorted(glob.glob(os.path.join(trace_dir, "*.npz")))
+
+
+def load_trace(path):
+    """Trace file as a dict: actions [T, A], task, rng_state, config, orders {step: agent order}."""
+    with np.load(path) as data:
+        return {
+            "actions": data["actions"],
+            "task": data["task"],
+            "rng_state": json.loads(str(data["rng_state"])),
+            "config": json.loads(str(data["config"])),
+            "orders": {int(t): order[order != NO_ACTION].tolist() for t, order in zip(data["order_steps"], data["orders"])},
+        }
+
+
+def iter_replay(path_or_trace, **env_overrides):
+    """
+    Re-simulate a recorded episode deterministically. Yields
+    (env, step, obs, rewards, terminations) after every step; the env is created with
+    db_sink="null" unless overridden, so replays only cost env compute.
+    """
+    from backend.env.environment import DecentralizedEconomyEnv
+
+    trace = load_trace(path_or_trace) if isinstance(path_or_trace, str) else path_or_trace
+    env = DecentralizedEconomyEnv({**trace["config"], "db_sink": "null", **env_overrides})
+    env.rng.bit_generator.state = trace["rng_state"]
+    env.reset()
+    task = (env.market_price, env.tax_rate, env.volatility_factor)
+    if not np.array_equal(task, trace["task"]):
+        raise ValueError(f"Replay diverged at reset: task {task} != recorded {tuple(trace['task'])}")
+
+    agents = env.agents
+    for t, row in enumerate(trace["actions"].tolist()):
+        order = trace["orders"].get(t, range(len(agents)))
+        action_dict = {agents[i]: row[i] for i in order if row[i] != NO_ACTION}
+        obs, rewards, terminations, _, _ = env.step(action_dict)
+        yield env, t, obs, rewards, terminations
+
+
+def replay_episode(path_or_trace, **env_overrides):
+    """Replay a whole episode; returns the env in its final state and the per-step rewards [T, A]."""
+    env, rewards_per_step = None, []
+    for env, _, _, rewards, _ in iter_replay(path_or_trace, **env_overrides):
+        rewards_per_step.append(list(rewards.values()))
+    return env, np.array(rewards_per_step)
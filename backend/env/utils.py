@@ -32,9 +32,48 @@ def get_action_space():
     return spaces.Discrete(6)
 
 # ---------- Observation Space ----------
-def get_observation_space():
+def get_observation_space(num_id_features=0):
     """
     Returns a Box observation space with:
     [cash, assets, tokens, market_price, reputation, tax_rate]
+    followed by `num_id_features` agent identity features (see agent_id_features).
     """
-    return spaces.Box(low=0, high=1e6, shape=(6,), dtype=np.float32)
+    return spaces.Box(low=0, high=1e6, shape=(6 + num_id_features,), dtype=np.float32)
+
+# ---------- Agent Identity Features ----------
+AGENT_ID_ENCODINGS = (None, "onehot", "binary")
+
+def agent_id_features(num_agents, encoding=None):
+    """
+    Returns a [num_agents, k] float32 matrix identifying each agent, appended to its
+    observation so a shared policy can tell agents apart:
+    - None:     k = 0 (no identity features)
+    - "onehot": k = num_agents
+    - "binary": k = bits needed for num_agents - 1 (compact for large populations)
+    """
+    if encoding not in AGENT_ID_ENCODINGS:
+        raise ValueError(f"Unknown agent id encoding '{encoding}', expected one of {AGENT_ID_ENCODINGS}")
+    if encoding is None:
+        return np.zeros((num_agents, 0), dtype=np.float32)
+    if encoding == "onehot":
+        return np.eye(num_agents, dtype=np.float32)
+    bits = max(1, int(num_agents - 1).bit_length())
+    return ((np.arange(num_agents)[:, None] >> np.arange(bits)) & 1).astype(np.float32)
+
+# ---------- Random Number Streams ----------
+def env_spawn_key(env_config, vector_index=None):
+    """
+    Spawn key that gives every env its own RNG stream: (worker_index, vector_index).
+    RLlib passes both on its EnvContext; plain dict configs count as worker 0, env 0.
+    """
+    worker_index = getattr(env_config, "worker_index", 0)
+    if vector_index is None:
+        vector_index = getattr(env_config, "vector_index", 0)
+    return (int(worker_index), int(vector_index))
+
+def make_rng(seed=None, spawn_key=()):
+    """
+    numpy Generator for one env, spawned from the root SeedSequence(seed).
+    Same (seed, spawn_key) -> same stream; seed=None draws fresh OS entropy.
+    """
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=spawn_key)))
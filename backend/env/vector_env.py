@@ -0,0 +1,240 @@
+# backend/env/vector_env.py
+import numpy as np
+from backend.env.utils import (
+    get_initial_agent_state, get_observation_space, get_action_space, agent_id_features, env_spawn_key, make_rng,
+)
+from backend.env.market import BatchMarket
+
+HOLD, BUY, SELL, PROPOSE, VOTE_YES, VOTE_NO = range(6)
+
+
+class VectorizedEconomyEnv:
+    """
+    Batched version of DecentralizedEconomyEnv.
+    Keeps E economies x A agents in NumPy arrays and steps them all at once.
+    Features:
+    - [E, A] integer action array in, [E, A, 6 + k] observations out
+      (k agent identity features, env_config["agent_id_obs"] as in the scalar env)
+    - Same Buy/Sell/Propose/Vote, reward and governance rules as the scalar env
+    - Market orders of all economies cleared in one BatchMarket pass (fills in self.last_clearing)
+    - Per-economy auto-reset when an economy reaches max_steps
+    - One RNG stream per economy: economy e uses spawn key (worker_index, e), so it draws
+      exactly what a scalar env with vector_index=e and the same seed would
+    - No database logging (use the scalar env when per-row logs are needed)
+    """
+
+    def __init__(self, env_config=None):
+        env_config = env_config or {}
+        self.num_envs = env_config.get("num_envs", 16)
+        self._num_agents = env_config.get("num_agents", 4)
+        self.max_steps = env_config.get("max_steps", 100)
+        self.vote_duration = env_config.get("vote_duration_steps", 10)
+        if env_config.get("max_active_proposals", 1) != 1:
+            raise ValueError("VectorizedEconomyEnv supports a single active proposal per economy")
+        self.agents = [f"agent_{i}" for i in range(self._num_agents)]
+
+        self.market = BatchMarket(max_fills_per_side=env_config.get("max_fills_per_side"))
+
+        self.single_action_space = get_action_space()
+        id_features = agent_id_features(self._num_agents, env_config.get("agent_id_obs"))
+        self.single_observation_space = get_observation_space(id_features.shape[1])
+
+        self.price_range = env_config.get("price_range", (75.0, 125.0))
+        self.tax_range = env_config.get("tax_range", (0.02, 0.15))
+        self.volatility_range = env_config.get("volatility_range", (1.005, 1.025))
+
+        self._env_config = env_config
+        self._seed_rngs(env_config.get("seed"))
+
+        E, A = self.num_envs, self._num_agents
+        init = get_initial_agent_state()
+        self._initial = init
+
+        # ---------- Economy state [E] ----------
+        self.market_price = np.full(E, 100.0)
+        self.tax_rate = np.full(E, 0.05)
+        self.volatility_factor = np.full(E, 1.01)
+        self.steps = np.zeros(E, dtype=np.int64)
+
+        # ---------- Agent state [E, A] ----------
+        self.cash = np.full((E, A), float(init["cash"]))
+        self.assets = np.zeros((E, A), dtype=np.int64)
+        self.tokens = np.zeros((E, A), dtype=np.int64)
+        self.reputation = np.zeros((E, A))
+        self.voting_power = np.zeros((E, A))
+        self.total_trades = np.zeros((E, A), dtype=np.int64)
+        self.last_action = np.full((E, A), -1, dtype=np.int64)
+
+        # ---------- Governance state (one active proposal per economy) ----------
+        self.vote_active = np.zeros(E, dtype=bool)
+        self.proposer = np.full(E, -1, dtype=np.int64)
+        self.proposal_value = np.zeros(E)
+        self.vote_start_step = np.full(E, -1, dtype=np.int64)
+        self.voted = np.zeros((E, A), dtype=bool)
+        self.vote_yes = np.zeros((E, A), dtype=bool)
+        self.yes_weight = np.zeros(E)
+        self.no_weight = np.zeros(E)
+
+        self._obs = np.zeros((E, A) + self.single_observation_space.shape, dtype=np.float32)
+        self._obs[..., 6:] = id_features  # constant, written once
+        self._tally_buf = np.zeros((E, 2, A + 1))
+
+    # ---------- Reset ----------
+    def _seed_rngs(self, seed):
+        self.rngs = [make_rng(seed, env_spawn_key(self._env_config, e)) for e in range(self.num_envs)]
+
+    def reset(self, *, seed=None, options=None):
+        if seed is not None:
+            self._seed_rngs(seed)
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._get_obs().copy(), {}
+
+    def _reset_envs(self, mask):
+        """Reset the economies selected by a boolean [E] mask."""
+        n = int(mask.sum())
+        if n == 0:
+            return
+        init = self._initial
+
+        # Same draws as the scalar env: price, tax, volatility from each economy's own stream
+        lows = [self.price_range[0], self.tax_range[0], self.volatility_range[0]]
+        highs = [self.price_range[1], self.tax_range[1], self.volatility_range[1]]
+        task = np.array([self.rngs[e].uniform(lows, highs) for e in np.flatnonzero(mask)])
+        self.market_price[mask] = task[:, 0]
+        self.tax_rate[mask] = task[:, 1]
+        self.volatility_factor[mask] = task[:, 2]
+        self.steps[mask] = 0
+
+        self.cash[mask] = init["cash"]
+        self.assets[mask] = init["assets"]
+        self.tokens[mask] = init["tokens"]
+        self.reputation[mask] = init["reputation"]
+        self.voting_power[mask] = init["voting_power"]
+        self.total_trades[mask] = init["total_trades"]
+        self.last_action[mask] = -1
+
+        self._end_voting_period(mask)
+
+    def _end_voting_period(self, mask):
+        self.vote_active[mask] = False
+        self.proposer[mask] = -1
+        self.vote_start_step[mask] = -1
+        self.voted[mask] = False
+        self.vote_yes[mask] = False
+        self.yes_weight[mask] = 0.0
+        self.no_weight[mask] = 0.0
+
+    # ---------- Step ----------
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        E, A = self.num_envs, self._num_agents
+        if actions.shape != (E, A):
+            raise ValueError(f"Expected actions of shape {(E, A)}, got {actions.shape}")
+
+        self.steps += 1
+        self.last_action[:] = actions
+        rows = np.arange(E)
+
+        net_worths_before = self.cash + self.assets * self.market_price[:, None]
+        reputation_before = self.reputation.copy()
+
+        # Proposal values: one batched draw per economy, one value per Propose action
+        proposing = actions == PROPOSE
+        proposed_tax = np.zeros((E, A))
+        counts = proposing.sum(axis=1)
+        for e in np.flatnonzero(counts):
+            proposed_tax[e, proposing[e]] = np.round(self.rngs[e].uniform(0.01, 0.2, size=counts[e]), 2)
+
+        # ---------- Clear market orders ----------
+        result = self.market.clear(
+            actions, self.cash, self.assets, self.reputation,
+            self.market_price, self.volatility_factor, self.tax_rate,
+        )
+        self.market_price = result.new_price
+        traded = result.traded
+        self.total_trades += traded
+        self.last_clearing = result
+
+        # ---------- Governance actions ----------
+        # A proposal can only start in economies with no active vote, and only the first
+        # proposer (lowest agent index) wins. Votes are accepted from agents that act after
+        # the proposal became active and have not voted on it yet.
+        was_active = self.vote_active.copy()
+        new_proposal = ~was_active & proposing.any(axis=1)
+        first = np.argmax(proposing, axis=1)
+        if new_proposal.any():
+            self.vote_active[new_proposal] = True
+            self.proposer[new_proposal] = first[new_proposal]
+            self.proposal_value[new_proposal] = proposed_tax[rows[new_proposal], first[new_proposal]]
+            self.vote_start_step[new_proposal] = self.steps[new_proposal]
+            self.voted[new_proposal] = False
+            self.vote_yes[new_proposal] = False
+            self.yes_weight[new_proposal] = 0.0
+            self.no_weight[new_proposal] = 0.0
+        proposed = np.zeros((E, A), dtype=bool)
+        proposed[rows[new_proposal], first[new_proposal]] = True
+
+        can_vote = (was_active[:, None] | (new_proposal[:, None] & (np.arange(A) > first[:, None])))
+        votes = ((actions == VOTE_YES) | (actions == VOTE_NO)) & can_vote & ~self.voted
+        if votes.any():
+            yes = votes & (actions == VOTE_YES)
+            no = votes & (actions == VOTE_NO)
+            # Left-to-right running sums keep the scalar env's accumulation order
+            tally = self._tally_buf
+            tally[:, 0, 0] = self.yes_weight
+            tally[:, 1, 0] = self.no_weight
+            np.multiply(yes, self.reputation, out=tally[:, 0, 1:])
+            np.multiply(no, self.reputation, out=tally[:, 1, 1:])
+            totals = np.cumsum(tally, axis=2)[:, :, -1]
+            self.yes_weight = totals[:, 0].copy()
+            self.no_weight = totals[:, 1].copy()
+            self.voted |= votes
+            self.vote_yes |= yes
+
+        reputation_gain = np.where(traded, 0.01, 0.0)
+        reputation_gain[proposed] = 0.05
+        reputation_gain[votes] = 0.02
+        self.reputation += reputation_gain
+
+        # ---------- Rewards ----------
+        net_worths_after = self.cash + self.assets * self.market_price[:, None]
+        rewards = (net_worths_after - net_worths_before) + (self.reputation - reputation_before) * 10.0
+
+        # ---------- Tally governance ----------
+        due = self.vote_active & (self.steps >= self.vote_start_step + self.vote_duration)
+        if due.any():
+            passed = due & (self.yes_weight > self.no_weight)
+            failed = due & ~passed
+            self.tax_rate[passed] = self.proposal_value[passed]
+            proposer = self.proposer[passed]
+            rewards[rows[passed], proposer] += 50.0
+            self.reputation[rows[passed], proposer] += 0.25
+
+            winners = self.voted & (
+                (passed[:, None] & self.vote_yes) | (failed[:, None] & ~self.vote_yes)
+            )
+            rewards[winners] += 10.0
+            self.reputation[winners] += 0.1
+            self._end_voting_period(due)
+
+        # ---------- Observations, done flags, auto-reset ----------
+        done = self.steps >= self.max_steps
+        infos = {}
+        if done.any():
+            infos["final_obs"] = self._get_obs().copy()
+            infos["done_mask"] = done.copy()
+            self._reset_envs(done)
+
+        obs = self._get_obs().copy()
+        return obs, rewards, done.copy(), done.copy(), infos
+
+    # ---------- Helper: Observations ----------
+    def _get_obs(self):
+        obs = self._obs
+        obs[..., 0] = self.cash
+        obs[..., 1] = self.assets
+        obs[..., 2] = self.tokens
+        obs[..., 3] = self.market_price[:, None]
+        obs[..., 4] = self.reputation
+        obs[..., 5] = self.tax_rate[:, None]
+        return obs
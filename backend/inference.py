@@ -0,0 +1,208 @@
+# backend/inference.py
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+from backend.training_config import SHARED_POLICY_ID, role_policy_id
+
+
+# ---------- Policy mapping ----------
+def infer_policy_mapping(policy_ids):
+    """
+    (policy_mode, policy_mapping_fn) for the policy ids of a checkpoint, following the
+    naming of build_multiagent_config: shared_policy, role_0..role_N-1 or one per agent.
+    """
+    policy_ids = set(policy_ids)
+    if policy_ids == {SHARED_POLICY_ID}:
+        return "shared", lambda agent_id: SHARED_POLICY_ID
+    if policy_ids and all(pid.startswith("role_") for pid in policy_ids):
+        num_roles = len(policy_ids)
+        return "roles", lambda agent_id: role_policy_id(agent_id, num_roles)
+    return "per_agent", lambda agent_id: agent_id
+
+
+class _Request:
+    __slots__ = ("episode_id", "agent_id", "policy_id", "obs", "prev_action", "prev_reward", "arrival", "future")
+
+    def __init__(self, episode_id, agent_id, policy_id, obs, prev_action, prev_reward):
+        self.episode_id = episode_id
+        self.agent_id = agent_id
+        self.policy_id = policy_id
+        self.obs = obs
+        self.prev_action = prev_action
+        self.prev_reward = prev_reward
+        self.arrival = time.monotonic()
+        self.future = Future()
+
+
+# ---------- Server ----------
+class PolicyServer:
+    """
+    Batched CPU inference for trained policies, shared by many concurrent envs
+    (threads, an evaluation loop or a demo API).
+
+    Features:
+    - Dynamic batching: requests wait until `max_batch_size` are queued or the oldest
+      has waited `max_latency_ms`, then run as one compute_actions call per policy
+    - Recurrent (LSTM) state is kept per (episode_id, agent_id) on the server and
+      dropped with end_episode(); one agent's requests are never in the same batch,
+      so its state advances strictly in order
+    - compute_action() blocks for a single agent, compute_actions() for all agents of a
+      step, submit() returns a Future
+    """
+
+    def __init__(self, policies, policy_mapping_fn, max_batch_size=256, max_latency_ms=5.0, explore=False):
+        self.policies = policies
+        self.policy_mapping_fn = policy_mapping_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.explore = explore
+        self._queue = deque()
+        self._states = {}  # episode_id -> {agent_id: [state arrays]}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self.requests = 0
+        self.served = 0
+        self.batches = 0
+        self.forward_passes = 0
+        self.max_batch_seen = 0
+        self.thread = threading.Thread(target=self._run, name="PolicyServer", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint, policy_ids=None, num_threads=None, **options):
+        """
+        Server for the latest checkpoint under `checkpoint`. Policies are rebuilt on CPU
+        (num_gpus=0); `num_threads` caps torch's intra-op threads for this process.
+        """
+        from backend.checkpoints import latest_checkpoint, load_policies
+        path = latest_checkpoint(checkpoint)
+        if path is None:
+            raise FileNotFoundError(f"No RLlib checkpoint found under {checkpoint}")
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        policies = load_policies(path, policy_ids)
+        policy_mode, mapping_fn = infer_policy_mapping(policies)
+        server = cls(policies, mapping_fn, **options)
+        server.checkpoint = path
+        server.policy_mode = policy_mode
+        return server
+
+    # ---------- Requests ----------
+    def submit(self, episode_id, agent_id, obs, prev_action=None, prev_reward=None) -> Future:
+        request = _Request(episode_id, agent_id, self.policy_mapping_fn(agent_id), obs, prev_action, prev_reward)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("PolicyServer is shut down")
+            self._queue.append(request)
+            self.requests += 1
+            self._cond.notify()
+        return request.future
+
+    def compute_action(self, episode_id, agent_id, obs, prev_action=None, prev_reward=None, timeout=None):
+        return self.submit(episode_id, agent_id, obs, prev_action, prev_reward).result(timeout)
+
+    def compute_actions(self, episode_id, observations, prev_actions=None, prev_rewards=None, timeout=None):
+        """{agent_id: action} for one env step ({agent_id: obs})."""
+        prev_actions, prev_rewards = prev_actions or {}, prev_rewards or {}
+        futures = {
+            agent_id: self.submit(episode_id, agent_id, obs, prev_actions.get(agent_id), prev_rewards.get(agent_id))
+            for agent_id, obs in observations.items()
+        }
+        return {agent_id: future.result(timeout) for agent_id, future in futures.items()}
+
+    def end_episode(self, episode_id):
+        """Forget the recurrent state of an episode."""
+        with self._cond:
+            self._states.pop(episode_id, None)
+
+    # ---------- Batching ----------
+    def _next_batch(self):
+        """Wait for a full batch or the latency deadline of the oldest request."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or self._stopping)
+            if not self._queue:
+                return None
+            deadline = self._queue[0].arrival + self.max_latency
+            self._cond.wait_for(lambda: len(self._queue) >= self.max_batch_size or self._stopping,
+                                timeout=max(0.0, deadline - time.monotonic()))
+            batch, deferred, keys = [], deque(), set()
+            while self._queue and len(batch) < self.max_batch_size:
+                request = self._queue.popleft()
+                key = (request.episode_id, request.agent_id)
+                if key in keys:
+                    deferred.append(request)  # needs the state produced by this batch
+                else:
+                    keys.add(key)
+                    batch.append(request)
+            deferred.extend(self._queue)
+            self._queue = deferred
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self.batches += 1
+            self.served += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.policy_id, []).append(request)
+            for policy_id, requests in groups.items():
+                self._forward(policy_id, requests)
+
+    def _forward(self, policy_id, requests):
+        try:
+            policy = self.policies[policy_id]
+            with self._cond:
+                states = [self._states.get(r.episode_id, {}).get(r.agent_id) for r in requests]
+            initial = None
+            for i, state in enumerate(states):
+                if state is None:
+                    initial = policy.get_initial_state() if initial is None else initial
+                    states[i] = initial
+            state_batches = [np.stack(column) for column in zip(*states)] or None
+            kwargs = {}
+            if any(r.prev_action is not None for r in requests):
+                kwargs["prev_action_batch"] = np.array([r.prev_action if r.prev_action is not None else 0
+                                                        for r in requests])
+            if any(r.prev_reward is not None for r in requests):
+                kwargs["prev_reward_batch"] = np.array([r.prev_reward or 0.0 for r in requests], dtype=np.float32)
+            actions, state_out, _ = policy.compute_actions(
+                np.stack([r.obs for r in requests]), state_batches, explore=self.explore, **kwargs,
+            )
+            self.forward_passes += 1
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        with self._cond:
+            for i, request in enumerate(requests):
+                if state_out:
+                    self._states.setdefault(request.episode_id, {})[request.agent_id] = [s[i] for s in state_out]
+        for i, request in enumerate(requests):
+            request.future.set_result(actions[i])
+
+    # ---------- Lifecycle ----------
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "forward_passes": self.forward_passes,
+            "mean_batch_size": self.served / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "open_episodes": len(self._states),
+        }
+
+    def shutdown(self, timeout=5):
+        """Serve the requests already queued, then stop the batching thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self.thread.join(timeout)
+        return self.stats()
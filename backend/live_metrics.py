@@ -0,0 +1,173 @@
+# backend/live_metrics.py
+import json
+import time
+import atexit
+import threading
+
+DEFAULT_CHANNEL = "economy_metrics"
+# Payload fields summed since the stream's previous payload (see LiveMetricsWindow)
+COUNTERS = ("trades", "volume", "proposals", "votes_yes", "votes_no", "passed", "failed")
+
+
+# ---------- Channels ----------
+class PostgresChannel:
+    """Publishes with pg_notify; the dashboard API LISTENs and streams to browsers (SSE)."""
+
+    def __init__(self, name=DEFAULT_CHANNEL):
+        self.name = name
+        self._db = None
+
+    def send(self, payloads):
+        if self._db is None:
+            from database.local_db import LocalDatabase
+            self._db = LocalDatabase(pool_size=1)
+        # One statement per batch; each payload is one notification (NOTIFY limit: 8000 bytes)
+        self._db.execute_query(
+            "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+            [self.name, [json.dumps(p, default=float) for p in payloads]], fetch=False,
+        )
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+
+
+class MemoryChannel:
+    """Keeps every published payload. Useful for tests."""
+
+    def __init__(self, name=DEFAULT_CHANNEL):
+        self.name = name
+        self.messages = []
+
+    def send(self, payloads):
+        self.messages.extend(payloads)
+
+    def close(self):
+        pass
+
+
+CHANNELS = {
+    "postgres": PostgresChannel,
+    "memory": MemoryChannel,
+}
+
+
+# ---------- Publisher ----------
+class LiveMetricsPublisher:
+    """
+    Sends live metric payloads from a background thread, so env.step never waits on
+    the channel. Only the newest payload per stream (run_id, env_id) is kept: if the
+    channel is slower than the publish rate, a pending payload is merged into the next
+    one (its counters and steps are added), so nothing counted is lost.
+    """
+
+    def __init__(self, channel="postgres", name=DEFAULT_CHANNEL):
+        self.channel = CHANNELS[channel](name) if isinstance(channel, str) else channel
+        self._latest = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self.sent = 0
+        self.failed = 0
+        self.thread = None
+
+    def publish(self, stream, payload):
+        with self._cond:
+            if self.thread is None:
+                atexit.register(self.shutdown)
+                self.thread = threading.Thread(target=self._run, name="LiveMetricsPublisher", daemon=True)
+                self.thread.start()
+            pending = self._latest.get(stream)
+            if pending is not None:
+                payload = {**payload, **{name: payload.get(name, 0) + pending.get(name, 0)
+                                         for name in COUNTERS + ("steps",) if name in pending}}
+            self._latest[stream] = payload
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._latest or self._stopping)
+                if not self._latest and self._stopping:
+                    return
+                payloads, self._latest = list(self._latest.values()), {}
+            try:
+                self.channel.send(payloads)
+                self.sent += len(payloads)
+            except Exception:
+                self.failed += len(payloads)  # live views tolerate gaps; never retry
+
+    def shutdown(self):
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        self.channel.close()
+
+
+_publishers = {}
+_publishers_lock = threading.Lock()
+
+
+def get_live_publisher(channel="postgres", name=DEFAULT_CHANNEL):
+    """Process-wide publisher per (channel, name), shared by every env in the process."""
+    key = (channel, name)
+    with _publishers_lock:
+        publisher = _publishers.get(key)
+        if publisher is None or publisher._stopping:
+            publisher = _publishers[key] = LiveMetricsPublisher(channel, name)
+        return publisher
+
+
+# ---------- Per-env window ----------
+class LiveMetricsWindow:
+    """
+    Accumulates one env's per-step aggregates and publishes them at most `rate_hz`
+    times per second. A payload covers every step since the previous one:
+    counts (trades, volume, proposals, votes, outcomes) are summed, market price and
+    tax rate are the latest values. The last step of an episode (done=True) is always
+    published, so no counts are left behind at episode end.
+    """
+
+    COUNTERS = COUNTERS
+
+    def __init__(self, publisher, run_id, env_id, rate_hz=2.0):
+        self.publisher = publisher
+        self.stream = (run_id, env_id)
+        self.base = {"run_id": run_id, "env_id": env_id}
+        self.interval = 1.0 / rate_hz if rate_hz else 0.0
+        self._last_sent = float("-inf")
+        self._reset()
+
+    def _reset(self):
+        self.steps = 0
+        self.totals = dict.fromkeys(self.COUNTERS, 0)
+
+    def record(self, episode, step, market_price, tax_rate, done=False, **counts):
+        self.steps += 1
+        totals = self.totals
+        for name, value in counts.items():
+            totals[name] += value
+        now = time.monotonic()
+        if now - self._last_sent < self.interval and not done:
+            return
+        self._last_sent = now
+        self.publisher.publish(self.stream, {
+            **self.base, "episode": episode, "step": step, "time": time.time(),
+            "market_price": market_price, "tax_rate": tax_rate, "steps": self.steps, **totals,
+        })
+        self._reset()
+
+
+def make_live_window(options, run_id, env_id):
+    """
+    LiveMetricsWindow from env_config["live_metrics"]: None/False (off), True (defaults)
+    or {"channel": "postgres" | "memory", "name": DEFAULT_CHANNEL, "rate_hz": 2.0}.
+    """
+    if not options:
+        return None
+    options = {} if options is True else dict(options)
+    publisher = get_live_publisher(options.get("channel", "postgres"), options.get("name", DEFAULT_CHANNEL))
+    return LiveMetricsWindow(publisher, run_id, env_id, options.get("rate_hz", 2.0))
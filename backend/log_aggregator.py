@@ -0,0 +1,171 @@
+# backend/log_aggregator.py
+import time
+from backend.db_connector import LocalDBConnector
+
+AGGREGATOR_NAME = "economy_log_aggregator"
+SCOPES = ("cluster", "node")
+
+
+# ---------- Record batches ----------
+def pack_rows(rows):
+    """Rows as (keys, columns): one list per key, None where a row lacks the key."""
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    return keys, [[row.get(key) for row in rows] for key in keys]
+
+
+def unpack_rows(packed):
+    keys, columns = packed
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+
+# ---------- Aggregator ----------
+class LogAggregator:
+    """
+    One log writer for a whole training job, run as a named Ray actor.
+    Env runners log through LocalDBConnector(sink="ray_actor"), which sends each batch
+    here as a compact columnar record batch; the aggregator feeds them into its own
+    LocalDBConnector (the real sink, large batches), so the database sees a few big
+    bulk writes instead of many small ones from every worker process.
+
+    Job-wide limits:
+    - rows_per_second: token bucket over all incoming rows. With backpressure "block"
+      writes wait for budget (slowing the senders), otherwise excess rows are dropped
+    - the connector's max_queue_size/backpressure policy bound the buffered rows
+    """
+
+    def __init__(self, sink="postgres", sink_options=None, rows_per_second=None, **connector_options):
+        connector_options.setdefault("batch_size", 5000)
+        self.connector = LocalDBConnector(sink=sink, sink_options=sink_options, **connector_options)
+        self.rows_per_second = rows_per_second
+        self._allowance = float(rows_per_second or 0)
+        self._checked_at = time.monotonic()
+        self.batches_received = 0
+        self.rate_limited = 0
+
+    def write(self, table_name, packed):
+        rows = self._rate_limit(unpack_rows(packed))
+        self.batches_received += 1
+        self.connector.log_rows(table_name, rows)
+        return len(rows)
+
+    def _rate_limit(self, rows):
+        if not self.rows_per_second:
+            return rows
+        now = time.monotonic()
+        self._allowance = min(self.rows_per_second,
+                              self._allowance + (now - self._checked_at) * self.rows_per_second)
+        self._checked_at = now
+        if self.connector.backpressure == "block":
+            if len(rows) > self._allowance:
+                time.sleep((len(rows) - self._allowance) / self.rows_per_second)
+                self._allowance, self._checked_at = 0.0, time.monotonic()
+            else:
+                self._allowance -= len(rows)
+            return rows
+        admitted = int(min(len(rows), self._allowance))
+        self._allowance -= admitted
+        self.rate_limited += len(rows) - admitted
+        return rows[:admitted]
+
+    def flush(self, timeout=None):
+        return self.connector.flush(timeout)
+
+    def stats(self) -> dict:
+        return {
+            **self.connector.stats(),
+            **self.connector.write_metrics(),
+            "batches_received": self.batches_received,
+            "rate_limited": self.rate_limited,
+        }
+
+    def shutdown(self):
+        self.connector.shutdown()
+        return self.stats()
+
+
+# ---------- Actor handles ----------
+def get_log_aggregator(name=AGGREGATOR_NAME, scope="cluster", node_id=None, **aggregator_options):
+    """
+    Handle to the named aggregator actor, created with `aggregator_options` if it does not
+    exist yet. scope="node" gives one actor per node (pinned to it, named after the node),
+    so env runners only send batches to their local node.
+    """
+    import ray
+    from ray.util.scheduling_strategies import NodeAffinitySchedulingStrategy
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown aggregator scope '{scope}', expected one of {SCOPES}")
+    options = {"name": name, "get_if_exists": True}
+    if scope == "node":
+        node_id = node_id or ray.get_runtime_context().get_node_id()
+        options["name"] = f"{name}-{node_id[:12]}"
+        options["scheduling_strategy"] = NodeAffinitySchedulingStrategy(node_id, soft=False)
+    # num_cpus=0: the actor mostly waits on the database and must not take a rollout slot
+    actor_cls = ray.remote(num_cpus=0)(LogAggregator)
+    return actor_cls.options(**options).remote(**aggregator_options)
+
+
+def start_log_aggregators(env_config):
+    """
+    Create the aggregator actor(s) from the driver when env_config["db_sink"] is
+    "ray_actor", so they live as long as the job (actors die with the process that
+    created them). Returns the handles for stop_log_aggregators().
+    """
+    if env_config.get("db_sink") != "ray_actor":
+        return []
+    import ray
+    sink_options = env_config.get("db_options", {}).get("sink_options", {})
+    name = sink_options.get("name", AGGREGATOR_NAME)
+    scope = sink_options.get("scope", "cluster")
+    options = sink_options.get("aggregator_options", {})
+    if scope == "node":
+        node_ids = [node["NodeID"] for node in ray.nodes() if node["Alive"]]
+        return [get_log_aggregator(name, scope, node_id, **options) for node_id in node_ids]
+    return [get_log_aggregator(name, scope, **options)]
+
+
+def stop_log_aggregators(handles, timeout=60):
+    """Flush and stop the aggregators; prints their final stats."""
+    import ray
+    for handle in handles:
+        try:
+            print(f"[DB] Log aggregator stopped. {ray.get(handle.shutdown.remote(), timeout=timeout)}")
+        except Exception as e:
+            print(f"[DB] Log aggregator did not shut down cleanly: {e!r}")
+        ray.kill(handle)
+
+
+# ---------- Sink ----------
+class RayActorSink:
+    """
+    Sink that forwards each batch to the log aggregator actor as a packed record batch.
+    At most `max_in_flight` batches are unacknowledged; beyond that write() waits, so a
+    slow aggregator backs up into the local connector queue and its backpressure policy.
+    """
+
+    def __init__(self, name=AGGREGATOR_NAME, scope="cluster", max_in_flight=4, aggregator_options=None):
+        self.name = name
+        self.scope = scope
+        self.max_in_flight = max_in_flight
+        self.aggregator_options = aggregator_options or {}
+        self._actor = None
+        self._pending = []
+
+    @property
+    def actor(self):
+        if self._actor is None:
+            self._actor = get_log_aggregator(self.name, self.scope, **self.aggregator_options)
+        return self._actor
+
+    def write(self, table_name, rows):
+        import ray
+        self._pending.append(self.actor.write.remote(table_name, pack_rows(rows)))
+        if len(self._pending) > self.max_in_flight:
+            ready, self._pending = ray.wait(self._pending, num_returns=len(self._pending) - self.max_in_flight)
+            ray.get(ready)
+
+    def close(self):
+        """Wait until the aggregator has accepted every batch sent from this process."""
+        import ray
+        if self._pending:
+            pending, self._pending = self._pending, []
+            ray.get(pending)
@@ -0,0 +1,177 @@
+# backend/parquet_log.py
+import os
+import json
+import glob
+import socket
+import time
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
+from backend.db_connector import default_run_id
+
+# ---------- Schemas ----------
+KEY_FIELDS = [
+    ('run_id', pa.string()),
+    ('env_id', pa.string()),
+    ('episode', pa.int64()),
+    ('step', pa.int64()),
+]
+
+SCHEMAS = {
+    'agent_states': pa.schema(KEY_FIELDS + [
+        ('agent_id', pa.string()),
+        ('cash', pa.float64()),
+        ('assets', pa.float64()),
+        ('reputation', pa.float64()),
+        ('tokens', pa.float64()),
+        ('voting_power', pa.float64()),
+        ('total_trades', pa.int64()),
+        ('keyframe', pa.bool_()),  # delta rows: null = unchanged since the agent's previous row
+        ('logged_at', pa.float64()),
+    ]),
+    'transactions': pa.schema(KEY_FIELDS + [
+        ('agent_id', pa.string()),
+        ('action_type', pa.string()),
+        ('price', pa.float64()),
+        ('quantity', pa.int64()),
+        ('logged_at', pa.float64()),
+    ]),
+    'governance_log': pa.schema(KEY_FIELDS + [
+        ('event_type', pa.string()),
+        ('agent_id', pa.string()),
+        ('details', pa.string()),  # JSON text
+        ('logged_at', pa.float64()),
+    ]),
+    'simulation_runs': pa.schema([
+        ('run_id', pa.string()),
+        ('agent_count', pa.int64()),
+        ('details', pa.string()),  # JSON text
+        ('logged_at', pa.float64()),
+    ]),
+}
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ParquetSink:
+    """
+    Append-only columnar log sink.
+    Rows are buffered per (run, table), converted to Arrow record batches and written as
+    Parquet row groups. Files roll over every `rows_per_file` rows:
+
+        {root_dir}/{run_id}/{table}/{worker_id}-{seq:05d}.parquet
+
+    run_id is each row's own run_id (set by the env that logged it), so workers of one
+    training run write into the same run directory; `run_id` (default: default_run_id())
+    is only used for rows logged without one.
+
+    A Parquet file becomes readable once it is closed (rollover or close()).
+    """
+
+    def __init__(self, root_dir="logs/parquet", run_id=None, worker_id=None,
+                 row_group_size=10000, rows_per_file=500000, compression="zstd"):
+        self.root_dir = root_dir
+        self.run_id = run_id or default_run_id()
+        self.worker_id = worker_id or default_worker_id()
+        self.row_group_size = row_group_size
+        self.rows_per_file = rows_per_file
+        self.compression = compression
+
+        self._buffers = {}  # (run_id, table) -> rows
+        self._writers = {}
+        self._rows_in_file = {}
+        self._file_seq = {}
+        self.files_written = []
+        self._lock = threading.Lock()
+
+    # ---------- Writing ----------
+    def write(self, table_name, rows):
+        if table_name not in SCHEMAS:
+            raise ValueError(f"Unknown log table '{table_name}'")
+        now = time.time()
+        with self._lock:
+            touched = set()
+            for row in rows:
+                row = dict(row)
+                row['run_id'] = row.get('run_id') or self.run_id
+                row.setdefault('logged_at', now)
+                if table_name in ('governance_log', 'simulation_runs'):
+                    row['details'] = json.dumps(row.get('details'), default=float)
+                key = (row['run_id'], table_name)
+                self._buffers.setdefault(key, []).append(row)
+                touched.add(key)
+            for key in touched:
+                if len(self._buffers[key]) >= self.row_group_size:
+                    self._write_row_group(key)
+
+    def _write_row_group(self, key):
+        buffer = self._buffers.pop(key, None)
+        if not buffer:
+            return
+        batch = pa.RecordBatch.from_pylist(buffer, schema=SCHEMAS[key[1]])
+
+        writer = self._writers.get(key)
+        if writer is None:
+            writer = self._open_writer(key)
+        writer.write_batch(batch)
+        self._rows_in_file[key] += batch.num_rows
+        if self._rows_in_file[key] >= self.rows_per_file:
+            self._close_writer(key)
+
+    def _open_writer(self, key):
+        run_id, table_name = key
+        directory = os.path.join(self.root_dir, run_id, table_name)
+        os.makedirs(directory, exist_ok=True)
+        seq = self._file_seq.get(key, 0)
+        self._file_seq[key] = seq + 1
+        path = os.path.join(directory, f"{self.worker_id}-{seq:05d}.parquet")
+        writer = pq.ParquetWriter(path, SCHEMAS[table_name], compression=self.compression)
+        self._writers[key] = writer
+        self._rows_in_file[key] = 0
+        return writer
+
+    def _close_writer(self, key):
+        writer = self._writers.pop(key, None)
+        if writer is not None:
+            writer.close()
+            self.files_written.append(writer.where)
+
+    def close(self):
+        """Write buffered rows and close every open file."""
+        with self._lock:
+            for key in list(self._buffers):
+                self._write_row_group(key)
+            for key in list(self._writers):
+                self._close_writer(key)
+
+
+# ---------- Reading ----------
+def list_log_files(root_dir, table_name, run_id=None):
+    """All closed Parquet files for a table, optionally restricted to one run."""
+    pattern = os.path.join(root_dir, run_id or "*", table_name, "*.parquet")
+    return sorted(glob.glob(pattern))
+
+
+def read_log(root_dir, table_name, run_id=None, columns=None):
+    """Load a table's log files into one Arrow table using memory-mapped reads."""
+    files = list_log_files(root_dir, table_name, run_id)
+    if not files:
+        return SCHEMAS[table_name].empty_table() if columns is None else \
+            pa.schema([SCHEMAS[table_name].field(c) for c in columns]).empty_table()
+    tables = [pq.read_table(path, columns=columns, memory_map=True) for path in files]
+    return pa.concat_tables(tables)
+
+
+def read_log_numpy(root_dir, table_name, run_id=None, columns=None):
+    """
+    Return {column: np.ndarray}. Numeric columns without nulls that fit in a single
+    chunk are exposed without copying the Arrow buffers.
+    """
+    table = read_log(root_dir, table_name, run_id, columns).combine_chunks()
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+
+def read_log_pandas(root_dir, table_name, run_id=None, columns=None):
+    return read_log(root_dir, table_name, run_id, columns).to_pandas(self_destruct=True)
@@ -0,0 +1,92 @@
+# backend/sinks.py
+import importlib
+import threading
+
+LOG_TABLES = ('agent_states', 'transactions', 'governance_log', 'simulation_runs')
+
+
+class PostgresSink:
+    """
+    Writes log batches to PostgreSQL through AgentDataManager bulk inserts.
+    The database connection (and table creation) happens on the first write.
+    Agent state batches also upsert agent_latest_state and write through to the
+    manager's state cache, so get_agent_state(s) reflects every flushed batch.
+    """
+
+    def __init__(self):
+        self._manager = None
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            from database.local_db import get_agent_data_manager
+            self._manager = get_agent_data_manager()
+        return self._manager
+
+    def write(self, table_name, rows):
+        if table_name == 'agent_states':
+            self.manager.save_agent_states(rows)
+        elif table_name == 'transactions':
+            self.manager.save_transactions(rows)
+        elif table_name == 'governance_log':
+            self.manager.save_governance_events(rows)
+        elif table_name == 'simulation_runs':
+            self.manager.save_simulation_runs(rows)
+        else:
+            raise ValueError(f"Unknown log table '{table_name}'")
+
+    def close(self):
+        pass
+
+
+class MemorySink:
+    """Keeps every written row in per-table lists. Useful for tests and local analysis."""
+
+    def __init__(self):
+        self.tables = {table_name: [] for table_name in LOG_TABLES}
+        self._lock = threading.Lock()
+
+    def write(self, table_name, rows):
+        with self._lock:
+            self.tables.setdefault(table_name, []).extend(rows)
+
+    def rows(self, table_name):
+        with self._lock:
+            return list(self.tables.get(table_name, []))
+
+    def close(self):
+        pass
+
+
+class NullSink:
+    """Discards everything. Connectors using it skip queueing entirely."""
+
+    def write(self, table_name, rows):
+        pass
+
+    def close(self):
+        pass
+
+
+# Sinks with optional dependencies are registered by "module:Class" path and imported on use
+SINKS = {
+    "postgres": PostgresSink,
+    "memory": MemorySink,
+    "null": NullSink,
+    "parquet": "backend.parquet_log:ParquetSink",
+    "ray_actor": "backend.log_aggregator:RayActorSink",
+}
+
+
+def make_sink(sink="postgres", **kwargs):
+    """Build a sink from a registered name, or return `sink` unchanged if it is already a sink object."""
+    if not isinstance(sink, str):
+        return sink
+    try:
+        sink_cls = SINKS[sink]
+    except KeyError:
+        raise ValueError(f"Unknown log sink '{sink}', expected one of {sorted(SINKS)}") from None
+    if isinstance(sink_cls, str):
+        module_name, class_name = sink_cls.split(":")
+        sink_cls = getattr(importlib.import_module(module_name), class_name)
+    return sink_cls(**kwargs)
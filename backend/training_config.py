@@ -0,0 +1,111 @@
+# backend/training_config.py
+import os
+import json
+
+POLICY_MODES = ("per_agent", "shared", "roles")
+SHARED_POLICY_ID = "shared_policy"
+
+
+def agent_index(agent_id: str) -> int:
+    """'agent_12' -> 12"""
+    return int(agent_id.rsplit("_", 1)[1])
+
+
+def role_policy_id(agent_id: str, num_roles: int) -> str:
+    """Agents are assigned to roles round-robin by index."""
+    return f"role_{agent_index(agent_id) % num_roles}"
+
+
+def default_agent_id_obs(num_agents: int):
+    """One-hot ids for small populations, compact binary codes beyond 64 agents."""
+    return "onehot" if num_agents <= 64 else "binary"
+
+
+def prepare_env_config(env_config: dict, policy_mode: str) -> dict:
+    """
+    Return env_config for a policy mode. Shared and role-based policies need agent
+    identity in the observation, so agent_id_obs is filled in unless set explicitly.
+    """
+    if policy_mode not in POLICY_MODES:
+        raise ValueError(f"Unknown policy mode '{policy_mode}', expected one of {POLICY_MODES}")
+    env_config = dict(env_config)
+    if policy_mode != "per_agent" and "agent_id_obs" not in env_config:
+        env_config["agent_id_obs"] = default_agent_id_obs(env_config.get("num_agents", 4))
+    return env_config
+
+
+def build_multiagent_config(agents, obs_space, act_space, policy_mode="per_agent", num_roles=2) -> dict:
+    """
+    RLlib "multiagent" section for a policy mode:
+    - "per_agent": one policy per agent (policy id == agent id); memory grows with num_agents
+    - "shared":    every agent maps to a single policy
+    - "roles":     agents map round-robin onto `num_roles` policies (role_0, role_1, ...)
+    """
+    if policy_mode == "per_agent":
+        policies = {agent_id: (None, obs_space, act_space, {}) for agent_id in agents}
+
+        def policy_mapping_fn(agent_id, *args, **kwargs):
+            return agent_id
+    elif policy_mode == "shared":
+        policies = {SHARED_POLICY_ID: (None, obs_space, act_space, {})}
+
+        def policy_mapping_fn(agent_id, *args, **kwargs):
+            return SHARED_POLICY_ID
+    elif policy_mode == "roles":
+        num_roles = min(num_roles, len(agents))
+        policies = {f"role_{r}": (None, obs_space, act_space, {}) for r in range(num_roles)}
+
+        def policy_mapping_fn(agent_id, *args, **kwargs):
+            return role_policy_id(agent_id, num_roles)
+    else:
+        raise ValueError(f"Unknown policy mode '{policy_mode}', expected one of {POLICY_MODES}")
+
+    return {"policies": policies, "policy_mapping_fn": policy_mapping_fn}
+
+
+def policy_settings_from_env():
+    """(policy_mode, num_roles) from POLICY_MODE / NUM_ROLES (defaults: per_agent, 2)."""
+    return os.getenv("POLICY_MODE", "per_agent"), int(os.getenv("NUM_ROLES", "2"))
+
+
+# ---------- Resources & tuned configs ----------
+TUNED_CONFIG_PATH = "configs/autotune.json"
+
+# Config keys the autotuner may override
+TUNABLE_KEYS = (
+    "num_workers", "num_envs_per_env_runner", "num_gpus", "train_batch_size",
+    "minibatch_size", "torch_compile_learner", "torch_compile_worker",
+)
+
+
+def detect_num_gpus() -> int:
+    """Number of usable CUDA GPUs (0 if torch is missing or has no CUDA)."""
+    try:
+        import torch
+    except ImportError:
+        return 0
+    return torch.cuda.device_count() if torch.cuda.is_available() else 0
+
+
+def tuned_config_path(path=None):
+    return path or os.getenv("TUNED_CONFIG", TUNED_CONFIG_PATH)
+
+
+def load_tuned_config(path=None):
+    """The "config" section written by autotune.py, or None if there is no tuned config."""
+    path = tuned_config_path(path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)["config"]
+
+
+def apply_tuned_config(config: dict, path=None) -> dict:
+    """Overlay the tunable keys of a tuned config onto an RLlib config dict."""
+    tuned = load_tuned_config(path)
+    if not tuned:
+        return config
+    config = dict(config)
+    config.update({key: value for key, value in tuned.items() if key in TUNABLE_KEYS})
+    print(f"⚙️ Using tuned resources from {tuned_config_path(path)}: {tuned}")
+    return config
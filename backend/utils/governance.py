@@ -1,95 +1,193 @@
 # backend/utils/governance.py
+import heapq
+import itertools
 import uuid
 import time
+import numpy as np
+from backend.utils.tracing import get_tracer, INFO
+
+TRACE = get_tracer("governance")
+
+VOTE_YES_ACTION = 4
+VOTE_NO_ACTION = 5
+
+
+class Proposal:
+    """
+    One open (or resolved) rule-change proposal.
+    Keeps running yes/no weight accumulators so tallying is O(1).
+    """
+
+    __slots__ = ("id", "proposer", "rule", "value", "start_step", "deadline", "timestamp",
+                 "votes", "yes_weight", "no_weight", "outcome")
+
+    def __init__(self, proposer, rule, value, start_step, deadline):
+        self.id = str(uuid.uuid4())
+        self.proposer = proposer
+        self.rule = rule
+        self.value = value
+        self.start_step = start_step
+        self.deadline = deadline
+        self.timestamp = time.time()
+        self.votes = {}
+        self.yes_weight = 0.0
+        self.no_weight = 0.0
+        self.outcome = None
+
+    def get_state(self):
+        # Votes as flat (agent, vote, weight) tuples of Python scalars: NumPy scalars pickle slowly
+        votes = tuple((agent, bool(v["vote"]), float(v["weight"])) for agent, v in self.votes.items())
+        return (self.id, self.proposer, self.rule, self.value, self.start_step, self.deadline,
+                self.timestamp, votes, float(self.yes_weight), float(self.no_weight), self.outcome)
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a proposal from get_state() without drawing a new id."""
+        proposal = cls.__new__(cls)
+        (proposal.id, proposal.proposer, proposal.rule, proposal.value, proposal.start_step,
+         proposal.deadline, proposal.timestamp, votes, proposal.yes_weight, proposal.no_weight,
+         proposal.outcome) = state
+        proposal.votes = {agent: {"vote": vote, "weight": weight} for agent, vote, weight in votes}
+        return proposal
+
+    @property
+    def details(self):
+        return {
+            "id": self.id,
+            "proposer": self.proposer,
+            "rule": self.rule,
+            "value": self.value,
+            "start_step": self.start_step,
+            "deadline": self.deadline,
+            "timestamp": self.timestamp,
+        }
+
 
 class GovernanceModule:
     """
     Self-contained governance system for proposals and voting.
     Features:
-    - Unique proposal IDs
-    - Step-based timestamps
-    - Weighted votes based on agent reputation
-    - Detailed logging for analytics
+    - Many concurrent proposals keyed by unique id (up to max_active_proposals)
+    - Step-based deadlines expired through a deadline-ordered heap
+    - Weighted votes based on agent reputation, tallied incrementally on cast_vote
+    - Batch vote casting from an action array
+    - Event tracing (proposal_started, vote_cast, proposal_resolved) through the
+      "governance" tracer; silent unless enabled (see backend/utils/tracing.py)
+
+    A vote without an explicit proposal id goes to the oldest open proposal the
+    agent has not voted on yet. With max_active_proposals=1 this is exactly the
+    classic single-vote behaviour.
     """
 
-    def __init__(self, eligible_voters, vote_duration_steps=10):
+    def __init__(self, eligible_voters, vote_duration_steps=10, max_active_proposals=1):
         self.eligible_voters = set(eligible_voters)
         self.vote_duration = vote_duration_steps
-        self.proposal_details = None
+        self.max_active_proposals = max_active_proposals
         self._reset_vote_state()
 
     def _reset_vote_state(self):
-        """Reset all voting state except proposal details (kept for env rewards)."""
-        self.is_vote_active = False
-        self.votes = {}
-        self.vote_start_step = -1
-        self.outcome = None
+        """Drop every open proposal."""
+        self.proposals = {}  # id -> Proposal, in creation order
+        self._deadlines = []  # heap of (deadline, seq, proposal_id)
+        self._seq = itertools.count()
+
+    @property
+    def is_vote_active(self):
+        return bool(self.proposals)
 
     # ---------- Proposal ----------
     def start_proposal(self, proposed_by, rule, new_value, current_step):
         """
-        Starts a new proposal if no vote is active.
-        Assigns a unique proposal ID.
+        Starts a new proposal if fewer than max_active_proposals are open.
+        Returns the Proposal, or None if it was rejected.
         """
-        if self.is_vote_active:
-            return False
+        if len(self.proposals) >= self.max_active_proposals:
+            return None
 
-        proposal_id = str(uuid.uuid4())
-        self.is_vote_active = True
-        self.proposal_details = {
-            "id": proposal_id,
-            "proposer": proposed_by,
-            "rule": rule,
-            "value": new_value,
-            "start_step": current_step,
-            "timestamp": time.time()
-        }
-        self.vote_start_step = current_step
-        self.votes = {}
-        self.outcome = None
+        proposal = Proposal(proposed_by, rule, new_value, current_step, current_step + self.vote_duration)
+        self.proposals[proposal.id] = proposal
+        heapq.heappush(self._deadlines, (proposal.deadline, next(self._seq), proposal.id))
 
-        print(f"🏛️ Proposal Started [{proposal_id}] by {proposed_by}: Change '{rule}' → {new_value}")
-        return True
+        if TRACE.enabled_for(INFO):
+            TRACE.event("proposal_started", proposal_id=proposal.id, proposer=proposed_by, rule=rule, value=new_value)
+        return proposal
 
     # ---------- Voting ----------
-    def cast_vote(self, agent_id, vote, weight=1.0):
+    def _route_vote(self, agent_id, proposal_id):
+        if proposal_id is not None:
+            proposal = self.proposals.get(proposal_id)
+            return proposal if proposal is not None and agent_id not in proposal.votes else None
+        for proposal in self.proposals.values():
+            if agent_id not in proposal.votes:
+                return proposal
+        return None
+
+    def cast_vote(self, agent_id, vote, weight=1.0, proposal_id=None):
         """
         Record a vote from an eligible agent.
         Weight can be used for reputation-based voting.
         """
-        if not self.is_vote_active or agent_id not in self.eligible_voters or agent_id in self.votes:
+        if agent_id not in self.eligible_voters:
+            return False
+        proposal = self._route_vote(agent_id, proposal_id)
+        if proposal is None:
             return False
-        
-        self.votes[agent_id] = {"vote": vote, "weight": weight}
-        print(f"🗳️ Vote Cast: {agent_id} voted {'Yes' if vote else 'No'} (weight={weight})")
+
+        proposal.votes[agent_id] = {"vote": vote, "weight": weight}
+        if vote:
+            proposal.yes_weight += weight
+        else:
+            proposal.no_weight += weight
+        if TRACE.enabled_for(INFO):
+            TRACE.event("vote_cast", proposal_id=proposal.id, agent=agent_id, vote=bool(vote), weight=float(weight))
         return True
 
+    def cast_votes(self, agent_ids, actions, weights):
+        """
+        Cast votes for a whole step from an action array aligned with agent_ids
+        (VOTE_YES_ACTION / VOTE_NO_ACTION; other actions are ignored).
+        Cost is O(votes cast). Returns a boolean array of accepted votes.
+        """
+        actions = np.asarray(actions)
+        accepted = np.zeros(len(actions), dtype=bool)
+        if not self.proposals:
+            return accepted
+        for i in np.flatnonzero((actions == VOTE_YES_ACTION) | (actions == VOTE_NO_ACTION)):
+            accepted[i] = self.cast_vote(agent_ids[i], actions[i] == VOTE_YES_ACTION, weights[i])
+        return accepted
+
     # ---------- Tally Votes ----------
     def tally_votes(self, current_step):
         """
-        Tally votes if voting period is over.
-        Uses simple weighted majority.
+        Resolve every proposal whose deadline has been reached.
+        Uses simple weighted majority. Returns the resolved proposals in deadline order.
         """
-        if not self.is_vote_active or self.outcome is not None:
-            return None
+        resolved = []
+        while self._deadlines and self._deadlines[0][0] <= current_step:
+            _, _, proposal_id = heapq.heappop(self._deadlines)
+            proposal = self.proposals.pop(proposal_id)
+            proposal.outcome = 'passed' if proposal.yes_weight > proposal.no_weight else 'failed'
+            if TRACE.enabled_for(INFO):
+                TRACE.event("proposal_resolved", proposal_id=proposal.id, rule=proposal.rule, value=proposal.value,
+                            yes_weight=float(proposal.yes_weight), no_weight=float(proposal.no_weight),
+                            outcome=proposal.outcome)
+            resolved.append(proposal)
+        return resolved
 
-        if current_step >= self.vote_start_step + self.vote_duration:
-            yes_weight = sum(v['weight'] for v in self.votes.values() if v['vote'])
-            no_weight = sum(v['weight'] for v in self.votes.values() if not v['vote'])
+    # ---------- Snapshots ----------
+    def get_state(self):
+        """Open proposals, deadline heap and sequence counter as plain picklable data."""
+        next_seq = next(self._seq)
+        self._seq = itertools.count(next_seq)
+        return [p.get_state() for p in self.proposals.values()], list(self._deadlines), next_seq
 
-            self.outcome = 'passed' if yes_weight > no_weight else 'failed'
-
-            print("-" * 40)
-            print(f"✅ VOTING ENDED - Proposal [{self.proposal_details['id']}]")
-            print(f"Rule: {self.proposal_details['rule']} → {self.proposal_details['value']}")
-            print(f"Weighted Votes: Yes={yes_weight} | No={no_weight} → Outcome={self.outcome.upper()}")
-            print("-" * 40)
-
-            return self.outcome
-
-        return None
+    def set_state(self, state):
+        proposals, deadlines, next_seq = state
+        self.proposals = {p[0]: Proposal.from_state(p) for p in proposals}
+        self._deadlines = list(deadlines)
+        self._seq = itertools.count(next_seq)
 
     # ---------- End Voting ----------
     def end_voting_period(self):
-        """Reset voting state after rewards are distributed."""
+        """Drop all open proposals (used on episode reset)."""
         self._reset_vote_state()
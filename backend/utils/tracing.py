@@ -0,0 +1,130 @@
+# backend/utils/tracing.py
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+
+def _level(level):
+    return logging.getLevelName(level.upper()) if isinstance(level, str) else level
+
+
+class Tracer:
+    """
+    Structured event tracing for hot simulation paths.
+    Features:
+    - Levels: events below `level` are never formatted or forwarded
+    - Per-event sampling: sample_every={"vote_cast": 100} forwards 1 in 100 of that event
+    - Rate limit: token bucket of `rate_limit` events/s (burst `burst`); the number of
+      suppressed events is attached to the next forwarded one
+    - Ring buffer of the last `ring_size` events (all levels, unsampled) for debugging
+    - Forwarding to the standard `logging` logger "economy.<name>"
+
+    Call sites guard with enabled_for(level), so a tracer with no ring buffer and a
+    level above the event costs one method call and builds nothing.
+    """
+
+    def __init__(self, name, level=WARNING, ring_size=0, sample_every=None, rate_limit=None, burst=None):
+        self.name = name
+        self.logger = logging.getLogger(f"economy.{name}")
+        self._lock = threading.Lock()
+        self.configure(level, ring_size, sample_every, rate_limit, burst)
+
+    def configure(self, level=WARNING, ring_size=0, sample_every=None, rate_limit=None, burst=None):
+        self.level = _level(level)
+        self.ring = deque(maxlen=ring_size) if ring_size else None
+        self.sample_every = dict(sample_every or {})
+        self._sample_counts = {}
+        self.rate_limit = rate_limit
+        self.burst = burst if burst is not None else (rate_limit or 0)
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self.suppressed = 0
+
+    def enabled_for(self, level):
+        return self.ring is not None or level >= self.level
+
+    # ---------- Events ----------
+    def event(self, name, level=INFO, **fields):
+        if self.ring is not None:
+            self.ring.append((time.time(), level, name, fields))
+        if level < self.level:
+            return
+        every = self.sample_every.get(name)
+        if every:
+            count = self._sample_counts.get(name, 0) + 1
+            self._sample_counts[name] = count
+            if count % every:
+                return
+        if self.rate_limit is not None and not self._take_token():
+            return
+        if self.suppressed:
+            with self._lock:
+                fields = dict(fields, suppressed=self.suppressed)
+                self.suppressed = 0
+        self.logger.log(level, "%s %s", name, " ".join(f"{key}={value}" for key, value in fields.items()),
+                        extra={"trace_event": name, "trace_fields": fields})
+
+    def _take_token(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_limit)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.suppressed += 1
+            return False
+
+    # ---------- Ring buffer ----------
+    def recent(self, limit=None, event=None):
+        """Most recent buffered events (oldest first) as dicts, optionally for one event name."""
+        if self.ring is None:
+            return []
+        records = [
+            {"time": t, "level": logging.getLevelName(level), "event": name, **fields}
+            for t, level, name, fields in list(self.ring)
+            if event is None or name == event
+        ]
+        return records[-limit:] if limit else records
+
+    def clear(self):
+        if self.ring is not None:
+            self.ring.clear()
+
+
+# ---------- Registry ----------
+_tracers = {}
+_registry_lock = threading.Lock()
+
+
+def _defaults():
+    """Process defaults, overridable via TRACE_LEVEL, TRACE_RING_SIZE and TRACE_RATE_LIMIT."""
+    rate_limit = os.getenv("TRACE_RATE_LIMIT")
+    return {
+        "level": os.getenv("TRACE_LEVEL", "WARNING"),
+        "ring_size": int(os.getenv("TRACE_RING_SIZE", "0")),
+        "rate_limit": float(rate_limit) if rate_limit else 10.0,
+    }
+
+
+def get_tracer(name):
+    """Return the process-wide tracer for a subsystem (e.g. "governance", "db")."""
+    with _registry_lock:
+        tracer = _tracers.get(name)
+        if tracer is None:
+            tracer = _tracers[name] = Tracer(name, **_defaults())
+        return tracer
+
+
+def configure_tracer(name, **options):
+    """Reconfigure a tracer in place; modules holding a reference see the change."""
+    tracer = get_tracer(name)
+    tracer.configure(**{**_defaults(), **options})
+    return tracer
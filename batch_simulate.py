@@ -0,0 +1,268 @@
+# batch_simulate.py
+"""
+Parallel evaluation sweeps without Ray or a database.
+
+Runs every (seed x price_range x tax_range x volatility_range) episode with a fixed
+action policy on a process pool. Tasks are dispatched in chunks; each worker reuses
+its envs (db_sink="null") and sends back one compact summary per episode:
+
+    returns (mean/total over agents), final market price and tax rate, trades,
+    proposals started/passed/failed, Gini coefficient of final wealth (net worth)
+
+Summaries are merged into one results table (CSV or Parquet) plus a per-setting overview.
+
+Usage:
+    python batch_simulate.py --seeds 200 --price-ranges 50:150,75:125 --output results.csv
+    python batch_simulate.py --seeds 64 --tax-ranges 0.01:0.1,0.1:0.2 --policy trade --workers 8
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import importlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+NUM_ACTIONS = 6
+SUMMARY_FIELDS = (
+    "task_id", "seed", "policy", "price_range", "tax_range", "volatility_range", "num_agents", "steps",
+    "mean_return", "total_return", "final_price", "final_tax_rate", "trades", "proposals", "votes",
+    "passed", "failed", "gini_wealth", "seconds",
+)
+
+
+# ---------- Policies ----------
+# A policy maps (rng, num_agents) to one action per agent for the next step
+def random_policy(rng, num_agents):
+    return rng.integers(0, NUM_ACTIONS, size=num_agents)
+
+
+def hold_policy(rng, num_agents):
+    return np.zeros(num_agents, dtype=np.int64)
+
+
+def trade_policy(rng, num_agents):
+    return rng.integers(1, 3, size=num_agents)  # buy or sell
+
+
+POLICIES = {"random": random_policy, "hold": hold_policy, "trade": trade_policy}
+
+
+def resolve_policy(name):
+    """Registered policy name, or "module:function" for a custom one."""
+    if name in POLICIES:
+        return POLICIES[name]
+    if ":" not in name:
+        raise ValueError(f"Unknown policy '{name}', expected one of {sorted(POLICIES)} or module:function")
+    module_name, function_name = name.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+# ---------- Metrics ----------
+def gini(values):
+    """Gini coefficient of non-negative values (0 = equal, -> 1 = one holder has everything)."""
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    total = values.sum()
+    if len(values) == 0 or total <= 0:
+        return 0.0
+    ranks = np.arange(1, len(values) + 1)
+    return float(2.0 * (ranks * values).sum() / (len(values) * total) - (len(values) + 1) / len(values))
+
+
+# ---------- Tasks ----------
+def parse_ranges(text):
+    """"50:150,75:125" -> [(50.0, 150.0), (75.0, 125.0)]."""
+    ranges = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        low, _, high = item.partition(":")
+        ranges.append((float(low), float(high or low)))
+    return ranges
+
+
+def make_tasks(seeds, price_ranges, tax_ranges, volatility_ranges, num_agents, max_steps, policy):
+    grid = itertools.product(price_ranges, tax_ranges, volatility_ranges, seeds)
+    return [
+        {"task_id": i, "seed": seed, "policy": policy, "num_agents": num_agents, "max_steps": max_steps,
+         "price_range": price, "tax_range": tax, "volatility_range": volatility}
+        for i, (price, tax, volatility, seed) in enumerate(grid)
+    ]
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# ---------- Worker ----------
+_envs = {}  # per worker process: env reused for every task with the same settings
+
+
+def init_worker(tasks=()):
+    """
+    Pool initializer: import the env module (it pulls in ray.rllib) and build the envs
+    for `tasks`' settings before any episode runs, so `seconds` is the episode alone.
+    """
+    import backend.env.environment  # noqa: F401
+    for task in tasks:
+        _get_env(task)
+
+
+def _env_key(task):
+    return task["num_agents"], task["max_steps"], task["price_range"], task["tax_range"], task["volatility_range"]
+
+
+def _get_env(task):
+    from backend.env.environment import DecentralizedEconomyEnv
+    key = _env_key(task)
+    env = _envs.get(key)
+    if env is None:
+        env = _envs[key] = DecentralizedEconomyEnv({
+            "num_agents": task["num_agents"], "max_steps": task["max_steps"], "db_sink": "null",
+            "price_range": task["price_range"], "tax_range": task["tax_range"],
+            "volatility_range": task["volatility_range"],
+        })
+    return env
+
+
+def run_episode(task):
+    """Play one episode and return its summary row (`seconds`: reset and steps only)."""
+    env = _get_env(task)
+    policy = resolve_policy(task["policy"])
+    start = time.perf_counter()
+    env.reset(seed=task["seed"])
+    # Actions come from their own stream so the env's RNG stays seed-for-seed comparable
+    action_rng = np.random.default_rng([task["seed"], 1])
+    agents, num_agents = env.agents, len(env.agents)
+    returns = np.zeros(num_agents)
+    done = False
+    while not done:
+        actions = policy(action_rng, num_agents).tolist()
+        _, rewards, terminations, _, _ = env.step(dict(zip(agents, actions)))
+        returns += [rewards[agent] for agent in agents]
+        done = terminations["__all__"]
+
+    counts = env.episode_counts
+    return {
+        "task_id": task["task_id"], "seed": task["seed"], "policy": task["policy"],
+        "price_range": task["price_range"], "tax_range": task["tax_range"],
+        "volatility_range": task["volatility_range"], "num_agents": num_agents, "steps": env.steps,
+        "mean_return": float(returns.mean()), "total_return": float(returns.sum()),
+        "final_price": env.market_price, "final_tax_rate": env.tax_rate,
+        "trades": counts["trades"], "proposals": counts["proposals"], "votes": counts["votes"],
+        "passed": counts["passed"], "failed": counts["failed"],
+        "gini_wealth": gini(env.states.net_worth(env.market_price)),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def run_chunk(tasks):
+    return [run_episode(task) for task in tasks]
+
+
+# ---------- Driver ----------
+def run_batch(tasks, workers=None, chunksize=None, progress=None):
+    """
+    Run all tasks on a pool of `workers` processes (1 = in this process), dispatching
+    `chunksize` tasks at a time (default: about 4 chunks per worker). Returns the
+    summaries sorted by task_id; `progress(done, total)` is called as chunks finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, -(-len(tasks) // (workers * 4)))
+    chunks = chunked(tasks, chunksize)
+    # One task per distinct env setting, so each worker builds its envs up front
+    settings = list({_env_key(task): task for task in tasks}.values())
+    results = []
+    if workers == 1:
+        init_worker(settings)
+        for chunk in chunks:
+            results.extend(run_chunk(chunk))
+            if progress:
+                progress(len(results), len(tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(settings,)) as pool:
+            for future in as_completed([pool.submit(run_chunk, chunk) for chunk in chunks]):
+                results.extend(future.result())
+                if progress:
+                    progress(len(results), len(tasks))
+    return sorted(results, key=lambda row: row["task_id"])
+
+
+def summarize(results):
+    """Mean (and std of mean_return) per (price_range, tax_range, volatility_range) setting."""
+    groups = {}
+    for row in results:
+        groups.setdefault((row["price_range"], row["tax_range"], row["volatility_range"]), []).append(row)
+    overview = []
+    for (price, tax, volatility), rows in groups.items():
+        returns = np.array([row["mean_return"] for row in rows])
+        overview.append({
+            "price_range": price, "tax_range": tax, "volatility_range": volatility, "episodes": len(rows),
+            "mean_return": float(returns.mean()), "std_return": float(returns.std()),
+            **{name: float(np.mean([row[name] for row in rows]))
+               for name in ("final_price", "final_tax_rate", "passed", "gini_wealth")},
+        })
+    return overview
+
+
+def write_results(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    rows = [{**row, **{k: f"{row[k][0]}:{row[k][1]}" for k in ("price_range", "tax_range", "volatility_range")}}
+            for row in results]
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.Table.from_pylist(rows), path)
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seeds", type=int, default=100, help="Episodes (seeds) per setting")
+    parser.add_argument("--seed-start", type=int, default=0, help="First seed")
+    parser.add_argument("--price-ranges", default="75:125", help="Comma separated low:high market price ranges")
+    parser.add_argument("--tax-ranges", default="0.02:0.15", help="Comma separated low:high tax rate ranges")
+    parser.add_argument("--volatility-ranges", default="1.005:1.025", help="Comma separated low:high volatility ranges")
+    parser.add_argument("--agents", type=int, default=8, help="Agents per episode")
+    parser.add_argument("--steps", type=int, default=100, help="Steps per episode")
+    parser.add_argument("--policy", default="random", help=f"{sorted(POLICIES)} or module:function")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=None, help="Episodes per dispatched task")
+    parser.add_argument("--output", default="logs/batch_results.csv", help="Results table (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    resolve_policy(args.policy)  # fail fast on a bad policy name
+    seeds = range(args.seed_start, args.seed_start + args.seeds)
+    tasks = make_tasks(seeds, parse_ranges(args.price_ranges), parse_ranges(args.tax_ranges),
+                       parse_ranges(args.volatility_ranges), args.agents, args.steps, args.policy)
+    print(f"🚀 Running {len(tasks)} episodes on {args.workers} workers...")
+
+    start = time.perf_counter()
+    last_report = [0.0]
+
+    def progress(done, total):
+        if time.perf_counter() - last_report[0] > 2 or done == total:
+            last_report[0] = time.perf_counter()
+            print(f"  {done}/{total} episodes")
+
+    results = run_batch(tasks, args.workers, args.chunksize, progress)
+    elapsed = time.perf_counter() - start
+    write_results(args.output, results)
+
+    print(f"\n✅ {len(results)} episodes in {elapsed:.1f}s ({len(results) / elapsed:.1f} episodes/s)")
+    for row in summarize(results):
+        print(f"price {row['price_range']} tax {row['tax_range']} vol {row['volatility_range']}: "
+              f"return {row['mean_return']:.1f} ± {row['std_return']:.1f}, final price {row['final_price']:.1f}, "
+              f"passed {row['passed']:.2f}, gini {row['gini_wealth']:.3f}")
+    print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmark harness for the simulation hot paths.
+
+Measures:
+- DecentralizedEconomyEnv reset/step throughput across agent counts
+- GovernanceModule proposal/vote/tally cost
+- LocalDBConnector rows/sec into the in-memory sink
+
+Usage:
+    python -m benchmarks.run_benchmarks --output benchmarks/baselines/local.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/baselines/local.json --threshold 0.15
+
+Every result is the best of `--repeat` runs. With --compare the process exits with
+status 1 if any benchmark is slower than the baseline by more than the threshold.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+DEFAULT_AGENT_COUNTS = (4, 64, 1000, 10000)
+QUICK_AGENT_COUNTS = (4, 64)
+
+
+# ---------- Timing ----------
+def best_of(fn, repeat):
+    """Run fn() `repeat` times and return the fastest wall time in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the per-event prints of the env and governance module while timing."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def calibrate(repeat=5):
+    """
+    Time a fixed Python + NumPy workload. Stored with every result set so comparisons
+    can factor out a uniformly faster or slower machine (see compare(normalize=True)).
+    """
+    data = np.random.RandomState(0).uniform(size=100000)
+
+    def run():
+        total = 0
+        for i in range(100000):
+            total += i % 7
+        for _ in range(20):
+            np.sort(data)
+
+    return best_of(run, repeat)
+
+
+def result(value, unit, higher_is_better, **params):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better, "params": params}
+
+
+# ---------- Benchmarks ----------
+def bench_env(num_agents, steps, repeat):
+    from backend.env.environment import DecentralizedEconomyEnv
+
+    with quiet():
+        env = DecentralizedEconomyEnv({"num_agents": num_agents, "max_steps": steps + 1, "db_sink": "null"})
+    rng = np.random.RandomState(0)
+    actions = [dict(zip(env.agents, row.tolist())) for row in rng.randint(0, 6, size=(steps, num_agents))]
+
+    def run_reset():
+        env.reset(seed=0)
+
+    def run_steps():
+        env.reset(seed=0)
+        for action_dict in actions:
+            env.step(action_dict)
+
+    with quiet():
+        reset_s = best_of(run_reset, repeat)
+        steps_s = best_of(run_steps, repeat) - reset_s
+    return {
+        f"env.reset[agents={num_agents}]": result(reset_s * 1e3, "ms", False, num_agents=num_agents),
+        f"env.step[agents={num_agents}]": result(
+            steps * num_agents / steps_s, "agent_steps/s", True, num_agents=num_agents, steps=steps
+        ),
+    }
+
+
+def bench_governance(num_voters, rounds, repeat):
+    from backend.utils.governance import GovernanceModule, VOTE_YES_ACTION, VOTE_NO_ACTION
+
+    voters = [f"agent_{i}" for i in range(num_voters)]
+    rng = np.random.RandomState(0)
+    actions = rng.choice([VOTE_YES_ACTION, VOTE_NO_ACTION], size=num_voters)
+    weights = rng.uniform(0.5, 2.0, size=num_voters)
+
+    def run():
+        governance = GovernanceModule(voters, vote_duration_steps=1)
+        for step in range(rounds):
+            governance.start_proposal(voters[step % num_voters], "tax_rate", 0.1, step)
+            governance.cast_votes(voters, actions, weights)
+            governance.tally_votes(step + 1)
+
+    with quiet():
+        elapsed = best_of(run, repeat)
+    return {
+        f"governance.round[voters={num_voters}]": result(
+            elapsed / rounds * 1e3, "ms", False, num_voters=num_voters, rounds=rounds
+        ),
+    }
+
+
+def bench_connector(num_rows, repeat):
+    from backend.db_connector import LocalDBConnector
+
+    agent_ids = [f"agent_{i}" for i in range(1000)]
+    states = [{"cash": 1000.0, "assets": 1, "reputation": 1.0, "tokens": 100, "total_trades": 0}] * 1000
+    batches = num_rows // len(agent_ids)
+
+    def run():
+        connector = LocalDBConnector(batch_size=5000, flush_interval=0.01, max_queue_size=num_rows, sink="memory")
+        for _ in range(batches):
+            connector.log_agent_states(agent_ids, states)
+        connector.flush()
+        connector.shutdown()
+
+    with quiet():
+        elapsed = best_of(run, repeat)
+    return {
+        "connector.log_agent_states[sink=memory]": result(
+            batches * len(agent_ids) / elapsed, "rows/s", True, rows=batches * len(agent_ids)
+        ),
+    }
+
+
+def run_all(agent_counts, steps, repeat):
+    results = {}
+    for num_agents in agent_counts:
+        # Keep the largest sizes affordable: roughly constant agent-steps per size
+        env_steps = max(5, min(steps, 200000 // num_agents))
+        results.update(bench_env(num_agents, env_steps, repeat))
+        results.update(bench_governance(num_agents, rounds=20, repeat=repeat))
+    results.update(bench_connector(num_rows=100000, repeat=repeat))
+    return results
+
+
+# ---------- Baselines ----------
+def environment_info():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def save_results(path, results, calibration):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    document = {"environment": environment_info(), "calibration_s": calibration, "results": results}
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    """Return (results, calibration_s) from a baseline file."""
+    with open(path) as f:
+        document = json.load(f)
+    return document["results"], document.get("calibration_s")
+
+
+def compare(baseline, current, threshold, speed_ratio=1.0):
+    """
+    Compare two result dicts. Returns a list of (name, baseline, current, change, regressed),
+    where change is the relative slowdown (positive = worse) regardless of the metric direction.
+    `speed_ratio` is current/baseline calibration time; slowdowns explained by a slower
+    machine are divided out. Benchmarks missing from either side are skipped.
+    """
+    rows = []
+    for name in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[name]["value"], current[name]["value"]
+        if baseline[name]["higher_is_better"]:
+            change = old / (new * speed_ratio) - 1.0 if new else float("inf")
+        else:
+            change = new / (old * speed_ratio) - 1.0 if old else 0.0
+        rows.append((name, old, new, change, change > threshold))
+    return rows
+
+
+def print_results(results):
+    for name, entry in sorted(results.items()):
+        print(f"{name:<45} {entry['value']:>14.3f} {entry['unit']}")
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'benchmark':<45} {'baseline':>14} {'current':>14} {'slowdown':>9}")
+    for name, old, new, change, regressed in rows:
+        flag = "  ❌ REGRESSION" if regressed else ""
+        print(f"{name:<45} {old:>14.3f} {new:>14.3f} {change:>+8.1%}{flag}")
+    failures = sum(row[4] for row in rows)
+    if failures:
+        print(f"\n❌ {failures} benchmark(s) regressed by more than {threshold:.0%}")
+    else:
+        print(f"\n✅ No regressions beyond {threshold:.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown (default 0.15)")
+    parser.add_argument("--agents", type=int, nargs="+", help="Agent counts to benchmark")
+    parser.add_argument("--steps", type=int, default=100, help="Env steps per run (capped for large agent counts)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the best is kept")
+    parser.add_argument("--no-normalize", action="store_true",
+                        help="Compare raw numbers instead of correcting for machine speed")
+    parser.add_argument("--quick", action="store_true", help="Small agent counts and fewer repeats")
+    args = parser.parse_args(argv)
+
+    agent_counts = args.agents or (QUICK_AGENT_COUNTS if args.quick else DEFAULT_AGENT_COUNTS)
+    repeat = min(args.repeat, 2) if args.quick else args.repeat
+
+    print("🚀 Running benchmarks...")
+    calibration = calibrate()
+    results = run_all(agent_counts, args.steps, repeat)
+    print_results(results)
+    print(f"{'calibration':<45} {calibration * 1e3:>14.3f} ms")
+    if args.output:
+        save_results(args.output, results, calibration)
+        print(f"💾 Results saved to {args.output}")
+    if args.compare:
+        baseline, baseline_calibration = load_results(args.compare)
+        speed_ratio = 1.0
+        if baseline_calibration and not args.no_normalize:
+            speed_ratio = calibration / baseline_calibration
+            print(f"\nMachine speed vs baseline: {1 / speed_ratio:.2f}x (results normalized)")
+        rows = compare(baseline, results, args.threshold, speed_ratio)
+        print_comparison(rows, args.threshold)
+        if any(row[4] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
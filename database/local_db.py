@@ -1,6 +1,16 @@
 import os
+import re
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.errors
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import RealDictCursor, Json, execute_values
 from sqlalchemy import create_engine
 import logging
 import json
@@ -9,78 +19,429 @@ from dotenv import load_dotenv
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers its prepared statements and last use time."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+        self.last_used = time.monotonic()
+
+
 class LocalDatabase:
-    def __init__(self):
+    """
+    Thread-safe PostgreSQL access layer.
+    Features:
+    - Lazily created connection pool (DB_POOL_SIZE, default 4) shared by all threads
+    - Callers block while the pool is exhausted instead of failing
+    - Health check (SELECT 1) for connections idle longer than DB_HEALTH_CHECK_SECONDS
+    - Broken connections are discarded and the statement retried once on a fresh one
+    - Server-side prepared statements for hot single-row inserts and selects
+    """
+
+    CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+    def __init__(self, pool_size=None, health_check_interval=None):
         self.connection_string = os.getenv('DATABASE_URL',
             f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@"
             f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
         )
-        self.engine = create_engine(self.connection_string)
+        self.pool_size = pool_size or int(os.getenv('DB_POOL_SIZE', 4))
+        self.health_check_interval = (
+            health_check_interval if health_check_interval is not None
+            else float(os.getenv('DB_HEALTH_CHECK_SECONDS', 30))
+        )
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._engine = None
+
+    @property
+    def engine(self):
+        """SQLAlchemy engine, created on first use (the logging paths do not need it)."""
+        if self._engine is None:
+            self._engine = create_engine(self.connection_string)
+        return self._engine
 
+    # ---------- Connections ----------
     def get_connection(self):
+        """Open a standalone (unpooled) connection."""
         return psycopg2.connect(self.connection_string)
 
-    def execute_query(self, query, params=None, fetch=True):
-        conn = None
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        1, self.pool_size, self.connection_string,
+                        connection_factory=PooledConnection,
+                    )
+        return self._pool
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute(query, params)
-            if fetch:
-                result = cursor.fetchall()
-                conn.commit()
-                cursor.close()
-                conn.close()
-                return [dict(row) for row in result]
-            else:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except self.CONNECTION_ERRORS:
+            return False
+
+    @contextmanager
+    def connection(self):
+        """
+        Check a healthy connection out of the pool for one transaction.
+        Commits on success, rolls back on error, and drops connections that broke.
+        """
+        pool = self._get_pool()
+        with self._slots:
+            conn = pool.getconn()
+            if not self._is_healthy(conn):
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+            try:
+                yield conn
                 conn.commit()
-                cursor.close()
-                conn.close()
+            except BaseException:
+                if not conn.closed:
+                    try:
+                        conn.rollback()
+                    except self.CONNECTION_ERRORS:
+                        pass
+                pool.putconn(conn, close=True)
+                raise
+            conn.last_used = time.monotonic()
+            pool.putconn(conn)
+
+    def _with_retry(self, work):
+        """Run work(conn) in a pooled transaction, retrying once if the connection was lost."""
+        try:
+            with self.connection() as conn:
+                return work(conn)
+        except self.CONNECTION_ERRORS as e:
+            logger.warning(f"Database connection lost, reconnecting: {e}")
+        with self.connection() as conn:
+            return work(conn)
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+    # ---------- Prepared statements ----------
+    @staticmethod
+    def _statement_name(query):
+        return "stmt_" + hashlib.sha1(query.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _numbered_placeholders(query):
+        counter = iter(range(1, query.count('%s') + 1))
+        return re.sub(r'%s', lambda _: f"${next(counter)}", query)
+
+    def _execute(self, cursor, query, params, prepare):
+        if not prepare:
+            cursor.execute(query, params)
+            return
+        conn = cursor.connection
+        name = self._statement_name(query)
+        if name not in conn.prepared_statements:
+            cursor.execute(f"PREPARE {name} AS {self._numbered_placeholders(query)}")
+            conn.prepared_statements.add(name)
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f"EXECUTE {name}")
+
+    # ---------- Queries ----------
+    def execute_query(self, query, params=None, fetch=True, prepare=False):
+        def work(conn):
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                self._execute(cursor, query, params, prepare)
+                if fetch:
+                    return [dict(row) for row in cursor.fetchall()]
                 return True
+
+        try:
+            return self._with_retry(work)
         except Exception as e:
             logger.error(f"Database error: {e}")
-            if conn:
-                conn.rollback()
-                conn.close()
             raise e
 
-    def insert_data(self, table_name, data):
+    def insert_data(self, table_name, data, prepare=True):
         if not data:
             return False
         columns = ', '.join(data.keys())
         placeholders = ', '.join(['%s'] * len(data))
         query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders}) RETURNING id"
-        return self.execute_query(query, list(data.values()))
+        return self.execute_query(query, list(data.values()), prepare=prepare)
+
+    def insert_many(self, table_name, columns, rows, page_size=1000, on_conflict=None):
+        """
+        Insert many rows in one transaction using multi-row VALUES statements.
+        `rows` is a sequence of tuples ordered like `columns`; `on_conflict` is an optional
+        ON CONFLICT clause body, e.g. "(run_id) DO NOTHING".
+        """
+        if not rows:
+            return 0
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s"
+        if on_conflict:
+            query += f" ON CONFLICT {on_conflict}"
+
+        def work(conn):
+            with conn.cursor() as cursor:
+                execute_values(cursor, query, rows, page_size=page_size)
+            return len(rows)
+
+        try:
+            return self._with_retry(work)
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            raise e
+
+    def upsert_many(self, table_name, columns, rows, key_columns, template=None, returning=None,
+                    updates=None, page_size=1000):
+        """
+        INSERT ... ON CONFLICT (key_columns) DO UPDATE for many rows in one transaction.
+        Every non-key column is overwritten unless `updates` gives its SET expression
+        (e.g. to merge with the existing value). `template` is passed to execute_values
+        (e.g. to fill a column with CURRENT_TIMESTAMP); with `returning` the written
+        rows are fetched back as dicts. Keys must be unique within `rows`.
+        """
+        if not rows:
+            return [] if returning else 0
+        updates = ', '.join(f"{c} = {(updates or {}).get(c, f'EXCLUDED.{c}')}"
+                            for c in columns if c not in key_columns)
+        query = (f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES %s "
+                 f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}")
+        if returning:
+            query += f" RETURNING {returning}"
+
+        def work(conn):
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                result = execute_values(cursor, query, rows, template=template,
+                                        page_size=page_size, fetch=bool(returning))
+            return [dict(row) for row in result] if returning else len(rows)
+
+        try:
+            return self._with_retry(work)
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            raise e
 
     def update_data(self, table_name, data, condition):
         set_clause = ', '.join([f"{k} = %s" for k in data.keys()])
         query = f"UPDATE {table_name} SET {set_clause} WHERE {condition}"
         return self.execute_query(query, list(data.values()), fetch=False)
 
-    def select_data(self, table_name, columns="*", condition=None, params=None):
+    def select_data(self, table_name, columns="*", condition=None, params=None, prepare=False):
         query = f"SELECT {columns} FROM {table_name}"
         if condition:
             query += f" WHERE {condition}"
-        return self.execute_query(query, params)
+        return self.execute_query(query, params, prepare=prepare)
 
     def create_table(self, table_name, schema):
         query = f"CREATE TABLE IF NOT EXISTS {table_name} ({schema})"
         return self.execute_query(query, fetch=False)
 
+    def create_index(self, index_name, table_name, columns, unique=False):
+        unique = "UNIQUE " if unique else ""
+        query = f"CREATE {unique}INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})"
+        return self.execute_query(query, fetch=False)
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU map with an optional time-to-live.
+    Entries older than `ttl` seconds (0 = never) are treated as missing, which bounds how
+    stale a value can get when another process writes the same keys.
+    """
+
+    def __init__(self, maxsize=10000, ttl=0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (not self.ttl or time.monotonic() - entry[0] < self.ttl):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+LOG_KEY_COLUMNS = ('run_id', 'env_id', 'episode', 'step')
+
+# Typed agent state columns. Rows are delta-encoded (StateDeltaEncoder): keyframe rows hold
+# every field, other rows NULL for fields unchanged since the agent's previous row.
+# reputation keeps its original column; state (JSONB) is only set by rows from older versions.
+STATE_VALUE_COLUMNS = ('cash', 'assets', 'tokens', 'reputation', 'voting_power', 'total_trades')
+STATE_COLUMN_DDL = (
+    "cash DOUBLE PRECISION",
+    "assets BIGINT",
+    "tokens BIGINT",
+    "voting_power DOUBLE PRECISION",
+    "total_trades INTEGER",
+    "keyframe BOOLEAN NOT NULL DEFAULT TRUE",
+)
+LEGACY_RUN_ID = 'legacy'          # rows logged before tables were partitioned by run
+UNASSIGNED_RUN_ID = 'unassigned'  # rows logged without a run_id
+
+# Log tables partitioned by run: LIST (run_id), one partition per run plus a default
+PARTITIONED_TABLES = {
+    'agent_states': """
+        id BIGSERIAL,
+        run_id VARCHAR(64) NOT NULL,
+        env_id VARCHAR(32),
+        episode INTEGER,
+        step INTEGER,
+        agent_id VARCHAR(255) NOT NULL,
+        state JSONB,
+        reputation FLOAT DEFAULT 0.0,
+        """ + ",\n        ".join(STATE_COLUMN_DDL) + """,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, id)
+    """,
+    'transactions': """
+        id BIGSERIAL,
+        run_id VARCHAR(64) NOT NULL,
+        env_id VARCHAR(32),
+        episode INTEGER,
+        step INTEGER,
+        transaction_id VARCHAR(255) NOT NULL,
+        from_agent VARCHAR(255),
+        to_agent VARCHAR(255),
+        amount FLOAT,
+        transaction_type VARCHAR(100),
+        metadata JSONB,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, id),
+        UNIQUE (run_id, transaction_id)
+    """,
+    'governance_log': """
+        id BIGSERIAL,
+        run_id VARCHAR(64) NOT NULL,
+        env_id VARCHAR(32),
+        episode INTEGER,
+        step INTEGER,
+        event_type VARCHAR(255),
+        agent_id VARCHAR(255),
+        details JSONB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, id)
+    """,
+}
+
+
+def partition_name(table_name, run_id):
+    """Partition of `table_name` holding one run (run ids are hashed into a safe identifier)."""
+    return f"{table_name}_r{hashlib.sha1(run_id.encode()).hexdigest()[:12]}"
+
+
 class AgentDataManager:
-    def __init__(self):
-        self.db = LocalDatabase()
+    """
+    Table setup and typed reads/writes for the simulation logs.
+    Runs:
+    - agent_states, transactions and governance_log rows carry run_id, env_id, episode
+      and step; the tables are LIST-partitioned by run_id (one partition per run,
+      created on the first write of a run), so a run is dropped with DROP TABLE
+    - simulation_runs has one row per run; downsample_run() replaces a run's rows
+      with per-episode aggregates in episode_summaries (see retention.py)
+    Agent states:
+    - agent_states keeps the full history (indexed by agent and time) as typed, delta-encoded
+      columns; agent_states_filled / get_agent_states_at() rebuild full states at any step
+    - agent_latest_state holds one row per (run_id, env_id, agent_id), upserted on every
+      bulk save: keyframes replace the state, deltas are merged into it
+    - Current states are served from an in-process LRU cache (AGENT_STATE_CACHE_SIZE,
+      AGENT_STATE_CACHE_TTL seconds) that saves write through to, so states logged via
+      LocalDBConnector in this process are visible without another query
+    """
+    TRANSACTION_COLUMNS = LOG_KEY_COLUMNS + ('transaction_id', 'from_agent', 'amount', 'transaction_type', 'metadata')
+    LATEST_STATE_KEY = ('run_id', 'env_id', 'agent_id')
+    LATEST_STATE_COLUMNS = 'run_id, env_id, agent_id, state, reputation, last_updated'
+
+    def __init__(self, db=None, cache_size=None, cache_ttl=None):
+        self.db = db or LocalDatabase()
+        self._known_runs = set()
+        self.state_cache = LRUCache(
+            cache_size if cache_size is not None else int(os.getenv('AGENT_STATE_CACHE_SIZE', 10000)),
+            cache_ttl if cache_ttl is not None else float(os.getenv('AGENT_STATE_CACHE_TTL', 0)),
+        )
         self._ensure_tables()
 
     def _ensure_tables(self):
-        self.db.create_table('agent_states', """
-            id SERIAL PRIMARY KEY,
+        self.db.create_table('simulation_runs', """
+            run_id VARCHAR(64) PRIMARY KEY,
+            agent_count INTEGER,
+            details JSONB,
+            status VARCHAR(20) DEFAULT 'active',
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            retained_at TIMESTAMP
+        """)
+        for table_name, schema in PARTITIONED_TABLES.items():
+            self._ensure_partitioned_table(table_name, schema)
+        self._ensure_state_columns()
+        self._create_filled_state_view()
+        # Rows of one bulk insert share created_at, so id breaks ties
+        self.db.create_index('idx_agent_states_agent_created', 'agent_states', 'agent_id, created_at DESC, id DESC')
+        # "Latest rows" for the dashboard API: ORDER BY created_at DESC, id DESC LIMIT n reads the
+        # newest entries of each partition's index (ids alone are not ordered across partitions)
+        self.db.execute_query("DROP INDEX IF EXISTS idx_agent_states_created", fetch=False)
+        self.db.create_index('idx_agent_states_created_id', 'agent_states', 'created_at, id')
+        self.db.create_index('idx_transactions_timestamp_id', 'transactions', 'timestamp, id')
+        self.db.create_index('idx_governance_log_created_id', 'governance_log', 'created_at, id')
+        # Agent ids repeat in every env and run, so the current state is kept per env of a run.
+        # The table only holds derived data: a version keyed by agent_id alone is rebuilt.
+        if self.db.execute_query("SELECT 1 FROM information_schema.columns "
+                                 "WHERE table_name = 'agent_latest_state' AND column_name = 'agent_id'") \
+                and not self.db.execute_query("SELECT 1 FROM information_schema.columns "
+                                              "WHERE table_name = 'agent_latest_state' AND column_name = 'run_id'"):
+            self.db.execute_query("DROP TABLE agent_latest_state", fetch=False)
+        self.db.create_table('agent_latest_state', """
+            run_id VARCHAR(64) NOT NULL,
+            env_id VARCHAR(32) NOT NULL DEFAULT '',
             agent_id VARCHAR(255) NOT NULL,
             state JSONB NOT NULL,
             reputation FLOAT DEFAULT 0.0,
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            PRIMARY KEY (run_id, env_id, agent_id)
         """)
+        self._backfill_latest_states()
         self.db.create_table('governance_rules', """
             id SERIAL PRIMARY KEY,
             rule_id VARCHAR(255) UNIQUE NOT NULL,
@@ -90,16 +451,6 @@ class AgentDataManager:
             created_by VARCHAR(255),
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         """)
-        self.db.create_table('transactions', """
-            id SERIAL PRIMARY KEY,
-            transaction_id VARCHAR(255) UNIQUE NOT NULL,
-            from_agent VARCHAR(255),
-            to_agent VARCHAR(255),
-            amount FLOAT,
-            transaction_type VARCHAR(100),
-            metadata JSONB,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        """)
         self.db.create_table('conflicts', """
             id SERIAL PRIMARY KEY,
             conflict_id VARCHAR(255) UNIQUE NOT NULL,
@@ -108,37 +459,330 @@ class AgentDataManager:
             resolution JSONB,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         """)
-        self.db.create_table('governance_log', """
-            id SERIAL PRIMARY KEY,
-            event_type VARCHAR(255),
-            agent_id VARCHAR(255),
-            details JSONB,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        self.db.create_table('episode_summaries', """
+            run_id VARCHAR(64) NOT NULL,
+            env_id VARCHAR(32) NOT NULL,
+            episode INTEGER NOT NULL,
+            steps INTEGER,
+            agents INTEGER,
+            mean_cash FLOAT,
+            mean_assets FLOAT,
+            mean_reputation FLOAT,
+            trades INTEGER DEFAULT 0,
+            trade_volume FLOAT DEFAULT 0.0,
+            proposals INTEGER DEFAULT 0,
+            votes INTEGER DEFAULT 0,
+            started_at TIMESTAMP,
+            ended_at TIMESTAMP,
+            PRIMARY KEY (run_id, env_id, episode)
+        """)
+
+    # ---------- Run partitions ----------
+    def _ensure_partitioned_table(self, table_name, schema):
+        relkind = self.db.execute_query("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table_name])
+        if relkind and relkind[0]['relkind'] == 'r':
+            self._migrate_to_partitioned(table_name, schema)
+        self.db.execute_query(
+            f"CREATE TABLE IF NOT EXISTS {table_name} ({schema}) PARTITION BY LIST (run_id)", fetch=False)
+        self.db.execute_query(
+            f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT", fetch=False)
+
+    def _ensure_state_columns(self):
+        """Add the typed state columns to agent_states created before delta encoding."""
+        if self.db.execute_query("SELECT 1 FROM information_schema.columns "
+                                 "WHERE table_name = 'agent_states' AND column_name = 'keyframe'"):
+            return
+        additions = ', '.join(f"ADD COLUMN IF NOT EXISTS {column}" for column in STATE_COLUMN_DDL)
+        self.db.execute_query(f"ALTER TABLE agent_states {additions}, ALTER COLUMN state DROP NOT NULL",
+                              fetch=False)
+
+    def _create_filled_state_view(self):
+        """
+        agent_states_filled: every agent_states row with all state fields forward-filled
+        from the agent's previous rows in the same episode. Rows are grouped into segments
+        that start at a keyframe, so each fill only looks back to the last keyframe.
+        Filter on run_id (and env_id/episode) so the window runs on one partition.
+        """
+        filled = ',\n'.join(
+            f"(array_agg({c}) FILTER (WHERE {c} IS NOT NULL) OVER segment)[count({c}) OVER segment] AS {c}"
+            for c in STATE_VALUE_COLUMNS)
+        self.db.execute_query(f"""
+            CREATE OR REPLACE VIEW agent_states_filled AS
+            SELECT id, run_id, env_id, episode, step, agent_id, keyframe, created_at,
+            {filled}
+            FROM (
+                SELECT *, count(*) FILTER (WHERE keyframe) OVER (
+                    PARTITION BY run_id, env_id, episode, agent_id ORDER BY step, id) AS segment_no
+                FROM agent_states
+            ) s
+            WINDOW segment AS (PARTITION BY run_id, env_id, episode, agent_id, segment_no ORDER BY step, id)
+        """, fetch=False)
+
+    def _migrate_to_partitioned(self, table_name, schema):
+        """
+        One-time upgrade of a table created before run partitioning: it becomes the
+        'legacy' run partition of a new partitioned parent (rows stay in place, nothing is
+        copied into new tables). Widening the old SERIAL id to BIGINT (the partition columns
+        must match the parent's) rewrites the table once under an ACCESS EXCLUSIVE lock,
+        so upgrade large databases while no simulation is logging.
+        """
+        legacy = partition_name(table_name, LEGACY_RUN_ID)
+        logger.warning(f"Partitioning {table_name} by run; existing rows become run '{LEGACY_RUN_ID}'")
+        with self.db.connection() as conn, conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+                [table_name])
+            indexes = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"ALTER TABLE {table_name} RENAME TO {legacy}")
+            for index in indexes:  # free the names for the parent's indexes
+                cursor.execute(f"ALTER INDEX {index} RENAME TO {f'{legacy}_{index}'[:63]}")
+            cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+                           [legacy])
+            primary_key = cursor.fetchone()
+            cursor.execute(f"CREATE TABLE {table_name} ({schema}) PARTITION BY LIST (run_id)")
+            # The parent's PRIMARY KEY (run_id, id) replaces the old PRIMARY KEY (id); a table
+            # with a different primary key cannot be attached. One ALTER = one table rewrite.
+            alterations = [
+                "ALTER COLUMN id TYPE BIGINT",
+                "ADD COLUMN run_id VARCHAR(64) NOT NULL DEFAULT %s",
+                "ADD COLUMN env_id VARCHAR(32)", "ADD COLUMN episode INTEGER", "ADD COLUMN step INTEGER",
+            ]
+            if primary_key:
+                alterations.append(f"DROP CONSTRAINT {primary_key[0]}")
+            alterations.append("ADD PRIMARY KEY (run_id, id)")
+            if table_name == 'agent_states':
+                alterations += [f"ADD COLUMN {column}" for column in STATE_COLUMN_DDL]
+                alterations.append("ALTER COLUMN state DROP NOT NULL")
+            cursor.execute(f"ALTER TABLE {legacy} {', '.join(alterations)}", [LEGACY_RUN_ID])
+            cursor.execute(f"ALTER TABLE {table_name} ATTACH PARTITION {legacy} FOR VALUES IN (%s)", [LEGACY_RUN_ID])
+            # New rows continue after the legacy ids, so ids stay increasing across the upgrade
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), (SELECT COALESCE(MAX(id), 0) + 1 FROM {legacy}), false)",
+                [table_name])
+            cursor.execute("INSERT INTO simulation_runs (run_id) VALUES (%s) ON CONFLICT DO NOTHING", [LEGACY_RUN_ID])
+
+    def _ensure_runs(self, run_ids):
+        """Create the simulation_runs row and table partitions of runs not seen by this process yet."""
+        for run_id in set(run_ids) - self._known_runs:
+            self.db.insert_many('simulation_runs', ('run_id',), [(run_id,)], on_conflict="(run_id) DO NOTHING")
+            for table_name in PARTITIONED_TABLES:
+                try:
+                    self.db.execute_query(
+                        f"CREATE TABLE IF NOT EXISTS {partition_name(table_name, run_id)} "
+                        f"PARTITION OF {table_name} FOR VALUES IN (%s)", [run_id], fetch=False)
+                except (psycopg2.errors.DuplicateTable, psycopg2.errors.UniqueViolation):
+                    pass  # another worker created it concurrently
+            self._known_runs.add(run_id)
+
+    @staticmethod
+    def _log_keys(row):
+        return (row.get('run_id') or UNASSIGNED_RUN_ID, row.get('env_id'), row.get('episode'), row.get('step'))
+
+    def save_simulation_runs(self, rows):
+        """Register runs (dicts with run_id, agent_count, details); repeated rows update the details."""
+        runs = {row['run_id']: (row['run_id'], row.get('agent_count'), Json(row.get('details'))) for row in rows}
+        self._ensure_runs(runs)
+        return self.db.upsert_many('simulation_runs', ('run_id', 'agent_count', 'details'),
+                                   list(runs.values()), key_columns=('run_id',))
+
+    # ---------- Retention ----------
+    def list_runs(self):
+        """Every run with its status, start time and last logged agent state (last_activity)."""
+        return self.db.execute_query("""
+            SELECT r.run_id, r.status, r.agent_count, r.started_at, r.retained_at,
+                   COALESCE((SELECT MAX(a.created_at) FROM agent_states a WHERE a.run_id = r.run_id),
+                            r.started_at) AS last_activity
+            FROM simulation_runs r ORDER BY r.started_at
         """)
 
+    def _drop_partitions(self, cursor, run_id):
+        for table_name in PARTITIONED_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {partition_name(table_name, run_id)}")
+        self._known_runs.discard(run_id)
+
+    def downsample_run(self, run_id):
+        """Aggregate a run into per-episode rows of episode_summaries, then drop its raw rows."""
+        with self.db.connection() as conn, conn.cursor() as cursor:
+            # mean_* are means over agents of each agent's final (forward-filled) state
+            cursor.execute("""
+                INSERT INTO episode_summaries (run_id, env_id, episode, steps, agents, mean_cash,
+                                               mean_assets, mean_reputation, started_at, ended_at)
+                SELECT f.run_id, COALESCE(f.env_id, ''), COALESCE(f.episode, -1), MAX(f.step), COUNT(*),
+                       AVG(f.cash), AVG(f.assets), AVG(f.reputation), MIN(b.started_at), MAX(b.ended_at)
+                FROM (
+                    SELECT DISTINCT ON (env_id, episode, agent_id) *
+                    FROM agent_states_filled WHERE run_id = %s
+                    ORDER BY env_id, episode, agent_id, step DESC, id DESC
+                ) f
+                JOIN (
+                    SELECT env_id, episode, MIN(created_at) AS started_at, MAX(created_at) AS ended_at
+                    FROM agent_states WHERE run_id = %s GROUP BY 1, 2
+                ) b ON b.env_id IS NOT DISTINCT FROM f.env_id AND b.episode IS NOT DISTINCT FROM f.episode
+                GROUP BY 1, 2, 3
+                ON CONFLICT (run_id, env_id, episode) DO NOTHING
+            """, [run_id, run_id])
+            cursor.execute("""
+                INSERT INTO episode_summaries (run_id, env_id, episode, trades, trade_volume)
+                SELECT run_id, COALESCE(env_id, ''), COALESCE(episode, -1), COUNT(*), SUM(amount)
+                FROM transactions WHERE run_id = %s GROUP BY 1, 2, 3
+                ON CONFLICT (run_id, env_id, episode)
+                DO UPDATE SET trades = EXCLUDED.trades, trade_volume = EXCLUDED.trade_volume
+            """, [run_id])
+            cursor.execute("""
+                INSERT INTO episode_summaries (run_id, env_id, episode, proposals, votes)
+                SELECT run_id, COALESCE(env_id, ''), COALESCE(episode, -1),
+                       COUNT(*) FILTER (WHERE event_type = 'proposal'),
+                       COUNT(*) FILTER (WHERE event_type LIKE 'vote%%')
+                FROM governance_log WHERE run_id = %s GROUP BY 1, 2, 3
+                ON CONFLICT (run_id, env_id, episode)
+                DO UPDATE SET proposals = EXCLUDED.proposals, votes = EXCLUDED.votes
+            """, [run_id])
+            cursor.execute("SELECT COUNT(*) FROM episode_summaries WHERE run_id = %s", [run_id])
+            episodes = cursor.fetchone()[0]
+            cursor.execute("UPDATE simulation_runs SET status = 'downsampled', retained_at = CURRENT_TIMESTAMP "
+                           "WHERE run_id = %s", [run_id])
+            self._drop_partitions(cursor, run_id)
+        return episodes
+
+    def drop_run(self, run_id):
+        """Delete a run entirely: raw rows, episode summaries and its simulation_runs row."""
+        with self.db.connection() as conn, conn.cursor() as cursor:
+            self._drop_partitions(cursor, run_id)
+            cursor.execute("DELETE FROM episode_summaries WHERE run_id = %s", [run_id])
+            cursor.execute("DELETE FROM simulation_runs WHERE run_id = %s", [run_id])
+
+    def _backfill_latest_states(self):
+        """
+        Seed an empty agent_latest_state from existing history (databases created before it
+        existed or keyed it by agent_id alone): each agent's last forward-filled state per env
+        of a run, on top of the JSONB state of rows from older versions.
+        """
+        if self.db.execute_query("SELECT 1 FROM agent_latest_state LIMIT 1"):
+            return
+        fields = ', '.join(f"'{c}', f.{c}" for c in STATE_VALUE_COLUMNS)
+        self.db.execute_query(f"""
+            INSERT INTO agent_latest_state (run_id, env_id, agent_id, state, reputation, last_updated)
+            SELECT DISTINCT ON (f.run_id, f.env_id, f.agent_id) f.run_id, COALESCE(f.env_id, ''), f.agent_id,
+                   COALESCE(a.state, '{{}}'::jsonb) || jsonb_strip_nulls(jsonb_build_object({fields})),
+                   f.reputation, f.created_at
+            FROM agent_states_filled f JOIN agent_states a ON a.run_id = f.run_id AND a.id = f.id
+            ORDER BY f.run_id, f.env_id, f.agent_id, f.created_at DESC, f.id DESC
+            ON CONFLICT DO NOTHING
+        """, fetch=False)
+
     def save_agent_state(self, agent_id, state_data):
-        return self.db.insert_data('agent_states', {
-            'agent_id': agent_id,
-            'state': json.dumps(state_data),
-            'reputation': state_data.get('reputation', 0.0)
-        })
+        return self.save_agent_states([{'agent_id': agent_id, **state_data}])
+
+    def save_agent_states(self, rows):
+        """
+        Bulk insert agent state rows (agent_id, log keys, keyframe and the state fields;
+        missing fields are stored as NULL = unchanged) into the history, and update each
+        agent's row of agent_latest_state for its run and env, writing through to the cache.
+        A keyframe replaces the current state; a delta is merged into it.
+        """
+        values, keyframes, deltas = [], {}, {}
+        for row in rows:
+            keys = self._log_keys(row)
+            fields = {c: row[c] for c in STATE_VALUE_COLUMNS if row.get(c) is not None}
+            values.append(keys + (row['agent_id'], row.get('keyframe', True))
+                          + tuple(fields.get(c) for c in STATE_VALUE_COLUMNS))
+            key = (keys[0], keys[1] or '', row['agent_id'])
+            if row.get('keyframe', True):
+                deltas.pop(key, None)
+                keyframes[key] = dict(fields)
+            elif key in keyframes:
+                keyframes[key].update(fields)
+            else:
+                deltas.setdefault(key, {}).update(fields)
+        self._ensure_runs({value[0] for value in values})
+
+        def upsert(states, updates=None):
+            return self.db.upsert_many(
+                'agent_latest_state', self.LATEST_STATE_KEY + ('state', 'reputation', 'last_updated'),
+                [key + (Json(fields), fields.get('reputation')) for key, fields in states.items()],
+                key_columns=self.LATEST_STATE_KEY, template="(%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)",
+                returning=self.LATEST_STATE_COLUMNS, updates=updates,
+            )
+
+        try:
+            written = self.db.insert_many(
+                'agent_states', LOG_KEY_COLUMNS + ('agent_id', 'keyframe') + STATE_VALUE_COLUMNS, values)
+            current = upsert(keyframes) + upsert(deltas, updates={
+                'state': "agent_latest_state.state || EXCLUDED.state",
+                'reputation': "COALESCE(EXCLUDED.reputation, agent_latest_state.reputation)",
+            })
+        except Exception:
+            self.state_cache.invalidate(list(keyframes) + list(deltas))
+            raise
+        for row in current:
+            self.state_cache.put((row['run_id'], row['env_id'], row['agent_id']), row)
+        return written
+
+    def get_agent_states_at(self, run_id, env_id, episode, step):
+        """Full state of every agent of one episode at `step`, rebuilt from keyframes and deltas."""
+        return self.db.execute_query(f"""
+            SELECT DISTINCT ON (agent_id) agent_id, step AS logged_step, {', '.join(STATE_VALUE_COLUMNS)}
+            FROM agent_states_filled
+            WHERE run_id = %s AND env_id = %s AND episode = %s AND step <= %s
+            ORDER BY agent_id, step DESC, id DESC
+        """, [run_id, env_id, episode, step])
+
+    def get_agent_state(self, agent_id, run_id=UNASSIGNED_RUN_ID, env_id=''):
+        """Current state row (run_id, env_id, agent_id, state, reputation, last_updated) of one agent, or None."""
+        return self.get_agent_states([agent_id], run_id, env_id).get(agent_id)
 
-    def get_agent_state(self, agent_id):
-        result = self.db.select_data('agent_states',
-            condition="agent_id = %s ORDER BY created_at DESC LIMIT 1",
-            params=[agent_id])
-        return result[0] if result else None
+    def get_agent_states(self, agent_ids, run_id=UNASSIGNED_RUN_ID, env_id=''):
+        """
+        Current state rows of many agents of one env of a run as {agent_id: row}; the
+        defaults match rows saved without log keys. Cache misses are fetched in one query.
+        """
+        found, missing = {}, []
+        for agent_id in dict.fromkeys(agent_ids):
+            row = self.state_cache.get((run_id, env_id, agent_id))
+            if row is None:
+                missing.append(agent_id)
+            else:
+                found[agent_id] = row
+        if missing:
+            rows = self.db.select_data('agent_latest_state', columns=self.LATEST_STATE_COLUMNS,
+                                       condition="run_id = %s AND env_id = %s AND agent_id = ANY(%s)",
+                                       params=[run_id, env_id, missing], prepare=True)
+            for row in rows:
+                self.state_cache.put((run_id, env_id, row['agent_id']), row)
+                found[row['agent_id']] = row
+        return found
 
     def save_governance_event(self, event_type: str, agent_id: str, details: dict):
-        data = {
-            'event_type': event_type,
-            'agent_id': agent_id,
-            'details': json.dumps(details)
-        }
-        return self.db.insert_data('governance_log', data)
+        return self.save_governance_events([{'event_type': event_type, 'agent_id': agent_id, 'details': details}])
+
+    def save_governance_events(self, rows):
+        """Bulk insert governance events (dicts with event_type, agent_id, details)."""
+        values = [self._log_keys(row) + (row.get('event_type'), row.get('agent_id'), Json(row.get('details')))
+                  for row in rows]
+        self._ensure_runs({value[0] for value in values})
+        return self.db.insert_many('governance_log', LOG_KEY_COLUMNS + ('event_type', 'agent_id', 'details'), values)
+
+    @classmethod
+    def _transaction_values(cls, transaction_data):
+        """Map a logged trade (agent_id, action_type, price, quantity) onto the transactions schema."""
+        price = transaction_data.get('price', 0.0)
+        quantity = transaction_data.get('quantity', 1)
+        return cls._log_keys(transaction_data) + (
+            str(uuid.uuid4()),
+            transaction_data.get('agent_id'),
+            price * quantity,
+            transaction_data.get('action_type'),
+            Json({'price': price, 'quantity': quantity}),
+        )
 
     def save_transaction(self, transaction_data):
-        return self.db.insert_data('transactions', transaction_data)
+        return self.save_transactions([transaction_data])
+
+    def save_transactions(self, rows):
+        """Bulk insert trades (dicts with agent_id, action_type, price, quantity)."""
+        values = [self._transaction_values(row) for row in rows]
+        self._ensure_runs({value[0] for value in values})
+        return self.db.insert_many('transactions', self.TRANSACTION_COLUMNS, values)
 
     def save_conflict(self, conflict_id, participants, status='active'):
         return self.db.insert_data('conflicts', {
@@ -147,5 +791,23 @@ class AgentDataManager:
             'status': status
         })
 
-# Global instance
-agent_data_manager = AgentDataManager()
+# ---------- Global instance (created on first use) ----------
+_agent_data_manager = None
+_agent_data_manager_lock = threading.Lock()
+
+
+def get_agent_data_manager():
+    """Return the process-wide AgentDataManager, connecting and creating tables on first call."""
+    global _agent_data_manager
+    if _agent_data_manager is None:
+        with _agent_data_manager_lock:
+            if _agent_data_manager is None:
+                _agent_data_manager = AgentDataManager()
+    return _agent_data_manager
+
+
+def __getattr__(name):
+    # Keeps `from database.local_db import agent_data_manager` working without an import-time connection
+    if name == 'agent_data_manager':
+        return get_agent_data_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
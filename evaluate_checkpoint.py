@@ -0,0 +1,88 @@
+# evaluate_checkpoint.py
+"""
+Evaluate a trained checkpoint on CPU without rebuilding the RLlib algorithm.
+
+The policies are loaded once into a PolicyServer (backend/inference.py); `--envs`
+threads each step their own env and send every agent's observation to the server,
+which batches the requests of all envs into one forward pass per policy (waiting
+at most --max-latency-ms to fill a batch). LSTM state is kept per episode.
+
+Usage:
+    python evaluate_checkpoint.py ~/ray_results/DecentralizedEconomy_Meta_POC --episodes 64 --envs 16
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from backend.env.environment import DecentralizedEconomyEnv
+from backend.inference import PolicyServer
+from backend.training_config import prepare_env_config
+
+
+def run_episodes(server, env_config, seeds, worker):
+    """Play `seeds` in one env; returns (seed, mean_return, final_price) per episode."""
+    env = DecentralizedEconomyEnv(env_config)
+    results = []
+    for seed in seeds:
+        episode_id = f"{worker}-{seed}"
+        obs, _ = env.reset(seed=seed)
+        returns = dict.fromkeys(env.agents, 0.0)
+        done = False
+        while not done:
+            actions = server.compute_actions(episode_id, obs)
+            obs, rewards, terminations, _, _ = env.step({agent: int(action) for agent, action in actions.items()})
+            for agent, reward in rewards.items():
+                returns[agent] += reward
+            done = terminations["__all__"]
+        server.end_episode(episode_id)
+        results.append((seed, float(np.mean(list(returns.values()))), env.market_price))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checkpoint", help="Experiment, trial or checkpoint dir (latest checkpoint is used)")
+    parser.add_argument("--episodes", type=int, default=32, help="Episodes to evaluate")
+    parser.add_argument("--envs", type=int, default=8, help="Concurrent envs sharing the policy server")
+    parser.add_argument("--agents", type=int, default=int(os.getenv("NUM_AGENTS", 8)),
+                        help="Agents per env (must match training)")
+    parser.add_argument("--steps", type=int, default=120, help="Steps per episode")
+    parser.add_argument("--seed-start", type=int, default=0, help="First seed")
+    parser.add_argument("--max-batch-size", type=int, default=256, help="Requests per forward pass")
+    parser.add_argument("--max-latency-ms", type=float, default=5.0, help="Longest wait to fill a batch")
+    parser.add_argument("--threads", type=int, default=None, help="Torch intra-op threads")
+    parser.add_argument("--explore", action="store_true", help="Sample actions instead of acting greedily")
+    args = parser.parse_args(argv)
+
+    server = PolicyServer.from_checkpoint(
+        args.checkpoint, num_threads=args.threads, max_batch_size=args.max_batch_size,
+        max_latency_ms=args.max_latency_ms, explore=args.explore,
+    )
+    print(f"🧠 Loaded {len(server.policies)} {server.policy_mode} policies from {server.checkpoint}")
+    env_config = prepare_env_config(
+        {"num_agents": args.agents, "max_steps": args.steps, "db_sink": "null"}, server.policy_mode,
+    )
+
+    seeds = list(range(args.seed_start, args.seed_start + args.episodes))
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.envs) as pool:
+            futures = [pool.submit(run_episodes, server, env_config, seeds[i::args.envs], i)
+                       for i in range(min(args.envs, len(seeds)))]
+            results = sorted(row for future in futures for row in future.result())
+    finally:
+        stats = server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    returns = np.array([row[1] for row in results])
+    print(f"\n✅ {len(results)} episodes in {elapsed:.1f}s ({len(results) / elapsed:.1f} episodes/s)")
+    print(f"Mean return per agent: {returns.mean():.2f} ± {returns.std():.2f}, "
+          f"final price {np.mean([row[2] for row in results]):.1f}")
+    print(f"Inference: {stats['batches']} batches, {stats['mean_batch_size']:.1f} requests/batch on average")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,23 @@
 const API_BASE_URL = 'http://localhost:3001/api';
 
+export interface LiveMetrics {
+  run_id: string;
+  env_id: string;
+  episode: number;
+  step: number;
+  time: number;
+  market_price: number;
+  tax_rate: number;
+  steps: number; // env steps covered by this message
+  trades: number;
+  volume: number;
+  proposals: number;
+  votes_yes: number;
+  votes_no: number;
+  passed: number;
+  failed: number;
+}
+
 export const api = {
   // Conflicts (Transactions)
   getConflicts: async () => {
@@ -47,6 +65,19 @@ export const api = {
     return response.json();
   },
 
+  // Live metrics (server-sent events pushed by training envs; no table polling)
+  // EventSource reconnects by itself; onStatus reports connection changes
+  subscribeMetrics: (
+    onMetrics: (metrics: LiveMetrics) => void,
+    onStatus?: (connected: boolean) => void,
+  ) => {
+    const source = new EventSource(`${API_BASE_URL}/stream/metrics`);
+    source.onmessage = (event) => onMetrics(JSON.parse(event.data));
+    source.onopen = () => onStatus?.(true);
+    source.onerror = () => onStatus?.(false);
+    return () => source.close();
+  },
+
   // Simulation
   startSimulation: async (params: any) => {
     const response = await fetch(`${API_BASE_URL}/simulation/start`, {
@@ -90,8 +90,9 @@ app.get('/api/columns/:table', async (req, res) => {
 // ========== CONFLICT PANEL ENDPOINTS ==========
 app.get('/api/conflicts', async (req, res) => {
   try {
+    // Newest first by time (indexed); ids are only ordered within one run partition
     const result = await pool.query(
-      'SELECT * FROM transactions ORDER BY id DESC LIMIT 100'
+      'SELECT * FROM transactions ORDER BY timestamp DESC, id DESC LIMIT 100'
     );
     console.log(`✅ Fetched ${result.rows.length} conflicts`);
     res.json(result.rows);
@@ -108,7 +109,7 @@ app.get('/api/conflicts', async (req, res) => {
 app.get('/api/metrics', async (req, res) => {
   try {
     const result = await pool.query(
-      'SELECT * FROM agent_states ORDER BY id DESC LIMIT 1'
+      'SELECT * FROM agent_states ORDER BY created_at DESC, id DESC LIMIT 1'
     );
     console.log(`✅ Fetched metrics: ${result.rows.length > 0 ? 'found' : 'empty'}`);
     res.json(result.rows[0] || {
@@ -163,7 +164,7 @@ app.get('/api/rules', async (req, res) => {
     `);
     
     if (columnCheck.rows.length > 0) {
-      query += `${columnCheck.rows[0].column_name} ASC LIMIT 100`;
+      query += `${columnCheck.rows[0].column_name} ASC, id ASC LIMIT 100`;
     } else {
       query += 'id ASC LIMIT 100';
     }
@@ -181,6 +182,77 @@ app.get('/api/rules', async (req, res) => {
   }
 });
 
+// ========== LIVE METRICS STREAM (SSE) ==========
+// Training envs publish downsampled per-step aggregates with pg_notify (backend/live_metrics.py).
+// One LISTEN connection fans them out to every browser, so live views cost no table reads.
+const LIVE_CHANNEL = process.env.LIVE_METRICS_CHANNEL || 'economy_metrics';
+const liveClients = new Set();
+// "run_id/env_id" -> { payload, receivedAt }: the last payload of each recently active env,
+// replayed to new subscribers. Streams silent for LIVE_METRICS_TTL_MS are evicted, so
+// finished runs neither grow the map nor get replayed.
+const LIVE_TTL_MS = parseInt(process.env.LIVE_METRICS_TTL_MS || '60000', 10);
+const latestByStream = new Map();
+setInterval(() => {
+  const cutoff = Date.now() - LIVE_TTL_MS;
+  for (const [stream, entry] of latestByStream) {
+    if (entry.receivedAt < cutoff) latestByStream.delete(stream);
+  }
+}, Math.min(LIVE_TTL_MS, 60000)).unref();
+let liveListener = null;
+
+async function startLiveListener() {
+  try {
+    liveListener = await pool.connect();
+    liveListener.on('notification', (msg) => {
+      let payload;
+      try {
+        payload = JSON.parse(msg.payload);
+      } catch (err) {
+        return;
+      }
+      latestByStream.set(`${payload.run_id}/${payload.env_id}`, { payload, receivedAt: Date.now() });
+      for (const client of liveClients) {
+        client.write(`data: ${msg.payload}\n\n`);
+      }
+    });
+    liveListener.on('error', (err) => {
+      console.error('❌ Live metrics listener error:', err.message);
+      liveListener.release(true);
+      liveListener = null;
+      setTimeout(startLiveListener, 5000);
+    });
+    await liveListener.query(`LISTEN ${LIVE_CHANNEL}`);
+    console.log(`📡 Listening for live metrics on channel "${LIVE_CHANNEL}"`);
+  } catch (err) {
+    console.error('❌ Could not start live metrics listener:', err.message);
+    if (liveListener) {
+      liveListener.release(true);
+      liveListener = null;
+    }
+    setTimeout(startLiveListener, 5000);
+  }
+}
+startLiveListener();
+
+app.get('/api/stream/metrics', (req, res) => {
+  res.set({
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    Connection: 'keep-alive',
+  });
+  res.flushHeaders();
+  const cutoff = Date.now() - LIVE_TTL_MS;
+  for (const { payload, receivedAt } of latestByStream.values()) {
+    if (receivedAt >= cutoff) res.write(`data: ${JSON.stringify(payload)}\n\n`);
+  }
+  liveClients.add(res);
+  const heartbeat = setInterval(() => res.write(': keep-alive\n\n'), 15000);
+  req.on('close', () => {
+    clearInterval(heartbeat);
+    liveClients.delete(res);
+  });
+});
+
 // ========== VOTING INTERFACE ENDPOINTS ==========
 app.get('/api/proposals', async (req, res) => {
   try {
@@ -197,7 +269,7 @@ app.get('/api/proposals', async (req, res) => {
     `);
     
     if (columnCheck.rows.length > 0) {
-      query += `${columnCheck.rows[0].column_name} DESC LIMIT 100`;
+      query += `${columnCheck.rows[0].column_name} DESC, id DESC LIMIT 100`;
     } else {
       query += 'id DESC LIMIT 100';
     }
@@ -272,10 +344,17 @@ app.listen(PORT, () => {
   console.log(`📍 Test the connection: http://localhost:${PORT}/api/health`);
   console.log(`📋 Check tables: http://localhost:${PORT}/api/check-tables`);
   console.log(`📋 Check governance_log columns: http://localhost:${PORT}/api/columns/governance_log`);
+  console.log(`📡 Live metrics stream: http://localhost:${PORT}/api/stream/metrics`);
 });
 
 process.on('SIGTERM', () => {
   console.log('SIGTERM signal received: closing HTTP server');
+  for (const client of liveClients) {
+    client.end();
+  }
+  if (liveListener) {
+    liveListener.release();
+  }
   pool.end(() => {
     console.log('Database pool closed');
   });
@@ -1,7 +1,7 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { api } from '../api/apiClient';
-import { TrendingUp, TrendingDown, Activity, Users, Vote, Award } from 'lucide-react';
-import type { GovernanceMetrics } from '../types/governance';
+import type { LiveMetrics } from '../api/apiClient';
+import { TrendingUp, TrendingDown, Activity, Vote, CheckCircle, XCircle, Percent, Repeat } from 'lucide-react';
 
 const MetricCard = ({
   title,
@@ -44,97 +44,70 @@ const MetricCard = ({
   </div>
 );
 
-// Generate random placeholder values
-const generatePlaceholderMetrics = (): GovernanceMetrics => ({
-  total_token_supply: Math.floor(Math.random() * 5000000) + 1000000,
-  transaction_volume: Math.floor(Math.random() * 100000) + 10000,
-  inflation_rate: Math.random() * 5 + 1,
-  active_proposals: Math.floor(Math.random() * 20) + 5,
-  total_agents: Math.floor(Math.random() * 200) + 50,
-  active_agents: Math.floor(Math.random() * 150) + 30,
-  average_reputation: Math.random() * 40 + 60,
-  governance_participation: Math.random() * 30 + 50,
-});
+// Live view of the newest training run, built from the SSE stream (/api/stream/metrics).
+// Each message covers the steps of one env since its previous message, so counts are
+// summed; price and tax rate are the mean of every env's latest value.
+interface LiveSummary {
+  run_id: string;
+  envs: number;
+  market_price: number;
+  tax_rate: number;
+  trades: number;
+  volume: number;
+  proposals: number;
+  votes_yes: number;
+  votes_no: number;
+  passed: number;
+  failed: number;
+}
 
-// Generate random trend
-const generateTrend = () => (Math.random() - 0.5) * 20;
+const COUNTERS = ['trades', 'volume', 'proposals', 'votes_yes', 'votes_no', 'passed', 'failed'] as const;
 
-export default function MetricsPanel() {
-  const [metrics, setMetrics] = useState<GovernanceMetrics | null>(null);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState<string | null>(null);
-  const [trends, setTrends] = useState({
-    tokenSupply: generateTrend(),
-    volume: generateTrend(),
-    inflation: generateTrend(),
-    agents: generateTrend(),
-    reputation: generateTrend(),
-    participation: generateTrend(),
-  });
-
-  // Fetch latest metrics
-  const fetchMetrics = async () => {
-    try {
-      setLoading(true);
-      const data = await api.getMetrics();
-
-      // Check if data is empty or all zeros
-      const hasValidData = data && (
-        data.total_token_supply > 0 ||
-        data.transaction_volume > 0 ||
-        data.active_proposals > 0 ||
-        data.total_agents > 0
-      );
+const emptyTotals = () =>
+  Object.fromEntries(COUNTERS.map((name) => [name, 0])) as Record<(typeof COUNTERS)[number], number>;
 
-      if (hasValidData) {
-        setMetrics({
-          total_token_supply: data?.total_token_supply ?? 0,
-          transaction_volume: data?.transaction_volume ?? 0,
-          inflation_rate: data?.inflation_rate ?? 0,
-          active_proposals: data?.active_proposals ?? 0,
-          total_agents: data?.total_agents ?? 0,
-          active_agents: data?.active_agents ?? 0,
-          average_reputation: data?.average_reputation ?? 0,
-          governance_participation: data?.governance_participation ?? 0,
-        });
-      } else {
-        // Use placeholder data if no valid data
-        setMetrics(generatePlaceholderMetrics());
-      }
-      
-      setError(null);
-    } catch (err: any) {
-      console.error('API fetch error:', err);
-      setError(err.message || 'Unable to fetch governance metrics');
-      // Use placeholder data on error
-      setMetrics(generatePlaceholderMetrics());
-    } finally {
-      setLoading(false);
-    }
-  };
+const percentChange = (current: number, previous?: number) =>
+  previous ? ((current - previous) / previous) * 100 : undefined;
 
-  useEffect(() => {
-    fetchMetrics();
-    
-    // Poll for updates every 5 seconds
-    const interval = setInterval(fetchMetrics, 5000);
-    return () => clearInterval(interval);
-  }, []);
+export default function MetricsPanel() {
+  const [summary, setSummary] = useState<LiveSummary | null>(null);
+  const [previous, setPrevious] = useState<LiveSummary | null>(null);
+  const [connected, setConnected] = useState(false);
+  const runId = useRef<string | null>(null);
+  const runTime = useRef(0);
+  const latestByEnv = useRef(new Map<string, LiveMetrics>());
+  const totals = useRef(emptyTotals());
+  const latest = useRef<LiveSummary | null>(null);
 
-  // Update trends periodically
+  // Subscribe once; the server pushes new aggregates, so nothing is polled
   useEffect(() => {
-    const trendInterval = setInterval(() => {
-      setTrends({
-        tokenSupply: generateTrend(),
-        volume: generateTrend(),
-        inflation: generateTrend(),
-        agents: generateTrend(),
-        reputation: generateTrend(),
-        participation: generateTrend(),
-      });
-    }, 3000);
+    const onMetrics = (metrics: LiveMetrics) => {
+      if (metrics.run_id !== runId.current) {
+        if (metrics.time < runTime.current) return; // message of an older run
+        runId.current = metrics.run_id;
+        latestByEnv.current.clear();
+        totals.current = emptyTotals();
+      }
+      runTime.current = Math.max(runTime.current, metrics.time);
+      latestByEnv.current.set(metrics.env_id, metrics);
+      for (const name of COUNTERS) totals.current[name] += metrics[name] ?? 0;
 
-    return () => clearInterval(trendInterval);
+      const envs = [...latestByEnv.current.values()];
+      const mean = (key: 'market_price' | 'tax_rate') =>
+        envs.reduce((sum, env) => sum + env[key], 0) / envs.length;
+      const next: LiveSummary = {
+        run_id: metrics.run_id,
+        envs: envs.length,
+        market_price: mean('market_price'),
+        tax_rate: mean('tax_rate'),
+        ...totals.current,
+      };
+      setPrevious(latest.current);
+      latest.current = next;
+      setSummary(next);
+    };
+    const unsubscribe = api.subscribeMetrics(onMetrics, setConnected);
+    return unsubscribe;
   }, []);
 
   const formatNumber = (num?: number) => {
@@ -144,81 +117,83 @@ export default function MetricsPanel() {
     return num.toFixed(0);
   };
 
-  if (loading) return <div className="text-center p-8">Loading Governance Metrics...</div>;
-  if (!metrics) return <div className="text-center p-8">No metrics data found.</div>;
+  if (!summary) {
+    return (
+      <div className="text-center p-8">
+        {connected ? 'Waiting for live metrics from a training run...' : 'Connecting to live metrics...'}
+      </div>
+    );
+  }
+
+  const votes = summary.votes_yes + summary.votes_no;
 
   return (
     <div className="space-y-4">
       <div className="flex items-center justify-between">
         <h2 className="text-2xl font-bold text-slate-900">Governance Metrics</h2>
         <div className="flex items-center gap-2 text-sm text-slate-500">
-          <div className="w-2 h-2 rounded-full bg-green-500 animate-pulse"></div>
-          {error ? 'Demo Mode' : 'Live'}
+          <div className={`w-2 h-2 rounded-full ${connected ? 'bg-green-500 animate-pulse' : 'bg-slate-400'}`}></div>
+          {connected ? 'Live' : 'Reconnecting'} · run {summary.run_id} · {summary.envs} envs
         </div>
       </div>
 
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
         <MetricCard
-          title="Total Token Supply"
-          value={formatNumber(metrics.total_token_supply)}
+          title="Market Price"
+          value={summary.market_price.toFixed(2)}
           icon={Activity}
           color="bg-blue-500"
-          trend={trends.tokenSupply}
+          trend={percentChange(summary.market_price, previous?.market_price)}
         />
         <MetricCard
-          title="Transaction Volume"
-          value={formatNumber(metrics.transaction_volume)}
-          unit="24h"
-          icon={TrendingUp}
-          color="bg-emerald-500"
-          trend={trends.volume}
-        />
-        <MetricCard
-          title="Inflation Rate"
-          value={metrics.inflation_rate.toFixed(2)}
+          title="Tax Rate"
+          value={(summary.tax_rate * 100).toFixed(2)}
           unit="%"
-          icon={Activity}
+          icon={Percent}
           color="bg-orange-500"
-          trend={trends.inflation}
+          trend={percentChange(summary.tax_rate, previous?.tax_rate)}
         />
         <MetricCard
-          title="Active Proposals"
-          value={metrics.active_proposals}
-          icon={Vote}
-          color="bg-violet-500"
+          title="Trades"
+          value={formatNumber(summary.trades)}
+          icon={Repeat}
+          color="bg-emerald-500"
+        />
+        <MetricCard
+          title="Trade Volume"
+          value={formatNumber(summary.volume)}
+          icon={TrendingUp}
+          color="bg-cyan-500"
         />
       </div>
 
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
         <MetricCard
-          title="Total Agents"
-          value={metrics.total_agents}
-          icon={Users}
-          color="bg-cyan-500"
+          title="Proposals"
+          value={formatNumber(summary.proposals)}
+          icon={Vote}
+          color="bg-violet-500"
         />
         <MetricCard
-          title="Active Agents"
-          value={metrics.active_agents}
-          icon={Users}
-          color="bg-teal-500"
-          trend={trends.agents}
+          title="Yes Votes"
+          value={votes ? ((summary.votes_yes / votes) * 100).toFixed(1) : '0.0'}
+          unit="%"
+          icon={Vote}
+          color="bg-rose-500"
         />
         <MetricCard
-          title="Avg Reputation"
-          value={metrics.average_reputation.toFixed(1)}
-          icon={Award}
-          color="bg-amber-500"
-          trend={trends.reputation}
+          title="Passed"
+          value={formatNumber(summary.passed)}
+          icon={CheckCircle}
+          color="bg-teal-500"
         />
         <MetricCard
-          title="Participation Rate"
-          value={metrics.governance_participation.toFixed(1)}
-          unit="%"
-          icon={Vote}
-          color="bg-rose-500"
-          trend={trends.participation}
+          title="Failed"
+          value={formatNumber(summary.failed)}
+          icon={XCircle}
+          color="bg-amber-500"
         />
       </div>
     </div>
   );
-}
\ No newline at end of file
+}
@@ -0,0 +1,75 @@
+# retention.py
+"""
+Retention job for the PostgreSQL simulation logs.
+
+Runs are aged by their last logged agent state:
+- older than --downsample-after days: raw agent_states/transactions/governance_log rows
+  are replaced by per-episode aggregates in episode_summaries
+- older than --drop-after days: the run is deleted, summaries included
+
+Each run lives in its own table partitions, so both actions drop partitions instead
+of deleting rows; live runs are never touched. Schedule it (cron, systemd timer)
+next to long training jobs.
+
+Usage:
+    python retention.py --dry-run
+    python retention.py --downsample-after 7 --drop-after 90 --keep run-20250101-120000
+"""
+import sys
+import argparse
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+
+DOWNSAMPLE = "downsample"
+DROP = "drop"
+
+
+def plan_retention(runs, now, downsample_after_days, drop_after_days=None, keep=()):
+    """
+    [(run_id, action)] for runs (dicts from AgentDataManager.list_runs) that are due.
+    Runs in `keep` are skipped; drop_after_days=None never drops.
+    """
+    plan = []
+    for run in runs:
+        if run["run_id"] in keep:
+            continue
+        age = now - run["last_activity"]
+        if drop_after_days is not None and age > timedelta(days=drop_after_days):
+            plan.append((run["run_id"], DROP))
+        elif run["status"] == "active" and age > timedelta(days=downsample_after_days):
+            plan.append((run["run_id"], DOWNSAMPLE))
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--downsample-after", type=float, default=7.0, help="Days before a run is downsampled")
+    parser.add_argument("--drop-after", type=float, default=None, help="Days before a run is deleted (default: never)")
+    parser.add_argument("--keep", action="append", default=[], help="Run id to leave untouched (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would be done")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    from database.local_db import get_agent_data_manager
+    manager = get_agent_data_manager()
+    # created_at timestamps are written by the server, so compare against the server clock
+    now = manager.db.execute_query("SELECT LOCALTIMESTAMP AS now")[0]["now"] or datetime.now()
+    plan = plan_retention(manager.list_runs(), now, args.downsample_after, args.drop_after, set(args.keep))
+    if not plan:
+        print("✅ No runs due for retention.")
+        return 0
+
+    for run_id, action in plan:
+        if args.dry_run:
+            print(f"[dry-run] {action} {run_id}")
+        elif action == DOWNSAMPLE:
+            episodes = manager.downsample_run(run_id)
+            print(f"📉 Downsampled {run_id} to {episodes} episode summaries")
+        else:
+            manager.drop_run(run_id)
+            print(f"🗑️ Dropped {run_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+from autotune import rollout_candidates, learner_candidates, pick_best, write_tuned_config
+from backend.training_config import apply_tuned_config
+
+
+def test_rollout_candidates_leave_a_cpu_for_the_learner():
+    assert {c["num_workers"] for c in rollout_candidates(1)} == {0}
+    workers = {c["num_workers"] for c in rollout_candidates(8)}
+    assert max(workers) == 7 and 0 in workers
+    assert len(rollout_candidates(8, quick=True)) < len(rollout_candidates(8))
+
+
+def test_learner_candidates_sweep_compile():
+    assert {c["torch_compile_learner"] for c in learner_candidates(quick=True)} == {False, True}
+
+
+def test_pick_best_skips_failed_trials():
+    trials = [{"error": "boom"}, {"overrides": {"num_workers": 1}, "rate": 5.0},
+              {"overrides": {"num_workers": 2}, "rate": 9.0}]
+    assert pick_best(trials, "rate")["overrides"] == {"num_workers": 2}
+    assert pick_best([{"error": "boom"}], "rate") is None
+
+
+def test_tuned_config_overrides_only_tunable_keys(tmp_path):
+    path = str(tmp_path / "autotune.json")
+    write_tuned_config(path, {"num_workers": 3, "minibatch_size": 128, "lr": 1.0}, [], num_cpus=4, num_gpus=0)
+    config = apply_tuned_config({"num_workers": 8, "minibatch_size": 256, "lr": 1e-4}, path)
+    assert config == {"num_workers": 3, "minibatch_size": 128, "lr": 1e-4}
+    assert apply_tuned_config({"num_workers": 8}, str(tmp_path / "missing.json")) == {"num_workers": 8}
@@ -0,0 +1,47 @@
+import pytest
+from batch_simulate import gini, make_tasks, parse_ranges, run_batch, run_episode, write_results
+
+
+def test_gini_known_values():
+    assert gini([1, 1, 1, 1]) == pytest.approx(0.0)
+    assert gini([0, 0, 0, 4]) == pytest.approx(0.75)
+    assert gini([1, 2, 3, 4]) == pytest.approx(0.25)
+    assert gini([]) == 0.0
+
+
+def test_parse_ranges():
+    assert parse_ranges("50:150, 75:125") == [(50.0, 150.0), (75.0, 125.0)]
+    assert parse_ranges("0.1") == [(0.1, 0.1)]
+
+
+def test_episode_summaries_are_deterministic_per_seed():
+    first, second = make_tasks([3, 3], [(75.0, 125.0)], [(0.02, 0.15)], [(1.005, 1.025)], 4, 20, "random")
+    a, b = run_episode(first), run_episode(second)
+    for row in (a, b):
+        row.pop("task_id"), row.pop("seconds")
+    assert a == b
+    assert a["steps"] == 20 and 0.0 <= a["gini_wealth"] < 1.0
+    assert a["passed"] + a["failed"] <= a["proposals"]
+
+
+def test_run_batch_merges_all_chunks(tmp_path):
+    tasks = make_tasks(range(3), [(50.0, 150.0), (75.0, 125.0)], [(0.02, 0.15)], [(1.005, 1.025)], 4, 10, "trade")
+    seen = []
+    results = run_batch(tasks, workers=1, chunksize=4, progress=lambda done, total: seen.append(done))
+    assert [row["task_id"] for row in results] == list(range(6))
+    assert seen == [4, 6]
+    assert all(row["trades"] > 0 for row in results)
+    path = tmp_path / "results.csv"
+    write_results(str(path), results)
+    assert path.read_text().splitlines()[1].split(",")[3] == "50.0:150.0"
+
+
+def test_process_pool_results_match_in_process_run():
+    tasks = make_tasks(range(4), [(75.0, 125.0)], [(0.02, 0.15), (0.1, 0.2)], [(1.005, 1.025)], 4, 10, "random")
+    seen = []
+    pooled = run_batch(tasks, workers=2, chunksize=3, progress=lambda done, total: seen.append(done))
+    local = run_batch(tasks, workers=1)
+    assert seen[-1] == len(tasks) and len(seen) == 3  # one call per chunk
+    for row in pooled + local:
+        row.pop("seconds")
+    assert pooled == local
@@ -0,0 +1,24 @@
+from benchmarks.run_benchmarks import compare, load_results, main, result
+
+
+def test_compare_flags_slowdowns_in_either_metric_direction():
+    baseline = {"step": result(1000.0, "agent_steps/s", True), "reset": result(2.0, "ms", False)}
+    current = {"step": result(800.0, "agent_steps/s", True), "reset": result(2.1, "ms", False)}
+    rows = {name: (change, regressed) for name, _, _, change, regressed in compare(baseline, current, 0.1)}
+    assert rows["step"][1] and abs(rows["step"][0] - 0.25) < 1e-9
+    assert not rows["reset"][1]
+
+
+def test_compare_divides_out_machine_speed():
+    baseline = {"step": result(1000.0, "agent_steps/s", True)}
+    current = {"step": result(500.0, "agent_steps/s", True)}
+    [(_, _, _, change, regressed)] = compare(baseline, current, 0.1, speed_ratio=2.0)
+    assert abs(change) < 1e-9 and not regressed
+
+
+def test_baseline_round_trip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    assert main(["--agents", "4", "--steps", "5", "--repeat", "1", "--output", path]) == 0
+    results, calibration = load_results(path)
+    assert "env.step[agents=4]" in results and calibration > 0
+    assert main(["--agents", "4", "--steps", "5", "--repeat", "1", "--compare", path, "--threshold", "100"]) == 0
@@ -0,0 +1,22 @@
+from backend.callbacks import EconomyMetricsCallbacks
+
+
+class FakeEpisode:
+    def __init__(self, infos):
+        self.infos = infos
+        self.custom_metrics = {}
+
+    def last_info_for(self, agent_id):
+        return self.infos.get(agent_id)
+
+
+def test_episode_metrics_become_custom_metrics():
+    episode = FakeEpisode({"__common__": {"step_profile": {"step_us": 12.5}, "db": {"queue_depth_max": 7}}})
+    EconomyMetricsCallbacks().on_episode_end(episode=episode, env_index=0)
+    assert episode.custom_metrics == {"step_profile/step_us": 12.5, "db/queue_depth_max": 7}
+
+
+def test_episodes_without_metrics_are_ignored():
+    episode = FakeEpisode({})
+    EconomyMetricsCallbacks().on_episode_end(episode=episode, env_index=0)
+    assert episode.custom_metrics == {}
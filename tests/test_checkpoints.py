@@ -0,0 +1,86 @@
+import os
+import pickle
+import numpy as np
+import pytest
+from backend.checkpoints import (
+    find_checkpoints, latest_checkpoint, load_policy_weights, resolve_warm_start_mapping, merge_weights,
+)
+from backend.callbacks import make_warm_start_callbacks
+
+
+def make_checkpoint(path, policies, mtime):
+    os.makedirs(path)
+    with open(os.path.join(path, "algorithm_state.pkl"), "wb") as f:
+        pickle.dump({}, f)
+    for policy_id, weights in policies.items():
+        policy_dir = os.path.join(path, "policies", policy_id)
+        os.makedirs(policy_dir)
+        with open(os.path.join(policy_dir, "policy_state.pkl"), "wb") as f:
+            pickle.dump({"weights": weights}, f)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_latest_checkpoint_is_found_anywhere_below_the_experiment(tmp_path):
+    trial = tmp_path / "exp" / "PPO_DecentralizedEconomy_0"
+    make_checkpoint(str(trial / "checkpoint_000009"), {}, mtime=100)
+    newest = make_checkpoint(str(trial / "checkpoint_000010"), {}, mtime=200)
+    os.makedirs(trial / "checkpoint_tmp")  # not a checkpoint
+    assert [p.name for p in find_checkpoints(tmp_path / "exp")] == ["checkpoint_000009", "checkpoint_000010"]
+    assert latest_checkpoint(str(tmp_path / "exp")) == newest
+    assert latest_checkpoint(newest) == newest
+    assert latest_checkpoint(str(tmp_path / "missing")) is None
+
+
+def test_load_policy_weights(tmp_path):
+    checkpoint = make_checkpoint(str(tmp_path / "checkpoint_000001"),
+                                 {"agent_0": {"w": np.ones(2)}, "agent_1": {"w": np.zeros(2)}}, mtime=1)
+    weights = load_policy_weights(checkpoint, {"agent_1"})
+    assert list(weights) == ["agent_1"]
+    np.testing.assert_array_equal(weights["agent_1"]["w"], np.zeros(2))
+
+
+def test_warm_start_mapping():
+    sources = ["agent_0", "agent_1"]
+    assert resolve_warm_start_mapping(["agent_0", "agent_1"], sources) == {"agent_0": "agent_0", "agent_1": "agent_1"}
+    assert resolve_warm_start_mapping(["shared_policy"], sources, "*=agent_1") == {"shared_policy": "agent_1"}
+    assert resolve_warm_start_mapping(["role_0", "role_1"], sources, "role_0=agent_0") == {"role_0": "agent_0"}
+    with pytest.raises(ValueError):
+        resolve_warm_start_mapping(["shared_policy"], sources, "shared_policy=agent_7")
+
+
+def test_merge_weights_skips_changed_shapes():
+    current = {"fc1": np.zeros((6, 4)), "out": np.zeros(4)}
+    source = {"fc1": np.ones((9, 4)), "out": np.ones(4)}
+    merged, skipped = merge_weights(current, source)
+    assert skipped == ["fc1"]
+    np.testing.assert_array_equal(merged["out"], np.ones(4))
+
+
+class FakePolicy:
+    def get_weights(self):
+        return {"out": np.zeros(2)}
+
+
+class FakeRunnerGroup:
+    def sync_weights(self, policies):
+        self.synced = policies
+
+
+class FakeAlgorithm:
+    def __init__(self):
+        self.env_runner_group = FakeRunnerGroup()
+
+    def get_policy(self, policy_id):
+        return FakePolicy()
+
+    def set_weights(self, weights):
+        self.weights = weights
+
+
+def test_warm_start_callback_sets_and_syncs_weights(tmp_path):
+    checkpoint = make_checkpoint(str(tmp_path / "checkpoint_000001"), {"agent_0": {"out": np.ones(2)}}, mtime=1)
+    algorithm = FakeAlgorithm()
+    make_warm_start_callbacks(checkpoint, {"shared_policy": "agent_0"})().on_algorithm_init(algorithm=algorithm)
+    np.testing.assert_array_equal(algorithm.weights["shared_policy"]["out"], np.ones(2))
+    assert algorithm.env_runner_group.synced == ["shared_policy"]
@@ -0,0 +1,79 @@
+import threading
+from backend.db_connector import LocalDBConnector
+from backend.sinks import MemorySink
+
+
+class BlockedSink(MemorySink):
+    """Memory sink whose writes wait until the test releases them."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, table_name, rows):
+        self.release.wait(5)
+        super().write(table_name, rows)
+
+
+def test_rows_reach_sink_and_counters_balance():
+    connector = LocalDBConnector(batch_size=4, flush_interval=0.01, sink="memory")
+    for i in range(10):
+        connector.log_agent_state(f"agent_{i}", {"reputation": 1.0})
+    connector.log_transaction("agent_0", "buy", 100.0)
+    connector.log_governance_event("vote_yes", "agent_1", {"step": 1})
+    assert connector.flush(timeout=5)
+
+    stats = connector.stats()
+    assert stats == {"queued": 12, "written": 12, "dropped": 0, "failed": 0, "queue_depth": 0}
+    assert len(connector.sink.rows("agent_states")) == 10
+    metrics = connector.write_metrics()
+    assert metrics["batches"] >= 3 and metrics["queue_depth"] == 0
+    assert 1 <= metrics["queue_depth_max"] <= 12
+    connector.shutdown()
+
+
+def test_null_sink_never_starts_writer():
+    connector = LocalDBConnector(sink="null")
+    connector.log_agent_state("agent_0", {})
+    assert connector.writer is None
+    assert connector.stats()["queued"] == 0
+
+
+def test_drop_oldest_keeps_newest_rows():
+    sink = BlockedSink()
+    connector = LocalDBConnector(batch_size=1, flush_interval=0.01, max_queue_size=3,
+                                 backpressure="drop_oldest", sink=sink)
+    for i in range(20):
+        connector.log_agent_state(f"agent_{i}", {})
+    sink.release.set()
+    assert connector.flush(timeout=5)
+
+    stats = connector.stats()
+    assert stats["dropped"] > 0
+    assert stats["queued"] == stats["written"] + stats["dropped"] + stats["failed"]
+    assert sink.rows("agent_states")[-1]["agent_id"] == "agent_19"
+    connector.shutdown()
+
+
+def test_failed_writes_are_counted():
+    class FailingSink:
+        def write(self, table_name, rows):
+            raise RuntimeError("database down")
+
+        def close(self):
+            pass
+
+    connector = LocalDBConnector(batch_size=2, flush_interval=0.01, sink=FailingSink())
+    connector.log_agent_states(["agent_0", "agent_1"], [{}, {}])
+    assert connector.flush(timeout=5)
+    assert connector.stats()["failed"] == 2
+    connector.shutdown()
+
+
+def test_agent_state_rows_read_env_state_keys():
+    connector = LocalDBConnector(batch_size=10, flush_interval=0.01, sink="memory")
+    connector.log_agent_states(["agent_0", "agent_1"], [{"cash": 950.0, "assets": 2}, {"cash_balance": 10.0}])
+    assert connector.flush(timeout=5)
+    rows = connector.sink.rows("agent_states")
+    assert [(row["cash"], row["assets"]) for row in rows] == [(950.0, 2), (10.0, 0)]
+    connector.shutdown()
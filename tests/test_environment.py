@@ -0,0 +1,131 @@
+import subprocess
+import sys
+import numpy as np
+from backend.env.environment import DecentralizedEconomyEnv
+from backend.env.vector_env import VectorizedEconomyEnv
+
+
+def test_import_does_not_touch_database():
+    code = (
+        "import sys, backend.env.environment; "
+        "assert 'psycopg2' not in sys.modules and 'database.local_db' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_memory_sink_receives_logs():
+    env = DecentralizedEconomyEnv({"num_agents": 3, "max_steps": 5, "db_sink": "memory"})
+    env.reset()
+    for _ in range(5):
+        env.step({agent: 1 for agent in env.agents})
+    assert env.db.flush(timeout=5)
+    assert len(env.db.sink.rows("agent_states")) >= 3 * 6
+    assert env.db.sink.rows("transactions")
+
+
+def test_logged_rows_carry_run_episode_and_step():
+    config = {"num_agents": 2, "max_steps": 3, "db_sink": "memory", "db_options": {"batch_size": 7}, "run_id": "run-keys"}
+    env = DecentralizedEconomyEnv(config)
+    DecentralizedEconomyEnv(config)  # same run, same shared connector: registered once
+    for _ in range(2):
+        env.reset()
+        for _ in range(3):
+            env.step({agent: 1 for agent in env.agents})
+    assert env.db.flush(timeout=5)
+    rows = env.db.sink.rows("agent_states")
+    assert {(row["run_id"], row["env_id"]) for row in rows} == {("run-keys", "w0-v0")}
+    assert [(row["episode"], row["step"]) for row in rows[::2]] == [(e, t) for e in (0, 1) for t in range(4)]
+    assert env.db.sink.rows("simulation_runs") == [{"run_id": "run-keys", "agent_count": 2, "details": None}]
+
+
+def test_vector_env_matches_scalar_env():
+    num_agents, steps = 5, 60
+    actions = np.random.RandomState(7).randint(0, 6, size=(steps, num_agents))
+    env = DecentralizedEconomyEnv({"num_agents": num_agents, "max_steps": 25, "db_sink": "null"})
+    venv = VectorizedEconomyEnv({"num_envs": 1, "num_agents": num_agents, "max_steps": 25})
+
+    env.reset(seed=7)
+    expected = []
+    for t in range(steps):
+        obs, rewards, terminations, _, _ = env.step({f"agent_{i}": int(actions[t, i]) for i in range(num_agents)})
+        expected.append((np.stack([obs[a] for a in env.agents]), [rewards[a] for a in env.agents]))
+        if terminations["__all__"]:
+            env.reset()
+
+    venv.reset(seed=7)
+    for t in range(steps):
+        obs, rewards, done, _, infos = venv.step(actions[t:t + 1])
+        if done[0]:
+            obs = infos["final_obs"]
+        np.testing.assert_array_equal(obs[0], expected[t][0])
+        np.testing.assert_array_equal(rewards[0], expected[t][1])
+
+
+def test_profile_reports_phase_timings_on_final_step():
+    env = DecentralizedEconomyEnv({"num_agents": 3, "max_steps": 4, "db_sink": "memory", "profile": True})
+    env.reset()
+    for _ in range(4):
+        _, _, terminations, _, infos = env.step({agent: 1 for agent in env.agents})
+        assert ("__common__" in infos) == terminations["__all__"]
+    profile = infos["__common__"]["step_profile"]
+    assert profile["steps"] == 4
+    assert profile["step_us"] > 0 and profile["market_us"] > 0
+    assert set(infos["__common__"]["db"]) >= {"write_ms_mean", "queue_depth_max"}
+
+
+def _rollout(env, actions):
+    trace = []
+    for row in actions:
+        obs, rewards, *_ = env.step({f"agent_{i}": int(a) for i, a in enumerate(row)})
+        trace.append((np.stack(list(obs.values())), list(rewards.values()), env.governance.is_vote_active))
+    return trace
+
+
+def test_state_snapshot_replays_branch_exactly():
+    actions = np.random.RandomState(3).randint(0, 6, size=(40, 4))
+    env = DecentralizedEconomyEnv({"num_agents": 4, "max_steps": 100, "db_sink": "null"})
+    env.reset(seed=3)
+    _rollout(env, actions[:15])
+    blob = env.get_state()
+    assert isinstance(blob, bytes)
+
+    expected = _rollout(env, actions[15:])
+    forked = DecentralizedEconomyEnv({"num_agents": 4, "max_steps": 100, "db_sink": "null"})
+    for target in (env, forked):
+        target.set_state(blob)  # also rewinds the env's RNG
+        for (obs, rewards, active), (obs_e, rewards_e, active_e) in zip(_rollout(target, actions[15:]), expected):
+            np.testing.assert_array_equal(obs, obs_e)
+            assert rewards == rewards_e and active == active_e
+
+
+def test_seeded_envs_own_reproducible_streams():
+    from ray.rllib.env.env_context import EnvContext
+    config = {"num_agents": 4, "max_steps": 30, "db_sink": "null", "seed": 11}
+    actions = np.random.RandomState(0).randint(0, 6, size=(30, 4))
+    global_state = np.random.get_state()[1].copy()
+
+    runs = []
+    for vector_index in (0, 0, 1):
+        env = DecentralizedEconomyEnv(EnvContext(config, worker_index=0, vector_index=vector_index))
+        env.reset()
+        runs.append(_rollout(env, actions))
+    assert [r[1] for r in runs[0]] == [r[1] for r in runs[1]]
+    assert [r[1] for r in runs[0]] != [r[1] for r in runs[2]]
+    np.testing.assert_array_equal(np.random.get_state()[1], global_state)
+
+
+def test_vector_sub_envs_match_scalar_envs_with_same_spawn_key():
+    from ray.rllib.env.env_context import EnvContext
+    config = {"num_agents": 3, "max_steps": 12, "seed": 5}
+    actions = np.random.RandomState(1).randint(0, 6, size=(20, 3, 3))
+    venv = VectorizedEconomyEnv(EnvContext(dict(config, num_envs=3), worker_index=2))
+    venv.reset()
+    vector_rewards = [venv.step(actions[t])[1] for t in range(20)]
+    for e in range(3):
+        env = DecentralizedEconomyEnv(EnvContext(dict(config, db_sink="null"), worker_index=2, vector_index=e))
+        env.reset()
+        for t in range(20):
+            _, rewards, terminations, _, _ = env.step({f"agent_{i}": int(a) for i, a in enumerate(actions[t, e])})
+            np.testing.assert_array_equal(list(rewards.values()), vector_rewards[t][e])
+            if terminations["__all__"]:
+                env.reset()
@@ -0,0 +1,40 @@
+import numpy as np
+from backend.utils.governance import GovernanceModule
+
+AGENTS = [f"agent_{i}" for i in range(4)]
+
+
+def test_single_proposal_mode_rejects_second_proposal():
+    gov = GovernanceModule(AGENTS, vote_duration_steps=3)
+    assert gov.start_proposal("agent_0", "tax_rate", 0.1, current_step=1)
+    assert gov.start_proposal("agent_1", "tax_rate", 0.2, current_step=1) is None
+
+
+def test_concurrent_proposals_tally_incrementally_and_expire_in_deadline_order():
+    gov = GovernanceModule(AGENTS, vote_duration_steps=3, max_active_proposals=3)
+    first = gov.start_proposal("agent_0", "tax_rate", 0.1, current_step=1)
+    second = gov.start_proposal("agent_1", "tax_rate", 0.2, current_step=2)
+
+    # Default routing: oldest open proposal the agent has not voted on yet
+    assert gov.cast_vote("agent_2", True, weight=2.0)
+    assert gov.cast_vote("agent_2", False, weight=2.0)
+    assert not gov.cast_vote("agent_2", True)
+    assert gov.cast_vote("agent_3", False, weight=1.0, proposal_id=first.id)
+
+    assert (first.yes_weight, first.no_weight) == (2.0, 1.0)
+    assert (second.yes_weight, second.no_weight) == (0.0, 2.0)
+
+    assert gov.tally_votes(3) == []
+    assert [p.outcome for p in gov.tally_votes(4)] == ["passed"]
+    assert [p.id for p in gov.tally_votes(10)] == [second.id]
+    assert second.outcome == "failed"
+    assert not gov.is_vote_active
+
+
+def test_batch_vote_casting_from_action_array():
+    gov = GovernanceModule(AGENTS, vote_duration_steps=3)
+    proposal = gov.start_proposal("agent_0", "tax_rate", 0.1, current_step=1)
+    accepted = gov.cast_votes(AGENTS, np.array([0, 4, 5, 4]), np.array([1.0, 1.5, 2.0, 0.25]))
+    assert accepted.tolist() == [False, True, True, True]
+    assert proposal.yes_weight == 1.75
+    assert proposal.no_weight == 2.0
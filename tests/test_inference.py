@@ -0,0 +1,63 @@
+import threading
+import numpy as np
+from backend.inference import PolicyServer, infer_policy_mapping
+
+
+class FakeRecurrentPolicy:
+    """Action = obs + step count; the recurrent state counts this agent's steps."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def get_initial_state(self):
+        return [np.zeros(2, dtype=np.float32)]
+
+    def compute_actions(self, obs_batch, state_batches=None, explore=None, **kwargs):
+        self.batch_sizes.append(len(obs_batch))
+        counts = state_batches[0] + 1
+        return obs_batch[:, 0] + counts[:, 0], [counts], {}
+
+
+def test_policy_mapping_follows_training_policy_ids():
+    mode, mapping = infer_policy_mapping(["shared_policy"])
+    assert mode == "shared" and mapping("agent_3") == "shared_policy"
+    mode, mapping = infer_policy_mapping(["role_0", "role_1"])
+    assert mode == "roles" and mapping("agent_3") == "role_1"
+    mode, mapping = infer_policy_mapping(["agent_0", "agent_1"])
+    assert mode == "per_agent" and mapping("agent_1") == "agent_1"
+
+
+def test_concurrent_requests_share_forward_passes():
+    policy = FakeRecurrentPolicy()
+    server = PolicyServer({"shared_policy": policy}, lambda agent_id: "shared_policy", max_latency_ms=50)
+    results = {}
+
+    def env_loop(env):
+        results[env] = server.compute_actions(f"episode-{env}", {f"agent_{i}": np.array([10.0 * env]) for i in range(4)})
+
+    threads = [threading.Thread(target=env_loop, args=(env,)) for env in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = server.shutdown()
+    assert results[3] == {f"agent_{i}": 31.0 for i in range(4)}
+    assert stats["requests"] == 32 and stats["batches"] < 32
+    assert sum(policy.batch_sizes) == 32 and max(policy.batch_sizes) > 4
+
+
+def test_recurrent_state_is_kept_per_episode_and_in_order():
+    server = PolicyServer({"p": FakeRecurrentPolicy()}, lambda agent_id: "p", max_batch_size=8, max_latency_ms=20)
+    # Three queued steps of one agent are served in three batches, each seeing the previous state
+    futures = [server.submit("a", "agent_0", np.array([0.0])) for _ in range(3)]
+    assert [f.result(5) for f in futures] == [1.0, 2.0, 3.0]
+    assert server.compute_action("b", "agent_0", np.array([0.0])) == 1.0
+    server.end_episode("a")
+    assert server.compute_action("a", "agent_0", np.array([0.0])) == 1.0
+    server.shutdown()
+
+
+def test_single_request_is_served_after_max_latency():
+    server = PolicyServer({"p": FakeRecurrentPolicy()}, lambda agent_id: "p", max_batch_size=1024, max_latency_ms=1)
+    assert server.compute_action("a", "agent_0", np.array([5.0]), timeout=2) == 6.0
+    assert server.shutdown()["max_batch_size"] == 1
@@ -0,0 +1,69 @@
+import threading
+from backend.env.environment import DecentralizedEconomyEnv
+from backend.live_metrics import LiveMetricsPublisher, LiveMetricsWindow, MemoryChannel
+
+
+def test_window_downsamples_and_sums_counts():
+    publisher = LiveMetricsPublisher("memory")
+    window = LiveMetricsWindow(publisher, "run-a", "w0-v0", rate_hz=1e-6)  # first step only, then silent
+    for step in range(1, 6):
+        window.record(0, step, 100.0 + step, 0.05, trades=2, volume=200.0, votes_yes=1)
+    assert window.steps == 4 and window.totals["trades"] == 8  # accumulating for the next message
+    publisher.shutdown()
+    assert [m["step"] for m in publisher.channel.messages] == [1]
+    assert publisher.channel.messages[0]["market_price"] == 101.0
+
+
+def test_env_publishes_step_aggregates():
+    env = DecentralizedEconomyEnv({
+        "num_agents": 4, "max_steps": 20, "db_sink": "null", "run_id": "run-live",
+        "live_metrics": {"channel": "memory", "name": "test_env_live", "rate_hz": 0},  # every step
+    })
+    env.reset(seed=0)
+    for t in range(20):
+        env.step({agent: (t + i) % 6 for i, agent in enumerate(env.agents)})
+    publisher = env.live.publisher
+    publisher.shutdown()
+    messages = publisher.channel.messages
+    # a slow channel merges pending payloads, so every step and count arrives exactly once
+    assert messages and messages[-1]["step"] == 20 and messages[-1]["market_price"] == env.market_price
+    assert {m["run_id"] for m in messages} == {"run-live"}
+    assert sum(m["steps"] for m in messages) == 20
+    assert sum(m["trades"] for m in messages) == env.episode_counts["trades"]
+    assert set(messages[-1]) >= {"trades", "volume", "proposals", "votes_yes", "votes_no", "passed", "failed"}
+
+
+class SlowChannel(MemoryChannel):
+    """Blocks the first send until released, so later payloads pile up."""
+
+    def __init__(self, name=None):
+        super().__init__(name)
+        self.sending, self.release = threading.Event(), threading.Event()
+
+    def send(self, payloads):
+        self.sending.set()
+        self.release.wait(5)
+        super().send(payloads)
+
+
+def test_lagging_channel_merges_pending_counts():
+    channel = SlowChannel()
+    publisher = LiveMetricsPublisher(channel)
+    publisher.publish("s", {"step": 1, "steps": 1, "trades": 2})
+    assert channel.sending.wait(5)
+    publisher.publish("s", {"step": 2, "steps": 1, "trades": 3, "passed": 1})
+    publisher.publish("s", {"step": 3, "steps": 1, "trades": 4, "passed": 0})
+    channel.release.set()
+    publisher.shutdown()
+    assert channel.messages == [{"step": 1, "steps": 1, "trades": 2}, {"step": 3, "steps": 2, "trades": 7, "passed": 1}]
+
+
+def test_window_flushes_at_episode_end():
+    publisher = LiveMetricsPublisher("memory")
+    window = LiveMetricsWindow(publisher, "run-a", "w0-v0", rate_hz=1e-6)
+    for step in range(1, 4):
+        window.record(0, step, 100.0, 0.05, done=step == 3, trades=1)
+    publisher.shutdown()
+    messages = publisher.channel.messages  # step 1 may be merged into step 3 if not sent yet
+    assert messages[-1]["step"] == 3
+    assert sum(m["steps"] for m in messages) == 3 and sum(m["trades"] for m in messages) == 3
@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from database.local_db import AgentDataManager, LRUCache, PARTITIONED_TABLES, partition_name
+from retention import plan_retention
+
+
+class FakeDatabase:
+    """Stands in for LocalDatabase: keeps agent_latest_state in a dict and counts lookups."""
+
+    def __init__(self):
+        self.history, self.latest, self.indexes, self.lookups = [], {}, [], []
+
+    def create_table(self, table_name, schema):
+        pass
+
+    def create_index(self, index_name, table_name, columns, unique=False):
+        self.indexes.append((table_name, columns))
+
+    def execute_query(self, query, params=None, fetch=True, prepare=False):
+        return []
+
+    def insert_many(self, table_name, columns, rows, page_size=1000, on_conflict=None):
+        if table_name == "agent_states":
+            self.history.extend(dict(zip(columns, row)) for row in rows)
+        return len(rows)
+
+    def upsert_many(self, table_name, columns, rows, key_columns, template=None, returning=None,
+                    updates=None, page_size=1000):
+        keys = [row[:len(key_columns)] for row in rows]
+        assert len(set(keys)) == len(rows), "duplicate keys in one upsert"
+        if table_name != "agent_latest_state":
+            return []
+        for run_id, env_id, agent_id, state, reputation in rows:
+            previous = self.latest.get((run_id, env_id, agent_id))
+            if previous and updates:  # deltas merge like jsonb ||, keyframes overwrite
+                state = {**previous["state"], **state.adapted}
+                reputation = previous["reputation"] if reputation is None else reputation
+            else:
+                state = dict(state.adapted)
+            self.latest[(run_id, env_id, agent_id)] = {"run_id": run_id, "env_id": env_id, "agent_id": agent_id,
+                                                      "state": state, "reputation": reputation,
+                                                      "last_updated": None}
+        return [dict(self.latest[key]) for key in keys]
+
+    def select_data(self, table_name, columns="*", condition=None, params=None, prepare=False):
+        run_id, env_id, agent_ids = params
+        self.lookups.append(list(agent_ids))
+        return [dict(self.latest[(run_id, env_id, a)]) for a in agent_ids if (run_id, env_id, a) in self.latest]
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    cache.invalidate(["a"])
+    assert cache.get("a") is None and len(cache) == 1
+
+
+def test_agent_states_write_through_and_batch_lookup():
+    db = FakeDatabase()
+    manager = AgentDataManager(db=db, cache_size=100)
+    assert ("agent_states", "agent_id, created_at DESC, id DESC") in db.indexes
+    assert ("agent_states", "created_at, id") in db.indexes and ("transactions", "timestamp, id") in db.indexes
+
+    manager.save_agent_states([
+        {"agent_id": "agent_0", "cash": 1.0, "reputation": 1.0, "run_id": "run-a", "episode": 2, "step": 5},
+        {"agent_id": "agent_1", "cash": 2.0, "reputation": 1.0},
+        {"agent_id": "agent_0", "cash": 3.0, "reputation": 0.5},
+    ])
+    assert len(db.history) == 3
+    assert db.history[0]["run_id"] == "run-a" and db.history[0]["step"] == 5
+    assert db.history[1]["run_id"] == "unassigned"
+    assert db.history[0]["cash"] == 1.0 and db.history[0]["keyframe"] and db.history[0]["assets"] is None
+    assert manager.get_agent_state("agent_0")["state"]["cash"] == 3.0
+    assert db.lookups == []  # served from the write-through cache
+
+    # A delta row only carries changed fields; the latest state keeps the rest
+    manager.save_agent_states([{"agent_id": "agent_0", "keyframe": False, "tokens": 7}])
+    latest = manager.get_agent_state("agent_0")
+    assert latest["state"] == {"cash": 3.0, "reputation": 0.5, "tokens": 7} and latest["reputation"] == 0.5
+
+    manager.state_cache.clear()
+    states = manager.get_agent_states(["agent_0", "agent_1", "agent_9", "agent_0"])
+    assert set(states) == {"agent_0", "agent_1"}
+    assert db.lookups == [["agent_0", "agent_1", "agent_9"]]
+    manager.get_agent_states(["agent_0", "agent_1"])
+    assert len(db.lookups) == 1
+
+
+def test_partition_names_are_safe_identifiers():
+    name = partition_name("agent_states", "run-2025/01 'x'")
+    assert name.startswith("agent_states_r") and name.replace("_", "").isalnum()
+    assert name == partition_name("agent_states", "run-2025/01 'x'") != partition_name("agent_states", "run-b")
+
+
+def test_plan_retention_downsamples_then_drops():
+    now = datetime(2025, 6, 1)
+    runs = [
+        {"run_id": "live", "status": "active", "last_activity": now - timedelta(hours=1)},
+        {"run_id": "week", "status": "active", "last_activity": now - timedelta(days=8)},
+        {"run_id": "done", "status": "downsampled", "last_activity": now - timedelta(days=20)},
+        {"run_id": "old", "status": "downsampled", "last_activity": now - timedelta(days=100)},
+        {"run_id": "pinned", "status": "active", "last_activity": now - timedelta(days=100)},
+    ]
+    plan = plan_retention(runs, now, downsample_after_days=7, drop_after_days=90, keep={"pinned"})
+    assert plan == [("week", "downsample"), ("old", "drop")]
+    assert plan_retention(runs, now, 7) == [("week", "downsample"), ("pinned", "downsample")]
+
+
+class RecordingCursor:
+    """Records statements; answers the index and primary key lookups of a baseline table."""
+
+    def __init__(self, statements):
+        self.statements, self._result = statements, []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.statements.append(" ".join(query.split()))
+        if "FROM pg_indexes" in query:
+            self._result = [("agent_states_pkey",)]
+        elif "FROM pg_constraint" in query:
+            self._result = [(f"{params[0]}_agent_states_pkey",)]
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+
+def test_baseline_table_is_attached_with_the_partition_primary_key():
+    statements = []
+
+    class MigratingDatabase(FakeDatabase):
+        @contextmanager
+        def connection(self):
+            yield self
+
+        def cursor(self):
+            return RecordingCursor(statements)
+
+    manager = AgentDataManager.__new__(AgentDataManager)
+    manager.db = MigratingDatabase()
+    manager._migrate_to_partitioned('agent_states', PARTITIONED_TABLES['agent_states'])
+
+    legacy = partition_name('agent_states', 'legacy')
+    alter = next(i for i, q in enumerate(statements) if q.startswith(f"ALTER TABLE {legacy} ALTER COLUMN id"))
+    attach = next(i for i, q in enumerate(statements) if "ATTACH PARTITION" in q)
+    assert statements[1] == f"ALTER TABLE agent_states RENAME TO {legacy}"
+    assert f"DROP CONSTRAINT {legacy}_agent_states_pkey, ADD PRIMARY KEY (run_id, id)" in statements[alter]
+    assert alter < attach
+    assert sum(q.startswith(f"ALTER TABLE {legacy}") for q in statements) == 1  # one table rewrite
+    assert "setval(pg_get_serial_sequence" in statements[attach + 1]
+
+
+def test_latest_state_is_kept_per_run_and_env():
+    db = FakeDatabase()
+    manager = AgentDataManager(db=db, cache_size=100)
+    keys = {"run_id": "run-a", "episode": 0, "step": 1}
+    manager.save_agent_states([
+        {"agent_id": "agent_0", "env_id": "w0-v0", "cash": 1.0, "tokens": 5, **keys},
+        {"agent_id": "agent_0", "env_id": "w1-v0", "cash": 9.0, **keys},
+    ])
+    manager.save_agent_states([{"agent_id": "agent_0", "env_id": "w1-v0", "keyframe": False, "assets": 2, **keys}])
+    assert manager.get_agent_state("agent_0", "run-a", "w0-v0")["state"] == {"cash": 1.0, "tokens": 5}
+    assert manager.get_agent_state("agent_0", "run-a", "w1-v0")["state"] == {"cash": 9.0, "assets": 2}
+    assert manager.get_agent_state("agent_0", "run-b", "w0-v0") is None
+
+    # A keyframe replaces the state instead of merging into it
+    manager.save_agent_states([{"agent_id": "agent_0", "env_id": "w0-v0", "cash": 3.0, **keys}])
+    manager.state_cache.clear()
+    assert manager.get_agent_state("agent_0", "run-a", "w0-v0")["state"] == {"cash": 3.0}
@@ -0,0 +1,30 @@
+from backend.log_aggregator import LogAggregator, pack_rows, unpack_rows
+from backend.sinks import SINKS
+
+
+def test_packed_batches_round_trip_with_missing_fields():
+    rows = [{"agent_id": "agent_0", "keyframe": True, "cash": 1.0}, {"agent_id": "agent_1", "tokens": 3}]
+    keys, columns = pack_rows(rows)
+    assert keys == ["agent_id", "keyframe", "cash", "tokens"]
+    assert unpack_rows((keys, columns)) == [
+        {"agent_id": "agent_0", "keyframe": True, "cash": 1.0, "tokens": None},
+        {"agent_id": "agent_1", "keyframe": None, "cash": None, "tokens": 3},
+    ]
+
+
+def test_aggregator_coalesces_batches_into_one_connector():
+    aggregator = LogAggregator(sink="memory", batch_size=100, flush_interval=0.01)
+    for worker in range(3):
+        aggregator.write("transactions", pack_rows([{"agent_id": f"agent_{worker}", "price": 1.0}] * 10))
+    assert aggregator.flush(timeout=5)
+    assert len(aggregator.connector.sink.rows("transactions")) == 30
+    stats = aggregator.shutdown()
+    assert stats["batches_received"] == 3 and stats["written"] == 30
+    assert "ray_actor" in SINKS
+
+
+def test_aggregator_rate_limit_drops_excess_rows_without_blocking():
+    aggregator = LogAggregator(sink="memory", rows_per_second=5, backpressure="drop_oldest", flush_interval=0.01)
+    assert aggregator.write("transactions", pack_rows([{"agent_id": "agent_0"}] * 8)) == 5
+    assert aggregator.stats()["rate_limited"] == 3
+    aggregator.shutdown()
@@ -0,0 +1,47 @@
+import numpy as np
+from backend.env.market import BatchMarket
+
+
+def clear(market, actions, cash, assets, reputation, price=100.0, volatility=1.01, tax=0.1):
+    actions = np.array(actions)
+    cash = np.array(cash, dtype=float)
+    assets = np.array(assets, dtype=np.int64)
+    result = market.clear(actions, cash, assets, np.array(reputation, dtype=float),
+                          np.array(price), np.array(volatility), np.array(tax))
+    return result, cash, assets
+
+
+def test_fills_at_opening_price_with_net_flow_impact():
+    result, cash, assets = clear(BatchMarket(), [1, 1, 2, 2, 0], [150, 50, 0, 0, 0], [0, 0, 1, 0, 3], [1] * 5)
+    assert result.buys.tolist() == [True, False, False, False, False]
+    assert result.sells.tolist() == [False, False, True, False, False]
+    assert np.allclose(cash, [50, 50, 90, 0, 0])
+    assert assets.tolist() == [1, 0, 0, 0, 3]
+    assert np.isclose(result.new_price, 100.0)  # one buy, one sell: no net impact
+
+
+def test_outcome_does_not_depend_on_agent_order():
+    actions, cash, assets = [1, 1, 1, 2], [1000, 1000, 1000, 0], [0, 0, 0, 2]
+    forward, _, _ = clear(BatchMarket(), actions, cash, assets, [1] * 4)
+    backward, _, _ = clear(BatchMarket(), actions[::-1], cash[::-1], assets[::-1], [1] * 4)
+    assert forward.buys.tolist() == backward.buys.tolist()[::-1]
+    assert np.isclose(forward.new_price, 100.0 * 1.01 ** 2)
+    assert forward.new_price == backward.new_price
+
+
+def test_liquidity_cap_prefers_reputation_then_lower_index():
+    market = BatchMarket(max_fills_per_side=2)
+    result, _, _ = clear(market, [1, 1, 1, 1], [1000] * 4, [0] * 4, [1.0, 2.0, 1.0, 1.0])
+    assert result.buys.tolist() == [True, True, False, False]
+
+
+def test_fill_records_are_ordered_rows():
+    result, _, _ = clear(BatchMarket(), [[2, 1], [1, 0]], [[0, 500], [500, 0]], [[1, 0], [0, 0]], [[1, 1], [1, 1]],
+                         price=[100.0, 80.0], volatility=[1.01, 1.01], tax=[0.1, 0.1])
+    fills = result.fills()
+    assert fills[["env", "agent"]].tolist() == [(0, 0), (0, 1), (1, 0)]
+    assert fills["side"].tolist() == ["sell", "buy", "buy"]
+    assert fills["price"].tolist() == [100.0, 100.0, 80.0]
+    assert result.transaction_rows(["agent_0", "agent_1"])[2] == {
+        "agent_id": "agent_0", "action_type": "buy", "price": 80.0, "quantity": 1,
+    }
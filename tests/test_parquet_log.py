@@ -0,0 +1,43 @@
+import numpy as np
+from backend.db_connector import LocalDBConnector
+from backend.parquet_log import ParquetSink, read_log, read_log_numpy, list_log_files
+
+
+def test_roundtrip_through_connector(tmp_path):
+    connector = LocalDBConnector(batch_size=8, flush_interval=0.01, sink="parquet",
+                                 sink_options={"root_dir": str(tmp_path), "run_id": "run-a",
+                                               "row_group_size": 16, "rows_per_file": 32})
+    for step in range(20):
+        connector.log_agent_states(["agent_0", "agent_1"], [{"reputation": 1.0 + step}, {"tokens": 5}])
+    connector.log_transaction("agent_0", "buy", 101.5)
+    connector.log_governance_event("proposal", "agent_1", {"rule": "tax_rate", "value": 0.1})
+    connector.shutdown()
+
+    assert len(list_log_files(str(tmp_path), "agent_states", "run-a")) == 2
+    states = read_log_numpy(str(tmp_path), "agent_states", "run-a", columns=["reputation", "tokens"])
+    assert states["reputation"].shape == (40,)
+    assert np.isclose(states["reputation"].max(), 20.0)
+
+    governance = read_log(str(tmp_path), "governance_log", "run-a").to_pylist()
+    assert governance[0]["details"] == '{"rule": "tax_rate", "value": 0.1}'
+
+
+def test_empty_run_reads_as_empty_table(tmp_path):
+    ParquetSink(root_dir=str(tmp_path), run_id="empty").close()
+    assert read_log(str(tmp_path), "transactions", "empty").num_rows == 0
+
+
+def test_env_rows_land_in_the_env_run_directory(tmp_path):
+    from backend.env.environment import DecentralizedEconomyEnv
+    env = DecentralizedEconomyEnv({
+        "num_agents": 3, "max_steps": 5, "db_sink": "parquet", "run_id": "train-run-42",
+        "db_options": {"flush_interval": 0.01, "sink_options": {"root_dir": str(tmp_path)}},
+    })
+    env.reset(seed=0)
+    for _ in range(5):
+        env.step({agent: 1 for agent in env.agents})
+    env.db.shutdown()
+
+    states = read_log(str(tmp_path), "agent_states", "train-run-42")
+    assert states.num_rows > 0 and set(states.column("run_id").to_pylist()) == {"train-run-42"}
+    assert read_log(str(tmp_path), "simulation_runs", "train-run-42").num_rows == 1
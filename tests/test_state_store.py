@@ -0,0 +1,47 @@
+import numpy as np
+from backend.env.state_store import AgentStateStore, StateDeltaEncoder
+from backend.env.utils import get_initial_agent_state
+
+
+def test_reset_matches_initial_agent_state():
+    store = AgentStateStore(["agent_0", "agent_1"])
+    store.reset()
+    expected = get_initial_agent_state()
+    assert store.to_dict("agent_1") == expected
+    assert store.rows() == [expected, expected]
+
+
+def test_saved_columns_give_deltas():
+    store = AgentStateStore(["agent_0", "agent_1"])
+    store.reset()
+    store.save_columns()
+    store.cash[0] -= 100.0
+    store.assets[0] += 1
+    store.reputation[1] += 0.05
+
+    delta = store.net_worth(110.0) - store.saved_net_worth(100.0)
+    assert np.allclose(delta, [10.0, 0.0])
+    assert np.allclose(store.reputation - store.saved_reputation, [0.0, 0.05])
+
+
+def test_delta_encoder_logs_keyframes_and_changed_fields():
+    store = AgentStateStore(["agent_0", "agent_1", "agent_2"])
+    store.reset()
+    encoder = StateDeltaEncoder(store.agent_ids, keyframe_every=3)
+
+    keyframe = encoder.encode(store, 0)
+    assert len(keyframe) == 3 and all(row["keyframe"] for row in keyframe)
+    assert {k: v for k, v in keyframe[0].items() if k not in ("agent_id", "keyframe")} == \
+        {k: v for k, v in store.to_dict("agent_0").items() if k != "last_action"}
+
+    assert encoder.encode(store, 1) == []  # nobody changed
+    store.cash[1] -= 50.0
+    store.total_trades[1] += 1
+    assert encoder.encode(store, 2) == [
+        {"agent_id": "agent_1", "keyframe": False, "cash": store.cash[1].item(), "total_trades": 1}
+    ]
+    assert encoder.encode(store, 2) == []
+    assert len(encoder.encode(store, 3)) == 3  # periodic keyframe
+
+    encoder.force_keyframe()
+    assert len(encoder.encode(store, 4)) == 3
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pytest
+from backend.env.environment import DecentralizedEconomyEnv
+from backend.env.trace import list_traces, load_trace, replay_episode
+
+
+def _record(trace_dir, episodes=2, num_agents=5, max_steps=30):
+    env = DecentralizedEconomyEnv({
+        "num_agents": num_agents, "max_steps": max_steps, "db_sink": "null", "seed": 5, "trace_dir": str(trace_dir),
+    })
+    rng = np.random.RandomState(1)
+    recorded = []
+    for _ in range(episodes):
+        env.reset()
+        rewards_per_step, done = [], False
+        while not done:
+            # shuffled, partial action dicts exercise the stored agent order
+            order = rng.permutation(num_agents)[:rng.randint(1, num_agents + 1)]
+            actions = {env.agents[i]: int(rng.randint(0, 6)) for i in order}
+            _, rewards, terminations, _, _ = env.step(actions)
+            rewards_per_step.append([rewards[a] for a in env.agents])
+            done = terminations["__all__"]
+        recorded.append((rewards_per_step, env.states.get_state(), env.governance.get_state()))
+    return env, recorded
+
+
+def _outcomes(governance_state):
+    """Proposal states without the per-run id and wall-clock timestamp."""
+    proposals, _, next_seq = governance_state
+    return [p[1:6] + p[7:] for p in proposals], next_seq
+
+
+def test_recorded_episodes_replay_exactly(tmp_path):
+    env, recorded = _record(tmp_path)
+    paths = list_traces(tmp_path)
+    assert paths == env.recorder.files_written and len(paths) == 2
+
+    for path, (rewards, (floats, ints), governance) in zip(paths, recorded):
+        trace = load_trace(path)
+        assert trace["actions"].dtype == np.int8 and trace["actions"].shape == (30, 5)
+        replayed, replayed_rewards = replay_episode(path)
+        np.testing.assert_array_equal(replayed_rewards, rewards)
+        replayed_floats, replayed_ints = replayed.states.get_state()
+        np.testing.assert_array_equal(replayed_floats, floats)
+        np.testing.assert_array_equal(replayed_ints, ints)
+        assert _outcomes(replayed.governance.get_state()) == _outcomes(governance)
+
+
+def test_traces_are_compact(tmp_path):
+    _record(tmp_path, episodes=1, num_agents=50, max_steps=200)
+    assert os.path.getsize(list_traces(tmp_path)[0]) < 64 * 1024
+
+
+def test_envs_sharing_a_trace_dir_do_not_overwrite_each_other(tmp_path):
+    first, _ = _record(tmp_path, episodes=1, max_steps=5)
+    second, _ = _record(tmp_path, episodes=1, max_steps=5)  # same plain config -> same w0-v0
+    assert len(list_traces(tmp_path)) == 2
+    assert first.recorder.files_written != second.recorder.files_written
+
+    second.recorder.episode = 0  # would reuse its first file name
+    second.reset()
+    second.step({agent: 0 for agent in second.agents})
+    with pytest.raises(FileExistsError):
+        second.recorder.save()
@@ -0,0 +1,36 @@
+import logging
+from backend.utils.tracing import Tracer, INFO, WARNING, configure_tracer
+from backend.utils.governance import GovernanceModule
+
+
+def test_disabled_tracer_records_nothing(caplog):
+    tracer = Tracer("test.off", level=WARNING)
+    assert not tracer.enabled_for(INFO)
+    with caplog.at_level(logging.DEBUG, logger="economy.test.off"):
+        tracer.event("vote_cast", agent="agent_0")
+    assert caplog.records == [] and tracer.recent() == []
+
+
+def test_sampling_and_rate_limit(caplog):
+    tracer = Tracer("test.limits", level=INFO, sample_every={"vote_cast": 10}, rate_limit=1e-9, burst=2)
+    with caplog.at_level(logging.INFO, logger="economy.test.limits"):
+        for i in range(50):
+            tracer.event("vote_cast", agent=f"agent_{i}")
+    # 5 events survive sampling, only the burst of 2 passes the rate limit
+    assert [r.trace_fields["agent"] for r in caplog.records] == ["agent_9", "agent_19"]
+    assert tracer.suppressed == 3
+
+
+def test_ring_buffer_keeps_recent_governance_events():
+    tracer = configure_tracer("governance", level=WARNING, ring_size=3)
+    try:
+        governance = GovernanceModule(["a", "b"], vote_duration_steps=1)
+        proposal = governance.start_proposal("a", "tax_rate", 0.1, 0)
+        governance.cast_vote("a", True, 1.0)
+        governance.cast_vote("b", False, 2.0)
+        governance.tally_votes(1)
+        events = tracer.recent()
+        assert [e["event"] for e in events] == ["vote_cast", "vote_cast", "proposal_resolved"]
+        assert events[-1]["proposal_id"] == proposal.id and events[-1]["outcome"] == "failed"
+    finally:
+        configure_tracer("governance")
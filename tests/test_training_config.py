@@ -0,0 +1,45 @@
+import numpy as np
+from backend.env.environment import DecentralizedEconomyEnv
+from backend.env.vector_env import VectorizedEconomyEnv
+from backend.env.utils import agent_id_features
+from backend.training_config import build_multiagent_config, prepare_env_config
+
+AGENTS = [f"agent_{i}" for i in range(5)]
+
+
+def test_policy_modes_map_agents():
+    per_agent = build_multiagent_config(AGENTS, None, None, "per_agent")
+    shared = build_multiagent_config(AGENTS, None, None, "shared")
+    roles = build_multiagent_config(AGENTS, None, None, "roles", num_roles=2)
+    assert set(per_agent["policies"]) == set(AGENTS)
+    assert [shared["policy_mapping_fn"](a) for a in AGENTS] == ["shared_policy"] * 5
+    assert sorted(roles["policies"]) == ["role_0", "role_1"]
+    assert [roles["policy_mapping_fn"](a) for a in AGENTS] == ["role_0", "role_1", "role_0", "role_1", "role_0"]
+
+
+def test_shared_modes_add_agent_id_features():
+    assert "agent_id_obs" not in prepare_env_config({"num_agents": 8}, "per_agent")
+    assert prepare_env_config({"num_agents": 8}, "shared")["agent_id_obs"] == "onehot"
+    assert prepare_env_config({"num_agents": 200}, "roles")["agent_id_obs"] == "binary"
+    assert prepare_env_config({"agent_id_obs": None}, "shared")["agent_id_obs"] is None
+
+
+def test_binary_ids_are_unique():
+    features = agent_id_features(200, "binary")
+    assert features.shape == (200, 8)
+    assert len({row.tobytes() for row in features}) == 200
+
+
+def test_envs_append_id_features():
+    config = {"num_agents": 3, "max_steps": 5, "db_sink": "null", "agent_id_obs": "onehot"}
+    env = DecentralizedEconomyEnv(config)
+    obs, _ = env.reset()
+    assert env.observation_space["agent_0"].shape == (9,)
+    np.testing.assert_array_equal(obs["agent_2"][6:], [0, 0, 1])
+    obs, *_ = env.step({agent: 1 for agent in env.agents})
+    assert env.observation_space["agent_1"].contains(obs["agent_1"])
+
+    venv = VectorizedEconomyEnv(dict(config, num_envs=2))
+    vobs, _ = venv.reset()
+    assert vobs.shape == (2, 3, 9)
+    np.testing.assert_array_equal(vobs[1, :, 6:], np.eye(3))
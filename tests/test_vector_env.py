@@ -0,0 +1,55 @@
+import numpy as np
+from backend.env.vector_env import VectorizedEconomyEnv
+
+
+def make_env(**overrides):
+    config = {"num_envs": 4, "num_agents": 5, "max_steps": 12}
+    config.update(overrides)
+    return VectorizedEconomyEnv(config)
+
+
+def test_shapes_and_reset():
+    env = make_env()
+    obs, infos = env.reset(seed=0)
+    assert obs.shape == (4, 5, 6)
+    assert obs.dtype == np.float32
+    assert np.all(obs[..., 0] == 1000.0)
+
+    obs, rewards, terminated, truncated, infos = env.step(np.zeros((4, 5), dtype=np.int64))
+    assert rewards.shape == (4, 5)
+    assert terminated.shape == (4,)
+    assert not terminated.any()
+
+
+def test_invariants_under_random_actions():
+    env = make_env()
+    env.reset(seed=1)
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        env.step(rng.integers(0, 6, size=(4, 5)))
+        assert np.all(env.cash >= 0)
+        assert np.all(env.assets >= 0)
+        assert np.all(env.proposer[env.vote_active] >= 0)
+
+
+def test_auto_reset_per_economy():
+    env = make_env(max_steps=3)
+    env.reset(seed=2)
+    for _ in range(2):
+        _, _, terminated, _, infos = env.step(np.ones((4, 5), dtype=np.int64))
+        assert not terminated.any()
+    obs, _, terminated, _, infos = env.step(np.ones((4, 5), dtype=np.int64))
+    assert terminated.all()
+    assert infos["final_obs"].shape == (4, 5, 6)
+    assert np.all(env.steps == 0)
+    assert np.all(obs[..., 1] == 0)
+
+
+def test_first_proposer_wins_and_later_agents_vote():
+    env = make_env(num_envs=1, num_agents=4)
+    env.reset(seed=3)
+    env.step(np.array([[4, 3, 3, 4]]))
+    assert env.vote_active[0]
+    assert env.proposer[0] == 1
+    # agent_0 acted before the proposal existed, agent_3 after it
+    assert env.voted[0].tolist() == [False, False, False, True]
@@ -1,28 +1,50 @@
 # train.py
 
+import os
 import ray
 from ray import tune
 from dotenv import load_dotenv
 from ray.tune.registry import register_env
 from backend.env.environment import DecentralizedEconomyEnv
+from backend.training_config import (
+    build_multiagent_config, prepare_env_config, policy_settings_from_env, detect_num_gpus, apply_tuned_config,
+)
+from backend.callbacks import EconomyMetricsCallbacks
+from backend.db_connector import default_run_id
+from backend.log_aggregator import start_log_aggregators, stop_log_aggregators
 
-def main():
-    """Final optimized training script for DecentralizedEconomy POC."""
+ENV_NAME = "DecentralizedEconomy"
 
-    # ---------- 1. Register environment ----------
-    load_dotenv()
-    env_name = "DecentralizedEconomy"
-    register_env(env_name, lambda config: DecentralizedEconomyEnv(config))
 
+def build_config(env_overrides=None):
+    """
+    RLlib PPO config dict for the POC (shared with autotune.py).
+    Returns (config, temp_env); temp_env is the env used to read the spaces.
+    """
     # ---------- 2. Environment configuration ----------
     # META-LEARNING: Define parameter ranges for the distribution of tasks.
     env_config = {
-        "num_agents": 8,                  # Rich POC interactions
+        "num_agents": int(os.getenv("NUM_AGENTS", 8)),  # Rich POC interactions
         "max_steps": 120,                 # Enough for trading + governance
         "price_range": (50.0, 150.0),     # Starting market price range
         "tax_range": (0.01, 0.20),        # Starting tax rate range
-        "volatility_range": (1.005, 1.05) # Market volatility range
+        "volatility_range": (1.005, 1.05), # Market volatility range
+        "profile": True,                  # Step phase timings -> TensorBoard custom_metrics
+        "seed": int(os.environ["SEED"]) if os.getenv("SEED") else None,  # root of per-env RNG streams
+        "run_id": default_run_id(),       # $RUN_ID or a new id; keys every logged row
+        # LOG_SINK=ray_actor sends every worker's logs through one aggregator actor
+        # (LOG_AGGREGATOR_SCOPE=node for one per node) that does the database writes
+        "db_sink": os.getenv("LOG_SINK", "postgres"),
+        "db_options": {"sink_options": {"scope": os.getenv("LOG_AGGREGATOR_SCOPE", "cluster")}}
+        if os.getenv("LOG_SINK") == "ray_actor" else {},
+        # LIVE_METRICS=1 publishes per-step aggregates for the dashboard's live stream
+        "live_metrics": {"rate_hz": float(os.getenv("LIVE_METRICS_HZ", 2))} if os.getenv("LIVE_METRICS") else None,
+        **(env_overrides or {}),
     }
+    # POLICY_MODE=shared|roles maps all agents onto one (or NUM_ROLES) policies and adds
+    # agent identity features to the observations; per_agent keeps one policy per agent.
+    policy_mode, num_roles = policy_settings_from_env()
+    env_config = prepare_env_config(env_config, policy_mode)
     temp_env = DecentralizedEconomyEnv(env_config)
 
     # Access observation and action spaces for policy definitions
@@ -30,27 +52,24 @@ def main():
     act_space = temp_env.action_space["agent_0"]
 
     # ---------- 3. Multi-agent policy setup ----------
-    policies = {
-        agent_id: (None, obs_space, act_space, {}) for agent_id in temp_env.agents
-    }
+    multiagent = build_multiagent_config(temp_env.agents, obs_space, act_space, policy_mode, num_roles)
 
     # ---------- 4. RLlib PPO configuration ----------
     config = {
-        "env": env_name,
+        "env": ENV_NAME,
         "env_config": env_config,
-        "multiagent": {
-            "policies": policies,
-            "policy_mapping_fn": lambda agent_id, *args, **kwargs: agent_id,
-        },
+        "multiagent": multiagent,
+        "callbacks": EconomyMetricsCallbacks,
         "framework": "torch",
-        "torch_compile": True,
+        "torch_compile_learner": False,
         "num_workers": 8,
-        "num_envs_per_runner": 2,    # 16 parallel envs in total,
-        "num_gpus": 1,
+        "num_envs_per_env_runner": 2,  # 16 parallel envs in total,
+        "num_gpus": min(detect_num_gpus(), 1),
         "train_batch_size": 4096,
-        "sgd_minibatch_size": 256,
-        "num_sgd_iter": 5,
-        "_enable_new_api_stack": False,
+        "minibatch_size": 256,
+        "num_epochs": 5,
+        "enable_rl_module_and_learner": False,      # old API stack (policies dict, LSTM model config)
+        "enable_env_runner_and_connector_v2": False,
         "disable_env_checking": True,
         "lr": 1e-4,
 
@@ -61,6 +80,20 @@ def main():
             "max_seq_len": 20,  # The number of steps the agent can "remember".
         },
     }
+    return config, temp_env
+
+
+def main():
+    """Final optimized training script for DecentralizedEconomy POC."""
+
+    # ---------- 1. Register environment ----------
+    load_dotenv()
+    register_env(ENV_NAME, lambda config: DecentralizedEconomyEnv(config))
+    config, temp_env = build_config()
+
+    # Resource settings measured by autotune.py (configs/autotune.json), if present
+    config = apply_tuned_config(config)
+    aggregators = start_log_aggregators(config["env_config"])
 
     # ---------- 5. Start training ----------
     print("\n🚀 Starting final POC meta-learning with Ray Tune...")
@@ -81,6 +114,7 @@ def main():
         # ---------- 6. Graceful shutdown ----------
         if hasattr(temp_env, "db"):
             temp_env.db.shutdown()  # flush all Supabase logs
+        stop_log_aggregators(aggregators)
         ray.shutdown()
         print("\n✅ Final POC meta-learning completed, all logs flushed.")
 
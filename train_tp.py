@@ -1,79 +1,101 @@
+# train_tp.py
+"""
+Resumable training run.
+
+- If the Tune experiment (storage/name) exists and is restorable, it is continued from
+  its latest checkpoint via Tuner.restore (unfinished and errored trials resume).
+- Otherwise a new experiment starts, optionally warm-started from the policy weights of
+  an earlier run (--warm-start <experiment, trial or checkpoint dir>). --warm-start-map
+  selects which checkpoint policies initialise which new ones, e.g.
+  "shared_policy=agent_0" or "*=agent_0".
+
+Usage:
+    python train_tp.py                                  # start or resume
+    python train_tp.py --fresh --warm-start ~/ray_results/DecentralizedEconomy_Meta_POC
+"""
+import os
+import argparse
 import ray
 from ray import tune
 from dotenv import load_dotenv
 from ray.tune.registry import register_env
-from ray.rllib.algorithms.ppo import PPO
 from backend.env.environment import DecentralizedEconomyEnv
+from backend.training_config import apply_tuned_config
+from backend.checkpoints import latest_checkpoint, checkpoint_policy_ids, resolve_warm_start_mapping
+from backend.callbacks import make_warm_start_callbacks
+from backend.log_aggregator import start_log_aggregators, stop_log_aggregators
+from train import ENV_NAME, build_config
+
+EXPERIMENT_NAME = "DecentralizedEconomy_Meta_POC"
+
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--storage", default=os.getenv("RAY_RESULTS_DIR", "~/ray_results"),
+                        help="Tune storage directory (default: $RAY_RESULTS_DIR or ~/ray_results)")
+    parser.add_argument("--name", default=EXPERIMENT_NAME, help="Experiment name")
+    parser.add_argument("--fresh", action="store_true", help="Start a new experiment even if one can be resumed")
+    parser.add_argument("--warm-start", help="Initialise policies from the latest checkpoint under this path")
+    parser.add_argument("--warm-start-map", default=os.getenv("WARM_START_MAP"),
+                        help="target=source policy pairs, comma separated ('*=source' for all others)")
+    parser.add_argument("--iterations", type=int, default=100, help="Stop after this many training iterations")
+    return parser.parse_args(argv)
+
+
+def build_tuner(args, config):
+    storage = os.path.abspath(os.path.expanduser(args.storage))
+    experiment_path = os.path.join(storage, args.name)
+
+    if not args.fresh and tune.Tuner.can_restore(experiment_path):
+        print(f"🔁 Resuming experiment from {experiment_path}")
+        return tune.Tuner.restore(
+            experiment_path, trainable="PPO", resume_unfinished=True, resume_errored=True, param_space=config,
+        )
 
-def main():
+    if args.warm_start:
+        checkpoint = latest_checkpoint(args.warm_start)
+        if checkpoint is None:
+            raise FileNotFoundError(f"No RLlib checkpoint found under {args.warm_start}")
+        mapping = resolve_warm_start_mapping(
+            list(config["multiagent"]["policies"]), checkpoint_policy_ids(checkpoint), args.warm_start_map,
+        )
+        if not mapping:
+            raise ValueError("Warm start maps no policies; pass --warm-start-map (e.g. '*=agent_0')")
+        print(f"♻️ Warm-starting {len(mapping)} policies from {checkpoint}")
+        config["callbacks"] = make_warm_start_callbacks(checkpoint, mapping, base=config["callbacks"])
+
+    print(f"🆕 Starting experiment {experiment_path}")
+    return tune.Tuner(
+        "PPO",
+        param_space=config,
+        run_config=tune.RunConfig(
+            name=args.name,
+            storage_path=storage,
+            stop={"training_iteration": args.iterations},
+            checkpoint_config=tune.CheckpointConfig(checkpoint_frequency=10, checkpoint_at_end=True),
+            verbose=1,
+        ),
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
     load_dotenv()
-    env_name = "DecentralizedEconomy"
-    register_env(env_name, lambda config: DecentralizedEconomyEnv(config))
-
-    env_config = {
-        "num_agents": 8,
-        "max_steps": 120,
-        "price_range": (50.0, 150.0),
-        "tax_range": (0.01, 0.20),
-        "volatility_range": (1.005, 1.05)
-    }
-    temp_env = DecentralizedEconomyEnv(env_config)
-
-    obs_space = temp_env.observation_space["agent_0"]
-    act_space = temp_env.action_space["agent_0"]
-
-    policies = {
-        agent_id: (None, obs_space, act_space, {}) for agent_id in temp_env.agents
-    }
-
-    config = {
-        "env": env_name,
-        "env_config": env_config,
-        "multiagent": {
-            "policies": policies,
-            "policy_mapping_fn": lambda agent_id, *args, **kwargs: agent_id,
-        },
-        "framework": "torch",
-        "torch_compile": True,
-        "num_workers": 8,
-        "num_envs_per_env_runner": 2,
-        "num_gpus": 1,
-        "train_batch_size": 4096,
-        "sgd_minibatch_size": 256,
-        "num_sgd_iter": 5,
-        "_enable_new_api_stack": False,
-        "disable_env_checking": True,
-        "lr": 1e-4,
-        "model": {
-            "use_lstm": True,
-            "lstm_cell_size": 256,
-            "max_seq_len": 20,
-        },
-    }
-
-    checkpoint_path = r"C:\Users\Yash\ray_results\DecentralizedEconomy_Meta_POC\checkpoint_000001"
-    algo = PPO(config=config)
-    algo.restore(checkpoint_path)
-    print(f"Restored checkpoint from {checkpoint_path}")
+    register_env(ENV_NAME, lambda config: DecentralizedEconomyEnv(config))
+    config, temp_env = build_config()
+    config = apply_tuned_config(config)
+    aggregators = start_log_aggregators(config["env_config"])
 
     print("\n🚀 Starting final POC meta-learning training with Ray Tune...")
-    print("Results saved in: ~/ray_results/")
-    print("Monitor progress via: tensorboard --logdir ~/ray_results\n")
+    print(f"Results saved in: {args.storage}")
+    print(f"Monitor progress via: tensorboard --logdir {args.storage}\n")
 
     try:
-        tune.run(
-            "PPO",
-            config=config,
-            stop={"training_iteration": 100},
-            checkpoint_freq=10,
-            checkpoint_at_end=True,
-            name="DecentralizedEconomy_Meta_POC",
-            verbose=1,
-        )
+        build_tuner(args, config).fit()
     finally:
         if hasattr(temp_env, "db"):
             temp_env.db.shutdown()
+        stop_log_aggregators(aggregators)
         ray.shutdown()
         print("\n✅ Final POC meta-learning completed, all logs flushed.")
 